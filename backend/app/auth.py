@@ -1,23 +1,132 @@
+import ipaddress
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, Dict, List, FrozenSet
 from jose import JWTError, jwt
-import bcrypt
-from fastapi import Depends, HTTPException, status, Request
+from fastapi import Depends, HTTPException, Query, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.config import settings
-from app.database import get_db
-from app.models import User, UserSession
+from app.database import get_async_db
+from app.models import User, UserSession, AWSAccount, user_account_association
+from app.passwords import PasswordHasher, HashQueueFull
+from app.metrics import MeteredTTLCache
 
 security = HTTPBearer()
 
+# token -> {"user_id", "session_id", "version", "last_activity"} for sessions
+# validated recently. Entries expire quickly so revocations made on other
+# pods still apply within SESSION_CACHE_TTL_SECONDS.
+_session_cache = MeteredTTLCache("auth_sessions", maxsize=10000, ttl=settings.SESSION_CACHE_TTL_SECONDS)
+# Bumped whenever a user's sessions are revoked; older cache entries are ignored
+_session_versions: Dict[int, int] = defaultdict(int)
+# session_id -> latest activity, written to the DB in batches
+_pending_touches: Dict[int, datetime] = {}
+_session_lock = threading.Lock()
+_flusher: Optional[threading.Thread] = None
+
+# user_id -> AccountScope; cleared by admin changes to assignments or accounts
+_acl_cache = MeteredTTLCache("account_acl", maxsize=10000, ttl=300)
+_acl_lock = threading.Lock()
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
+
+_trusted_proxies = [
+    ipaddress.ip_network(cidr.strip(), strict=False)
+    for cidr in settings.TRUSTED_PROXIES.split(",") if cidr.strip()
+]
+
+# Recent login attempt times per client IP / username (sliding window)
+_login_attempts = MeteredTTLCache("login_attempts", maxsize=100000, ttl=settings.LOGIN_RATE_WINDOW_SECONDS)
+_login_attempts_lock = threading.Lock()
+
+
+def _hash_busy() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Authentication service busy, please retry",
+        headers={"Retry-After": "1"},
+    )
+
 
 def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    try:
+        return password_hasher.hash(password)
+    except HashQueueFull:
+        raise _hash_busy()
 
 
 def verify_password(plain: str, hashed: str) -> bool:
-    return bcrypt.checkpw(plain.encode("utf-8"), hashed.encode("utf-8"))
+    try:
+        return password_hasher.verify(plain, hashed)
+    except HashQueueFull:
+        raise _hash_busy()
+
+
+def _is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in _trusted_proxies)
+
+
+def client_ip(request: Request) -> str:
+    """The client's IP, read from proxy headers only when the peer is a trusted proxy.
+
+    X-Forwarded-For is walked from the right, skipping trusted hops, so a
+    client cannot pick its own address by sending the header itself.
+    """
+    peer = request.client.host if request.client else "unknown"
+    if not _is_trusted_proxy(peer):
+        return peer
+    forwarded = [h.strip() for h in request.headers.get("x-forwarded-for", "").split(",") if h.strip()]
+    for hop in reversed(forwarded):
+        if not _is_trusted_proxy(hop):
+            return hop
+    if forwarded:
+        return forwarded[0]
+    return request.headers.get("x-real-ip", "").strip() or peer
+
+
+def check_login_rate(ip: str, username: str):
+    """Reject a login with 429 once the IP or username exceeds its attempt budget.
+
+    Runs before any user lookup or hashing, so a credential-stuffing burst
+    costs a dictionary lookup per attempt instead of a bcrypt check.
+    """
+    now = time.monotonic()
+    window = settings.LOGIN_RATE_WINDOW_SECONDS
+    limits = [
+        (f"ip:{ip}", settings.LOGIN_RATE_LIMIT_PER_IP),
+        (f"user:{username.lower()}", settings.LOGIN_RATE_LIMIT_PER_USERNAME),
+    ]
+    with _login_attempts_lock:
+        for key, limit in limits:
+            attempts = _login_attempts.get(key)
+            if attempts is None:
+                attempts = deque()
+            while attempts and now - attempts[0] > window:
+                attempts.popleft()
+            if len(attempts) >= limit:
+                retry_after = int(window - (now - attempts[0])) + 1
+                raise HTTPException(
+                    status_code=429,
+                    detail="Too many login attempts, please wait",
+                    headers={"Retry-After": str(retry_after)},
+                )
+            _login_attempts[key] = attempts
+        for key, _ in limits:
+            _login_attempts[key].append(now)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -49,49 +158,232 @@ def parse_user_agent(ua: str) -> str:
     return "Unknown"
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    request: Request = None,
-    db: Session = Depends(get_db),
-) -> User:
-    token = credentials.credentials
+def invalidate_user_sessions(user_id: int):
+    """Drop every cached session of a user (revoke, password reset, disable)."""
+    with _session_lock:
+        _session_versions[user_id] += 1
+
+
+def invalidate_session_token(token: str):
+    """Drop one cached session (logout)."""
+    with _session_lock:
+        _session_cache.pop(token, None)
+
+
+def flush_session_touches(db: Optional[Session] = None):
+    """Write buffered last_activity updates in one batch."""
+    with _session_lock:
+        touches = dict(_pending_touches)
+        _pending_touches.clear()
+    if not touches:
+        return
+
+    from app.database import SessionLocal
+    own_session = db is None
+    db = db or SessionLocal()
+    try:
+        db.bulk_update_mappings(UserSession, [
+            {"id": session_id, "last_activity": ts} for session_id, ts in touches.items()
+        ])
+        db.commit()
+    except Exception:
+        db.rollback()
+        # Put the touches back unless a newer one arrived meanwhile
+        with _session_lock:
+            for session_id, ts in touches.items():
+                if _pending_touches.get(session_id, ts) <= ts:
+                    _pending_touches[session_id] = ts
+    finally:
+        if own_session:
+            db.close()
+
+
+def _flush_loop():
+    while True:
+        time.sleep(settings.SESSION_TOUCH_FLUSH_SECONDS)
+        flush_session_touches()
+
+
+def _touch(session_id: int, now: datetime):
+    global _flusher
+    with _session_lock:
+        _pending_touches[session_id] = now
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, name="session-touch-flusher", daemon=True)
+            _flusher.start()
+
+
+def _active_session(token: str):
+    return select(UserSession).where(UserSession.token == token, UserSession.is_active == True)
+
+
+def _last_activity(session: Optional[UserSession], now: datetime) -> datetime:
+    """Latest activity of a session row, counting touches not flushed yet."""
+    if not session:
+        raise HTTPException(status_code=401, detail="Session expired or revoked")
+    last = session.last_activity or now
+    last = last.replace(tzinfo=timezone.utc) if last.tzinfo is None else last
+    with _session_lock:
+        pending = _pending_touches.get(session.id)
+    return max(last, pending) if pending else last
+
+
+def _timed_out(last_activity: datetime, now: datetime) -> bool:
+    return (now - last_activity).total_seconds() / 60 > settings.SESSION_TIMEOUT_MINUTES
+
+
+async def _expire_session(db: AsyncSession, token: str, session_id: int):
+    await db.execute(update(UserSession).where(UserSession.id == session_id).values(is_active=False))
+    await db.commit()
+    with _session_lock:
+        _session_cache.pop(token, None)
+        _pending_touches.pop(session_id, None)
+    raise HTTPException(status_code=401, detail="Session timed out")
+
+
+async def authenticate_token(token: str, db: AsyncSession) -> User:
+    """Resolve a bearer token to its active user, enforcing session rules.
+
+    Validated sessions are cached per token, and last_activity is buffered
+    and flushed every SESSION_TOUCH_FLUSH_SECONDS, so a typical request does
+    a single primary-key read and no writes.
+    """
     payload = decode_token(token)
     user_id = payload.get("sub")
     if user_id is None:
         raise HTTPException(status_code=401, detail="Invalid token")
+    user_id = int(user_id)
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
     if not user.is_active:
         raise HTTPException(status_code=403, detail="Account disabled")
 
-    # Check session validity
-    session = db.query(UserSession).filter(
-        UserSession.token == token,
-        UserSession.is_active == True,
-    ).first()
-    if not session:
-        raise HTTPException(status_code=401, detail="Session expired or revoked")
+    now = datetime.now(timezone.utc)
+    with _session_lock:
+        entry = _session_cache.get(token)
+        version = _session_versions[user_id]
+    if entry is None or entry["version"] != version or entry["user_id"] != user_id:
+        # Check session validity
+        session = (await db.scalars(_active_session(token))).first()
+        entry = {
+            "user_id": user_id,
+            "last_activity": _last_activity(session, now),
+            "session_id": session.id,
+            "version": version,
+        }
 
     # Check session timeout
-    now = datetime.now(timezone.utc)
-    if session.last_activity:
-        last = session.last_activity.replace(tzinfo=timezone.utc) if session.last_activity.tzinfo is None else session.last_activity
-        inactive = (now - last).total_seconds() / 60
-        if inactive > settings.SESSION_TIMEOUT_MINUTES:
-            session.is_active = False
-            db.commit()
-            raise HTTPException(status_code=401, detail="Session timed out")
-
-    # Update last activity
-    session.last_activity = now
-    db.commit()
+    if _timed_out(entry["last_activity"], now):
+        await _expire_session(db, token, entry["session_id"])
+
+    # Update last activity (write-behind)
+    entry["last_activity"] = now
+    with _session_lock:
+        _session_cache[token] = entry
+    _touch(entry["session_id"], now)
 
     return user
 
 
+async def check_session(token: str, db: AsyncSession) -> User:
+    """Re-check the session behind a long-lived connection (event streams).
+
+    Always reads the session row, since revocations made on other pods only
+    land there, and does not count as activity, so an open stream neither
+    keeps an idle session alive nor skips its timeout.
+    """
+    user = await db.get(User, int(decode_token(token).get("sub") or 0))
+    if not user or not user.is_active:
+        raise HTTPException(status_code=401, detail="User not found or disabled")
+
+    now = datetime.now(timezone.utc)
+    session = (await db.scalars(_active_session(token))).first()
+    if _timed_out(_last_activity(session, now), now):
+        raise HTTPException(status_code=401, detail="Session timed out")
+    return user
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db),
+) -> User:
+    return await authenticate_token(credentials.credentials, db)
+
+
 async def get_admin_user(user: User = Depends(get_current_user)) -> User:
     if not user.is_admin:
         raise HTTPException(status_code=403, detail="Admin access required")
     return user
+
+
+@dataclass(frozen=True)
+class AccountScope:
+    """The AWS account IDs a user may query, resolved once and cached."""
+    user_id: int
+    is_admin: bool
+    allowed: FrozenSet[str]
+
+    def resolve(self, requested: Optional[List[str]] = None) -> Optional[List[str]]:
+        """Intersect requested account IDs with the user's entitlements.
+
+        Returns a sorted list (stable cache keys), or None for an admin who
+        requested no filter, i.e. every account.
+        """
+        if self.is_admin:
+            return sorted(set(requested)) if requested else None
+        if not self.allowed:
+            raise HTTPException(status_code=403, detail="No AWS accounts assigned")
+        if requested:
+            filtered = self.allowed.intersection(requested)
+            if not filtered:
+                raise HTTPException(status_code=403, detail="No access to requested accounts")
+            return sorted(filtered)
+        return sorted(self.allowed)
+
+    def can_see(self, account_ids: List[str]) -> bool:
+        return self.is_admin or not account_ids or bool(self.allowed.intersection(account_ids))
+
+
+async def resolve_account_scope(user: User, db: AsyncSession) -> AccountScope:
+    with _acl_lock:
+        scope = _acl_cache.get(user.id)
+    if scope is not None and scope.is_admin == bool(user.is_admin):
+        return scope
+
+    allowed = frozenset(await db.scalars(
+        select(AWSAccount.account_id).join(
+            user_account_association,
+            user_account_association.c.aws_account_id == AWSAccount.id,
+        ).where(user_account_association.c.user_id == user.id)
+    ))
+    scope = AccountScope(user_id=user.id, is_admin=bool(user.is_admin), allowed=allowed)
+    with _acl_lock:
+        _acl_cache[user.id] = scope
+    return scope
+
+
+def invalidate_account_acl(user_id: Optional[int] = None):
+    """Forget cached entitlements of one user, or of everyone (account changes)."""
+    with _acl_lock:
+        if user_id is None:
+            _acl_cache.clear()
+        else:
+            _acl_cache.pop(user_id, None)
+
+
+async def get_account_scope(
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> AccountScope:
+    return await resolve_account_scope(user, db)
+
+
+def get_account_ids(
+    account_ids: Optional[str] = Query(None, description="Comma-separated account IDs"),
+    scope: AccountScope = Depends(get_account_scope),
+) -> Optional[List[str]]:
+    """Shared route dependency: the requested account filter, restricted to the user's accounts."""
+    requested = [a for a in account_ids.split(",") if a] if account_ids else None
+    return scope.resolve(requested)
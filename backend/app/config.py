@@ -11,10 +11,50 @@ class Settings(BaseSettings):
     SESSION_TIMEOUT_MINUTES: int = 10
     MAX_ACTIVE_SESSIONS: int = 2
     MAX_LOGIN_ATTEMPTS: int = 5
+    LOGIN_RATE_WINDOW_SECONDS: int = 60
+    LOGIN_RATE_LIMIT_PER_IP: int = 20  # attempts per window before 429
+    LOGIN_RATE_LIMIT_PER_USERNAME: int = 10
+    # Peers (the nginx frontend) whose X-Forwarded-For / X-Real-IP name the real client
+    TRUSTED_PROXIES: str = "127.0.0.1/32,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16"
+    PASSWORD_HASH_WORKERS: int = 2  # bcrypt worker processes
+    PASSWORD_HASH_MAX_QUEUE: int = 16  # in-flight hashes before rejecting with 503
+    SESSION_CACHE_TTL_SECONDS: int = 30  # how long a validated session skips the DB
+    SESSION_TOUCH_FLUSH_SECONDS: int = 5  # batching interval for last_activity writes
     DATABASE_URL: str = "sqlite:///./cost_platform.db"
+    DB_POOL_SIZE: int = 10  # server databases (PostgreSQL); ignored for SQLite
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_TIMEOUT_SECONDS: int = 30
+    DB_SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    DB_SQLITE_CACHE_KB: int = 65536
     ENCRYPTION_KEY: str = os.getenv("ENCRYPTION_KEY", "VGhpcyBpcyBhIDMyIGJ5dGUga2V5ISEhISEhIQ==")
     CACHE_TTL_SECONDS: int = 300  # 5 minutes
+    AWS_ACCOUNT_CACHE_TTL_SECONDS: int = 300  # cross-replica staleness bound; local changes invalidate at once
+    AWS_CLIENT_TTL_SECONDS: int = 3600
+    AWS_MAX_POOL_CONNECTIONS: int = 25  # HTTP connections per client, >= worker threads sharing it
+    AWS_MAX_ATTEMPTS: int = 5  # botocore adaptive retry mode
+    AWS_ROLE_SESSION_SECONDS: int = 3600  # AssumeRole credential lifetime
+    AWS_ROLE_REFRESH_MARGIN_SECONDS: int = 1200  # re-assume when this close to expiry
+    AWS_ROLE_REFRESH_INTERVAL_SECONDS: int = 300
+    AWS_ROLE_REFRESH_WORKERS: int = 8
     AWS_NEWS_REFRESH_INTERVAL: int = 900  # 15 minutes
+    AWS_NEWS_FEED_TIMEOUT_SECONDS: float = 5.0  # per feed; a slow feed serves its last good copy
+    COST_HISTORY_DAYS: int = 400  # daily cost history kept for local forecasting
+    COST_HISTORY_SYNC_INTERVAL: int = 900  # 15 minutes
+    FORECAST_MIN_HISTORY_DAYS: int = 28  # below this, fall back to CE forecasts
+    BACKGROUND_JOBS_ENABLED: bool = True  # cost sync / anomaly push scheduler
+    SCHEDULER_LEASE_SECONDS: int = 60  # leader lease for singleton jobs; a dead leader is replaced after this
+    WARMUP_ENABLED: bool = True  # pre-load botocore models/clients before /api/ready turns green
+    METRICS_ENABLED: bool = True  # /metrics plus route, AWS call and DB instrumentation
+    COLD_START_BUDGET_MS: int = 2500  # import + startup + first /api/health, see scripts/profile_startup.py
+    SESSION_RETENTION_DAYS: int = 30  # sessions idle longer than this are deleted
+    LOGIN_HISTORY_RETENTION_DAYS: int = 180
+    RETENTION_BATCH_SIZE: int = 5000  # rows deleted per transaction
+    RETENTION_INTERVAL_SECONDS: int = 3600
+    AUDIT_QUEUE_SIZE: int = 10000  # queued audit rows before spilling to the fallback file
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_SECONDS: float = 1.0
+    AUDIT_FALLBACK_PATH: str = "./audit_fallback.jsonl"
 
     class Config:
         env_file = ".env"
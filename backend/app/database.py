@@ -1,16 +1,139 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.config import settings
+from app.metrics import instrument_engine
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {},
-    pool_pre_ping=True,
-)
+_url = make_url(settings.DATABASE_URL)
+_is_sqlite = _url.get_backend_name() == "sqlite"
+_is_memory = _is_sqlite and _url.database in (None, "", ":memory:")
+
+
+def _engine_kwargs() -> dict:
+    if _is_sqlite:
+        return {"connect_args": {"check_same_thread": False, "timeout": settings.DB_SQLITE_BUSY_TIMEOUT_MS / 1000}}
+    # Pre-ping only pays off for network connections a server or proxy may drop
+    return {
+        "pool_pre_ping": True,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+    }
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL lets dashboard reads proceed while the sync/audit writers commit."""
+    cursor = dbapi_connection.cursor()
+    if not _is_memory:
+        cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.DB_SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA cache_size=-{int(settings.DB_SQLITE_CACHE_KB)}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+engine = create_engine(settings.DATABASE_URL, **_engine_kwargs())
+if _is_sqlite:
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+if settings.METRICS_ENABLED:
+    instrument_engine(engine, "sync")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Async engine for async routes (auth, event streams); created on first use so
+# tooling that never serves requests does not load the async driver.
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+_async_engine = None
+_AsyncSessionLocal = None
+
+
+def get_async_engine():
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+        backend = _url.get_backend_name()
+        if backend not in _ASYNC_DRIVERS:
+            raise RuntimeError(f"No async driver configured for {backend}")
+        if _is_memory:
+            raise RuntimeError("An in-memory SQLite database cannot be shared with an async engine")
+        async_url = _url.set(drivername=_ASYNC_DRIVERS[backend])
+        _async_engine = create_async_engine(async_url, **_engine_kwargs())
+        if _is_sqlite:
+            event.listen(_async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+        if settings.METRICS_ENABLED:
+            instrument_engine(_async_engine.sync_engine, "async")
+        _AsyncSessionLocal = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+
+def async_session():
+    """New AsyncSession on the async engine."""
+    get_async_engine()
+    return _AsyncSessionLocal()
+
+
+async def dispose_async_engine():
+    if _async_engine is not None:
+        await _async_engine.dispose()
+
+
+def ensure_indexes():
+    """Create indexes declared on models that an existing database is missing.
+
+    create_all() skips tables that already exist, so indexes added to a model
+    later would otherwise never reach deployed databases.
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def ensure_columns():
+    """Add nullable columns declared on models that existing tables are missing.
+
+    Covers the additive changes this app makes; anything else (type changes,
+    new NOT NULL columns) needs a real migration.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present or not column.nullable:
+                    continue
+                col_type = column.type.compile(dialect=engine.dialect)
+                conn.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}')
+
+
+def describe_database() -> dict:
+    """Effective database configuration, as actually applied to a live connection."""
+    info = {
+        "backend": _url.get_backend_name(),
+        "driver": engine.dialect.driver,
+        "database": _url.database if _is_sqlite else _url.render_as_string(hide_password=True),
+        "pool": type(engine.pool).__name__,
+        "async_engine": _async_engine is not None,
+    }
+    if _is_sqlite:
+        with engine.connect() as conn:
+            for pragma in ("journal_mode", "synchronous", "busy_timeout", "cache_size", "temp_store"):
+                info[pragma] = conn.exec_driver_sql(f"PRAGMA {pragma}").scalar()
+    else:
+        info.update({
+            "pool_size": engine.pool.size(),
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+            "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        })
+    return info
+
 
 def get_db():
     db = SessionLocal()
@@ -18,3 +141,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with async_session() as db:
+        yield db
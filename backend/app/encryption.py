@@ -1,11 +1,15 @@
 import base64
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from functools import lru_cache
 from app.config import settings
 
 
+@lru_cache(maxsize=1)
 def _get_fernet():
+    """Derive the Fernet key on first use rather than at import (PBKDF2 is deliberately slow)."""
+    from cryptography.fernet import Fernet
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
     kdf = PBKDF2HMAC(
         algorithm=hashes.SHA256(),
         length=32,
@@ -18,12 +22,9 @@ def _get_fernet():
     return Fernet(key)
 
 
-_fernet = _get_fernet()
-
-
 def encrypt_value(value: str) -> str:
-    return _fernet.encrypt(value.encode()).decode()
+    return _get_fernet().encrypt(value.encode()).decode()
 
 
 def decrypt_value(encrypted: str) -> str:
-    return _fernet.decrypt(encrypted.encode()).decode()
+    return _get_fernet().decrypt(encrypted.encode()).decode()
@@ -1,13 +1,19 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base, SessionLocal
+from app.config import settings
+from app.database import (
+    engine, Base, SessionLocal, ensure_columns, ensure_indexes, describe_database, dispose_async_engine,
+)
 from app.models import User
-from app.auth import hash_password
+from app.auth import hash_password, flush_session_touches, password_hasher
 from app.encryption import encrypt_value
-from app.routes import auth, costs, forecast, optimizer, anomalies, optimization_hub, news, ai, admin
-
-# Create tables
-Base.metadata.create_all(bind=engine)
+from app.routes import auth, costs, forecast, optimizer, anomalies, optimization_hub, news, ai, admin, events
+from app.scheduler import start_scheduler, stop_scheduler
+from app.services.audit import audit_writer
+from app.warmup import start_warmup, warmup_status
+from app.metrics import MetricsMiddleware, render_metrics
+from app.services.aws_news import ensure_news_index, start_news_ingester, stop_news_ingester
 
 app = FastAPI(
     title="AWS Cost Management Platform",
@@ -22,7 +28,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 # Register routes
 app.include_router(auth.router)
@@ -34,6 +43,21 @@ app.include_router(optimization_hub.router)
 app.include_router(news.router)
 app.include_router(ai.router)
 app.include_router(admin.router)
+app.include_router(events.router)
+
+
+@app.on_event("startup")
+def prepare_database():
+    """Create/upgrade the schema and report the effective database configuration.
+
+    Runs at startup rather than import so tooling that only imports the app
+    (workers, scripts, tests) does not pay for it.
+    """
+    Base.metadata.create_all(bind=engine)
+    ensure_columns()
+    ensure_indexes()
+    ensure_news_index()
+    print(f"Database: {describe_database()}")
 
 
 @app.on_event("startup")
@@ -57,6 +81,50 @@ def seed_admin():
         db.close()
 
 
+@app.on_event("startup")
+def start_background_jobs():
+    audit_writer.replay_fallback()
+    start_scheduler()
+    start_warmup()
+
+
+@app.on_event("shutdown")
+def stop_background_jobs():
+    stop_scheduler()
+    flush_session_touches()
+    audit_writer.flush()
+    password_hasher.shutdown()
+
+
+@app.on_event("startup")
+async def start_news_ingestion():
+    start_news_ingester()
+
+
+@app.on_event("shutdown")
+async def stop_news_ingestion():
+    await stop_news_ingester()
+    await dispose_async_engine()
+
+
 @app.get("/api/health")
 def health():
     return {"status": "ok", "version": "1.0.0"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint (served by the backend only, not proxied under /api)."""
+    if not settings.METRICS_ENABLED:
+        return Response(status_code=404)
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/api/ready")
+def ready():
+    """Readiness: 503 until warmup has finished, so traffic only reaches warm pods."""
+    status = warmup_status()
+    if not status["ready"]:
+        return JSONResponse(status_code=503, content={"status": "warming", **status})
+    return {"status": "ready", **status}
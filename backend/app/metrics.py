@@ -0,0 +1,240 @@
+"""Prometheus metrics: HTTP routes, AWS API calls, in-memory caches, the database
+and the request threadpool, exposed at /metrics.
+
+Hot paths only do a perf_counter() and a pre-bound counter/histogram update;
+anything that needs a lock or a walk (cache sizes, pool and threadpool usage)
+is read at scrape time.
+"""
+from functools import partial
+from time import perf_counter
+
+from cachetools import Cache, TTLCache
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+# HTTP
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template and status code",
+    ["method", "route", "status"],
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and status per route template.
+
+    Routes are labelled by their template ("/api/admin/users/{user_id}"), not
+    the raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            HTTP_LATENCY.labels(method, route).observe(perf_counter() - start)
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
+
+
+# AWS API calls
+
+AWS_CALLS = Counter(
+    "aws_api_calls_total", "AWS API calls made through brokered clients",
+    ["service", "operation", "account", "outcome"],
+)
+AWS_LATENCY = Histogram(
+    "aws_api_call_duration_seconds", "AWS API call latency, including botocore retries",
+    ["service", "operation", "account"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60),
+)
+
+
+def _aws_before_call(model, context, **kwargs):
+    context["metrics_start"] = perf_counter()
+    context["metrics_operation"] = model.name
+
+
+def _aws_done(service, account, outcome, context, **kwargs):
+    start = context.get("metrics_start")
+    if start is None:
+        return
+    operation = context["metrics_operation"]
+    AWS_LATENCY.labels(service, operation, account).observe(perf_counter() - start)
+    AWS_CALLS.labels(service, operation, account, outcome).inc()
+
+
+def _aws_after_call(service, account, http_response, context, **kwargs):
+    outcome = "ok" if http_response.status_code < 300 else "error"
+    _aws_done(service, account, outcome, context)
+
+
+def instrument_aws_client(client, service: str, account: str):
+    """Count and time every call made by a boto3 client.
+
+    before-call fires once per API call (retries happen inside it), so the
+    latency covers what the caller actually waited for.
+    """
+    events = client.meta.events
+    # First among the most specific handlers, so hooks that answer the call
+    # themselves (e.g. botocore's Stubber) are still timed
+    events.register_first("before-call.*.*", _aws_before_call)
+    events.register("after-call", partial(_aws_after_call, service, account))
+    events.register("after-call-error", partial(_aws_done, service, account, "exception"))
+
+
+# Caches
+
+CACHE_HITS = Counter("cache_hits_total", "In-memory cache lookups that found a live entry", ["cache"])
+CACHE_MISSES = Counter("cache_misses_total", "In-memory cache lookups that found nothing", ["cache"])
+CACHE_EVICTIONS = Counter("cache_evictions_total", "Live entries evicted because the cache was full", ["cache"])
+CACHE_EXPIRATIONS = Counter("cache_expirations_total", "Entries dropped after their TTL", ["cache"])
+CACHE_SIZE = Gauge("cache_entries", "Entries currently held (including expired ones not yet purged)", ["cache"])
+CACHE_MAXSIZE = Gauge("cache_max_entries", "Configured cache capacity", ["cache"])
+
+
+class MeteredTTLCache(TTLCache):
+    """TTLCache reporting hits, misses, evictions, expirations and size.
+
+    Lookups are counted in ``in`` / ``get()``, which is how the services
+    probe their caches (``if key in cache: return cache[key]``), so each
+    lookup counts once.
+    """
+
+    def __init__(self, name: str, maxsize, ttl, **kwargs):
+        super().__init__(maxsize, ttl, **kwargs)
+        self._hits = CACHE_HITS.labels(name)
+        self._misses = CACHE_MISSES.labels(name)
+        self._evictions = CACHE_EVICTIONS.labels(name)
+        self._expirations = CACHE_EXPIRATIONS.labels(name)
+        # Raw size: reading it must not purge (and so mutate) the cache from the scrape thread
+        CACHE_SIZE.labels(name).set_function(partial(Cache.currsize.fget, self))
+        CACHE_MAXSIZE.labels(name).set(maxsize)
+
+    def __contains__(self, key):
+        found = super().__contains__(key)
+        (self._hits if found else self._misses).inc()
+        return found
+
+    def pop(self, key, *default):
+        # Invalidation and popitem() go through pop(); they are not lookups
+        with self.timer:
+            if TTLCache.__contains__(self, key):
+                value = self[key]
+                del self[key]
+                return value
+        if default:
+            return default[0]
+        raise KeyError(key)
+
+    def popitem(self):
+        item = super().popitem()
+        self._evictions.inc()
+        return item
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        if expired:
+            self._expirations.inc(len(expired))
+        return expired
+
+
+# Database
+
+DB_QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds", "SQL statement execution time",
+    ["engine", "statement"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+DB_CONNECTION_HOLD = Histogram(
+    "db_connection_hold_seconds", "Time a session held a pooled connection (checkout to checkin)",
+    ["engine"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DB_CONNECTIONS_IN_USE = Gauge("db_connections_in_use", "Pooled connections currently checked out", ["engine"])
+
+_STATEMENTS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+
+def _statement_kind(statement: str) -> str:
+    kind = statement.lstrip()[:6].upper()
+    return kind if kind in _STATEMENTS else "OTHER"
+
+
+def instrument_engine(engine, name: str):
+    """Time statements and connection checkouts of a (sync) SQLAlchemy engine."""
+    from sqlalchemy import event
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["metrics_query_start"].pop()
+        DB_QUERY_LATENCY.labels(name, _statement_kind(statement)).observe(perf_counter() - start)
+
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("metrics_query_start"):
+            conn.info["metrics_query_start"].pop()
+
+    hold = DB_CONNECTION_HOLD.labels(name)
+
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["metrics_checkout"] = perf_counter()
+
+    def checkin(dbapi_connection, connection_record):
+        start = connection_record.info.pop("metrics_checkout", None)
+        if start is not None:
+            hold.observe(perf_counter() - start)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine, "handle_error", handle_error)
+    event.listen(engine, "checkout", checkout)
+    event.listen(engine, "checkin", checkin)
+    if hasattr(engine.pool, "checkedout"):
+        DB_CONNECTIONS_IN_USE.labels(name).set_function(engine.pool.checkedout)
+
+
+# Request threadpool (sync endpoints and dependencies run on anyio's worker threads)
+
+THREADPOOL_SIZE = Gauge("threadpool_size", "Worker threads available to sync endpoints")
+THREADPOOL_IN_USE = Gauge("threadpool_in_use", "Worker threads currently running sync endpoints")
+THREADPOOL_WAITING = Gauge("threadpool_waiting", "Calls queued for a free worker thread")
+
+
+def _sample_threadpool():
+    # The limiter belongs to the running event loop, so it is read from the async handler
+    from anyio.to_thread import current_default_thread_limiter
+
+    limiter = current_default_thread_limiter()
+    stats = limiter.statistics()
+    THREADPOOL_SIZE.set(limiter.total_tokens)
+    THREADPOOL_IN_USE.set(stats.borrowed_tokens)
+    THREADPOOL_WAITING.set(stats.tasks_waiting)
+
+
+def render_metrics():
+    """Exposition body and content type for the /metrics endpoint."""
+    _sample_threadpool()
+    return generate_latest(), CONTENT_TYPE_LATEST
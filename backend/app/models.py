@@ -1,5 +1,6 @@
 from sqlalchemy import (
-    Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Table, JSON
+    Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Table, JSON,
+    UniqueConstraint, Float, Index,
 )
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
@@ -34,6 +35,11 @@ class User(Base):
 
 class UserSession(Base):
     __tablename__ = "user_sessions"
+    __table_args__ = (
+        Index("ix_user_sessions_user_active_created", "user_id", "is_active", "created_at"),
+        Index("ix_user_sessions_created", "created_at"),
+        Index("ix_user_sessions_last_activity", "last_activity"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -50,6 +56,10 @@ class UserSession(Base):
 
 class LoginHistory(Base):
     __tablename__ = "login_history"
+    __table_args__ = (
+        Index("ix_login_history_user_timestamp", "user_id", "timestamp"),
+        Index("ix_login_history_timestamp", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -62,6 +72,39 @@ class LoginHistory(Base):
     user = relationship("User", back_populates="login_history")
 
 
+class AuditLog(Base):
+    """Admin changes, exports and other security-relevant actions."""
+    __tablename__ = "audit_log"
+    __table_args__ = (
+        Index("ix_audit_log_timestamp", "timestamp"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    actor_id = Column(Integer, index=True)  # no FK: entries outlive deleted users
+    action = Column(String(100), nullable=False)
+    target = Column(String(255))
+    details = Column(JSON)
+    ip_address = Column(String(50))
+    timestamp = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class NewsItem(Base):
+    """An AWS feed entry, deduplicated by link; full-text indexed by news_items_fts on SQLite."""
+    __tablename__ = "news_items"
+    __table_args__ = (
+        Index("ix_news_items_category_published", "category", "published_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    link = Column(String(1000), unique=True, nullable=False)
+    title = Column(Text, nullable=False)
+    summary = Column(Text)
+    category = Column(String(100), nullable=False)
+    published = Column(String(100))  # as given by the feed, for display
+    published_at = Column(DateTime, nullable=False, index=True)
+    ingested_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+
 class AWSAccount(Base):
     __tablename__ = "aws_accounts"
 
@@ -69,11 +112,78 @@ class AWSAccount(Base):
     account_id = Column(String(20), unique=True, nullable=False, index=True)
     account_name = Column(String(255), nullable=False)
     is_root = Column(Boolean, default=False)
-    access_key_encrypted = Column(Text, nullable=False)
+    access_key_encrypted = Column(Text, nullable=False)  # encrypted "" for role accounts
     secret_key_encrypted = Column(Text, nullable=False)
+    role_arn = Column(String(255), nullable=True)  # set: assume this role from the root account
+    external_id_encrypted = Column(Text, nullable=True)
     region = Column(String(30), default="us-east-1")
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
     users = relationship("User", secondary=user_account_association, back_populates="aws_accounts")
+
+
+class CommitmentMetric(Base):
+    """One day of RI/Savings Plans coverage or utilization for an account scope."""
+    __tablename__ = "commitment_metrics"
+    __table_args__ = (
+        UniqueConstraint("metric", "scope", "date", name="uq_commitment_metric_day"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    metric = Column(String(50), nullable=False)  # ri_coverage, ri_utilization, sp_coverage, sp_utilization
+    scope = Column(String(64), nullable=False)  # "all" or a SHA-256 of the sorted account IDs
+    accounts = Column(Text, nullable=True)  # comma-joined sorted account IDs behind a hashed scope
+    date = Column(String(10), nullable=False)  # YYYY-MM-DD
+    values = Column(JSON, nullable=False, default=dict)
+    is_final = Column(Boolean, default=False)
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+
+class DailyCost(Base):
+    """Unblended cost for one day, linked account, service and region."""
+    __tablename__ = "daily_costs"
+    __table_args__ = (
+        UniqueConstraint("date", "account_id", "service", "region", name="uq_daily_cost"),
+        Index("ix_daily_costs_account_date", "account_id", "date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    date = Column(String(10), nullable=False, index=True)  # YYYY-MM-DD
+    account_id = Column(String(20), nullable=False)
+    service = Column(String(255), nullable=False)
+    region = Column(String(50), nullable=False)
+    amount = Column(Float, nullable=False, default=0.0)
+
+
+class CostHistoryDay(Base):
+    """Marks a day as ingested into daily_costs; final days are never refetched."""
+    __tablename__ = "cost_history_days"
+
+    date = Column(String(10), primary_key=True)  # YYYY-MM-DD
+    is_final = Column(Boolean, default=False)
+    synced_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class AnomalyDrilldown(Base):
+    """Precomputed root-cause breakdown of one anomaly (AWS or local)."""
+    __tablename__ = "anomaly_drilldowns"
+
+    id = Column(Integer, primary_key=True, index=True)
+    anomaly_id = Column(String(512), unique=True, nullable=False, index=True)
+    account_ids = Column(JSON, nullable=False, default=list)  # linked accounts in the root causes
+    payload = Column(JSON, nullable=False, default=dict)
+    computed_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    end_date = Column(String(10), nullable=True)  # exclusive window end the payload covers; None if none succeeded
+    error = Column(Text, nullable=True)  # last failure, kept until a retry succeeds
+    retry_after = Column(DateTime, nullable=True)
+
+
+class SchedulerLease(Base):
+    """Which replica runs the singleton background jobs, renewed until expires_at."""
+    __tablename__ = "scheduler_leases"
+
+    name = Column(String(50), primary_key=True)
+    holder = Column(String(255), nullable=False)  # host:pid:nonce of the leader process
+    expires_at = Column(DateTime, nullable=False)
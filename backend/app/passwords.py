@@ -0,0 +1,103 @@
+"""bcrypt hashing on a small dedicated process pool.
+
+bcrypt holds the CPU for the whole hash, so running it on the request
+threadpool lets a burst of logins starve every other endpoint. Work is
+sent to separate processes instead, behind a bounded queue that refuses
+new work when full rather than letting latency grow without limit.
+
+This module deliberately imports nothing from the app: pool workers are
+spawned and only need bcrypt.
+"""
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Dict, Any
+
+import bcrypt
+
+
+class HashQueueFull(Exception):
+    """Raised when the hashing queue is at capacity."""
+
+
+def _hashpw(password: str) -> str:
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+
+
+def _checkpw(plain: str, hashed: str) -> bool:
+    return bcrypt.checkpw(plain.encode("utf-8"), hashed.encode("utf-8"))
+
+
+class PasswordHasher:
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_queue)
+        self._stats_lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._latencies = deque(maxlen=500)  # seconds, most recent operations
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    # spawn, not fork: the server process runs background threads
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._pool
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self._rejected += 1
+            raise HashQueueFull()
+        started = time.perf_counter()
+        with self._stats_lock:
+            self._in_flight += 1
+        try:
+            return self._get_pool().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+            with self._stats_lock:
+                self._in_flight -= 1
+                self._completed += 1
+                self._latencies.append(time.perf_counter() - started)
+
+    def hash(self, password: str) -> str:
+        return self._run(_hashpw, password)
+
+    def verify(self, plain: str, hashed: str) -> bool:
+        return self._run(_checkpw, plain, hashed)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            latencies = sorted(self._latencies)
+            in_flight, completed, rejected = self._in_flight, self._completed, self._rejected
+
+        def pct(p):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1) if latencies else None
+
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "queue_depth": in_flight,
+            "completed": completed,
+            "rejected": rejected,
+            "latency_ms_p50": pct(0.5),
+            "latency_ms_p95": pct(0.95),
+            "latency_ms_max": pct(1.0),
+        }
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
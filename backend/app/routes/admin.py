@@ -1,25 +1,81 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+import base64
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import and_, or_, case, func
+from sqlalchemy.orm import Session, load_only
 from typing import Optional, List
+from app.config import settings
 from app.database import get_db
 from app.auth import get_admin_user
-from app.models import User, UserSession, LoginHistory, AWSAccount, user_account_association
+from app.models import User, UserSession, LoginHistory, AuditLog, AWSAccount, user_account_association
 from app.schemas import (
     UserCreate, UserUpdate, UserOut, UserDetailOut,
     AWSAccountCreate, AWSAccountUpdate, AWSAccountOut,
-    SessionOut, LoginHistoryOut, PasswordReset,
+    SessionOut, LoginHistoryOut, AuditLogOut, PasswordReset,
 )
-from app.auth import hash_password
+from app.auth import hash_password, invalidate_user_sessions, invalidate_account_acl, password_hasher
 from app.encryption import encrypt_value, decrypt_value
+from app.services.audit import record_event
+from app.services.aws_client import invalidate_account
 
 router = APIRouter(prefix="/api/admin", tags=["Admin"])
 
 
+def _encode_cursor(ts: datetime, row_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{ts.isoformat()}|{row_id}".encode()).decode()
+
+
+def _decode_cursor(cursor: str):
+    try:
+        ts, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(ts), int(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _keyset_page(q, ts_col, id_col, cursor: Optional[str], limit: int, response: Response):
+    """Newest-first page after `cursor`; the next cursor goes in X-Next-Cursor."""
+    if cursor:
+        ts, row_id = _decode_cursor(cursor)
+        q = q.filter(or_(ts_col < ts, and_(ts_col == ts, id_col < row_id)))
+    rows = q.order_by(ts_col.desc(), id_col.desc()).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers["X-Next-Cursor"] = _encode_cursor(getattr(last, ts_col.key), last.id)
+    return rows
+
+
+def _id_page(q, id_col, cursor: Optional[str], limit: int, response: Response):
+    """Ascending-id page after `cursor`; the next cursor goes in X-Next-Cursor."""
+    if cursor:
+        try:
+            after = int(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        q = q.filter(id_col > after)
+    rows = q.order_by(id_col).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = str(rows[-1].id)
+    return rows
+
+
 # ---- AWS Accounts ----
 
 @router.get("/accounts", response_model=List[AWSAccountOut])
-def list_accounts(admin: User = Depends(get_admin_user), db: Session = Depends(get_db)):
-    return db.query(AWSAccount).all()
+def list_accounts(
+    response: Response,
+    limit: int = Query(500, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    admin: User = Depends(get_admin_user),
+    db: Session = Depends(get_db),
+):
+    q = db.query(AWSAccount).options(load_only(
+        AWSAccount.id, AWSAccount.account_id, AWSAccount.account_name, AWSAccount.is_root,
+        AWSAccount.role_arn, AWSAccount.region, AWSAccount.is_active, AWSAccount.created_at,
+    ))
+    return _id_page(q, AWSAccount.id, cursor, limit, response)
 
 
 @router.post("/accounts", response_model=AWSAccountOut)
@@ -41,13 +97,17 @@ def create_account(
         account_id=data.account_id,
         account_name=data.account_name,
         is_root=data.is_root,
-        access_key_encrypted=encrypt_value(data.access_key),
-        secret_key_encrypted=encrypt_value(data.secret_key),
+        access_key_encrypted=encrypt_value(data.access_key or ""),
+        secret_key_encrypted=encrypt_value(data.secret_key or ""),
+        role_arn=data.role_arn,
+        external_id_encrypted=encrypt_value(data.external_id) if data.external_id else None,
         region=data.region,
     )
     db.add(account)
     db.commit()
     db.refresh(account)
+    invalidate_account(account.id)
+    record_event(admin.id, "account.create", account.account_id, {"is_root": account.is_root})
     return account
 
 
@@ -64,6 +124,15 @@ def update_account(
 
     if data.account_name is not None:
         account.account_name = data.account_name
+    if data.role_arn is not None:
+        if account.is_root and data.role_arn:
+            raise HTTPException(status_code=400, detail="The root account must use access keys")
+        account.role_arn = data.role_arn or None
+        if data.role_arn:
+            account.access_key_encrypted = encrypt_value("")
+            account.secret_key_encrypted = encrypt_value("")
+    if data.external_id is not None:
+        account.external_id_encrypted = encrypt_value(data.external_id) if data.external_id else None
     if data.access_key is not None:
         account.access_key_encrypted = encrypt_value(data.access_key)
     if data.secret_key is not None:
@@ -75,6 +144,9 @@ def update_account(
 
     db.commit()
     db.refresh(account)
+    invalidate_account(account.id)
+    changed = [k for k, v in data.model_dump().items() if v is not None]
+    record_event(admin.id, "account.update", account.account_id, {"fields": changed})
     return account
 
 
@@ -87,20 +159,50 @@ def delete_account(
     account = db.query(AWSAccount).filter(AWSAccount.id == account_id).first()
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
+    aws_account_id = account.account_id
     db.delete(account)
     db.commit()
+    invalidate_account(account_id)
+    invalidate_account_acl()
+    record_event(admin.id, "account.delete", aws_account_id)
     return {"message": "Account deleted"}
 
 
 # ---- Users ----
 
 @router.get("/users", response_model=List[UserDetailOut])
-def list_users(admin: User = Depends(get_admin_user), db: Session = Depends(get_db)):
-    users = db.query(User).all()
+def list_users(
+    response: Response,
+    limit: int = Query(500, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    is_active: Optional[bool] = Query(None),
+    include_password: bool = Query(False, description="Decrypt and return stored passwords"),
+    admin: User = Depends(get_admin_user),
+    db: Session = Depends(get_db),
+):
+    columns = [User.id, User.username, User.is_admin, User.is_active, User.login_attempts, User.created_at]
+    if include_password:
+        columns.append(User.plain_password_encrypted)
+    q = db.query(User).options(load_only(*columns))
+    if is_active is not None:
+        q = q.filter(User.is_active == is_active)
+    users = _id_page(q, User.id, cursor, limit, response)
+
+    # Account assignments for the whole page in one query
+    account_ids = {u.id: [] for u in users}
+    if users:
+        rows = db.query(
+            user_account_association.c.user_id, user_account_association.c.aws_account_id,
+        ).filter(user_account_association.c.user_id.in_(account_ids)).order_by(
+            user_account_association.c.aws_account_id,
+        )
+        for user_id, aws_account_id in rows:
+            account_ids[user_id].append(aws_account_id)
+
     result = []
     for u in users:
         plain = None
-        if u.plain_password_encrypted:
+        if include_password and u.plain_password_encrypted:
             try:
                 plain = decrypt_value(u.plain_password_encrypted)
             except Exception:
@@ -112,12 +214,35 @@ def list_users(admin: User = Depends(get_admin_user), db: Session = Depends(get_
             is_active=u.is_active,
             login_attempts=u.login_attempts,
             created_at=u.created_at,
-            account_ids=[acc.id for acc in u.aws_accounts],
+            account_ids=account_ids[u.id],
             plain_password=plain,
         ))
     return result
 
 
+@router.get("/users/stats")
+def user_stats(admin: User = Depends(get_admin_user), db: Session = Depends(get_db)):
+    """User counts by state in a single aggregate query."""
+    locked = User.login_attempts >= settings.MAX_LOGIN_ATTEMPTS
+    row = db.query(
+        func.count(User.id),
+        func.coalesce(func.sum(case((User.is_active == True, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((User.is_admin == True, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((locked, 1), else_=0)), 0),
+        db.query(func.count(func.distinct(UserSession.user_id)))
+          .filter(UserSession.is_active == True).scalar_subquery(),
+    ).one()
+    total, active, admins, locked_count, online = row
+    return {
+        "total": total,
+        "active": active,
+        "disabled": total - active,
+        "admins": admins,
+        "locked": locked_count,
+        "with_active_sessions": online,
+    }
+
+
 @router.post("/users", response_model=UserOut)
 def create_user(
     data: UserCreate,
@@ -144,6 +269,10 @@ def create_user(
 
     db.commit()
     db.refresh(user)
+    invalidate_account_acl(user.id)
+    record_event(admin.id, "user.create", user.username, {
+        "is_admin": user.is_admin, "account_ids": [acc.id for acc in user.aws_accounts],
+    })
 
     return UserOut(
         id=user.id,
@@ -171,14 +300,40 @@ def update_user(
         user.is_active = data.is_active
         if data.is_active:
             user.login_attempts = 0
+        else:
+            invalidate_user_sessions(user_id)
     if data.account_ids is not None:
         accounts = db.query(AWSAccount).filter(AWSAccount.id.in_(data.account_ids)).all()
         user.aws_accounts = accounts
 
     db.commit()
+    invalidate_account_acl(user_id)
+    record_event(admin.id, "user.update", user.username, {
+        "is_active": data.is_active, "account_ids": data.account_ids,
+    })
     return {"message": "User updated"}
 
 
+@router.get("/users/{user_id}/password")
+def reveal_password(
+    user_id: int,
+    admin: User = Depends(get_admin_user),
+    db: Session = Depends(get_db),
+):
+    """Decrypt one user's stored password, on demand from the admin UI."""
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    plain = None
+    if user.plain_password_encrypted:
+        try:
+            plain = decrypt_value(user.plain_password_encrypted)
+        except Exception:
+            plain = None
+    record_event(admin.id, "user.password_reveal", user.username)
+    return {"plain_password": plain}
+
+
 @router.post("/users/{user_id}/reset-password")
 def reset_password(
     user_id: int,
@@ -201,6 +356,8 @@ def reset_password(
     ).update({"is_active": False})
 
     db.commit()
+    invalidate_user_sessions(user_id)
+    record_event(admin.id, "user.reset_password", user.username)
     return {"message": "Password reset successfully"}
 
 
@@ -215,8 +372,12 @@ def delete_user(
         raise HTTPException(status_code=404, detail="User not found")
     if user.username == "kpiadmin":
         raise HTTPException(status_code=400, detail="Cannot delete the primary admin")
+    username = user.username
     db.delete(user)
     db.commit()
+    invalidate_user_sessions(user_id)
+    invalidate_account_acl(user_id)
+    record_event(admin.id, "user.delete", username)
     return {"message": "User deleted"}
 
 
@@ -224,14 +385,17 @@ def delete_user(
 
 @router.get("/sessions", response_model=List[SessionOut])
 def list_sessions(
+    response: Response,
     user_id: Optional[int] = Query(None),
+    limit: int = Query(200, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
     admin: User = Depends(get_admin_user),
     db: Session = Depends(get_db),
 ):
     q = db.query(UserSession)
     if user_id:
         q = q.filter(UserSession.user_id == user_id)
-    return q.order_by(UserSession.created_at.desc()).limit(200).all()
+    return _keyset_page(q, UserSession.created_at, UserSession.id, cursor, limit, response)
 
 
 @router.post("/sessions/{session_id}/revoke")
@@ -245,6 +409,8 @@ def revoke_session(
         raise HTTPException(status_code=404, detail="Session not found")
     session.is_active = False
     db.commit()
+    invalidate_user_sessions(session.user_id)
+    record_event(admin.id, "session.revoke", str(session_id), {"user_id": session.user_id})
     return {"message": "Session revoked"}
 
 
@@ -259,6 +425,8 @@ def revoke_all_sessions(
         UserSession.is_active == True,
     ).update({"is_active": False})
     db.commit()
+    invalidate_user_sessions(user_id)
+    record_event(admin.id, "session.revoke_all", str(user_id))
     return {"message": "All sessions revoked"}
 
 
@@ -266,12 +434,39 @@ def revoke_all_sessions(
 
 @router.get("/login-history", response_model=List[LoginHistoryOut])
 def login_history(
+    response: Response,
     user_id: Optional[int] = Query(None),
     limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
     admin: User = Depends(get_admin_user),
     db: Session = Depends(get_db),
 ):
     q = db.query(LoginHistory)
     if user_id:
         q = q.filter(LoginHistory.user_id == user_id)
-    return q.order_by(LoginHistory.timestamp.desc()).limit(limit).all()
+    return _keyset_page(q, LoginHistory.timestamp, LoginHistory.id, cursor, limit, response)
+
+
+# ---- Audit Log ----
+
+@router.get("/audit-log", response_model=List[AuditLogOut])
+def audit_log(
+    response: Response,
+    actor_id: Optional[int] = Query(None),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    admin: User = Depends(get_admin_user),
+    db: Session = Depends(get_db),
+):
+    q = db.query(AuditLog)
+    if actor_id:
+        q = q.filter(AuditLog.actor_id == actor_id)
+    return _keyset_page(q, AuditLog.timestamp, AuditLog.id, cursor, limit, response)
+
+
+# ---- System ----
+
+@router.get("/auth-pool")
+def auth_pool_stats(admin: User = Depends(get_admin_user)):
+    """Password hashing pool queue depth, latency and rejections."""
+    return password_hasher.stats()
@@ -1,10 +1,10 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Optional, List
 from app.database import get_db
-from app.auth import get_current_user
-from app.models import User
+from app.auth import AccountScope, get_account_scope, get_account_ids
 from app.services.anomaly_detection import get_anomalies
+from app.services.anomaly_drilldown import get_drilldown
 
 router = APIRouter(prefix="/api/anomalies", tags=["Anomaly Detection"])
 
@@ -12,15 +12,30 @@ router = APIRouter(prefix="/api/anomalies", tags=["Anomaly Detection"])
 @router.get("/")
 def anomalies(
     days_back: int = Query(90, ge=1, le=365),
-    account_ids: Optional[str] = Query(None),
-    user: User = Depends(get_current_user),
+    monitor_arn: Optional[str] = Query(None),
+    min_impact: Optional[float] = Query(None, ge=0),
+    acct_list: Optional[List[str]] = Depends(get_account_ids),
     db: Session = Depends(get_db),
 ):
-    acct_list = account_ids.split(",") if account_ids else None
-    if not user.is_admin and acct_list:
-        allowed = [acc.account_id for acc in user.aws_accounts]
-        acct_list = [a for a in acct_list if a in allowed]
-    elif not user.is_admin:
-        acct_list = [acc.account_id for acc in user.aws_accounts] or None
+    return get_anomalies(db, acct_list, days_back, monitor_arn, min_impact)
 
-    return get_anomalies(db, acct_list, days_back)
+
+@router.get("/{anomaly_id:path}/drilldown")
+def anomaly_drilldown(
+    anomaly_id: str,
+    scope: AccountScope = Depends(get_account_scope),
+    db: Session = Depends(get_db),
+):
+    drilldown = get_drilldown(db, anomaly_id)
+    if not drilldown:
+        raise HTTPException(status_code=404, detail="Drilldown not ready")
+    if not scope.can_see(drilldown.account_ids):
+        raise HTTPException(status_code=403, detail="No access to this anomaly")
+    if drilldown.end_date is None:
+        raise HTTPException(status_code=503, detail=f"Drilldown failed: {drilldown.error}")
+
+    return {
+        "anomaly_id": drilldown.anomaly_id,
+        "computed_at": drilldown.computed_at,
+        **drilldown.payload,
+    }
@@ -2,22 +2,26 @@ from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone
 from app.database import get_db
-from app.models import User, UserSession, LoginHistory
+from app.models import User, UserSession, user_account_association
 from app.schemas import LoginRequest, TokenResponse, UserOut
 from app.auth import (
     hash_password, verify_password, create_access_token,
     get_current_user, parse_user_agent,
+    invalidate_user_sessions, invalidate_session_token, check_login_rate, client_ip,
 )
 from app.config import settings
+from app.services.audit import record_login
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
 
 @router.post("/login", response_model=TokenResponse)
 def login(req: LoginRequest, request: Request, db: Session = Depends(get_db)):
+    ip = client_ip(request)
+    check_login_rate(ip, req.username)
+
     user = db.query(User).filter(User.username == req.username).first()
 
-    ip = request.client.host if request.client else "unknown"
     ua = request.headers.get("user-agent", "")
     browser = parse_user_agent(ua)
 
@@ -37,11 +41,8 @@ def login(req: LoginRequest, request: Request, db: Session = Depends(get_db)):
 
     if not verify_password(req.password, user.hashed_password):
         user.login_attempts += 1
-        db.add(LoginHistory(
-            user_id=user.id, ip_address=ip, user_agent=ua,
-            browser=browser, success=False,
-        ))
         db.commit()
+        record_login(user.id, ip, ua, browser, success=False)
         remaining = settings.MAX_LOGIN_ATTEMPTS - user.login_attempts
         raise HTTPException(
             status_code=401,
@@ -63,6 +64,7 @@ def login(req: LoginRequest, request: Request, db: Session = Depends(get_db)):
         if oldest:
             oldest.is_active = False
             db.flush()
+            invalidate_user_sessions(user.id)
 
     # Reset login attempts on successful login
     user.login_attempts = 0
@@ -79,13 +81,8 @@ def login(req: LoginRequest, request: Request, db: Session = Depends(get_db)):
         browser=browser,
     )
     db.add(session)
-
-    # Log successful login
-    db.add(LoginHistory(
-        user_id=user.id, ip_address=ip, user_agent=ua,
-        browser=browser, success=True,
-    ))
     db.commit()
+    record_login(user.id, ip, ua, browser, success=True)
 
     account_ids = [acc.id for acc in user.aws_accounts]
 
@@ -117,12 +114,18 @@ def logout(
     if session:
         session.is_active = False
         db.commit()
+    invalidate_session_token(token)
     return {"message": "Logged out"}
 
 
 @router.get("/me", response_model=UserOut)
-def get_me(user: User = Depends(get_current_user)):
-    account_ids = [acc.id for acc in user.aws_accounts]
+def get_me(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    # user was loaded by the async auth session, so its relationships are read here
+    account_ids = [
+        account_id for (account_id,) in db.query(user_account_association.c.aws_account_id).filter(
+            user_account_association.c.user_id == user.id
+        )
+    ]
     return UserOut(
         id=user.id,
         username=user.username,
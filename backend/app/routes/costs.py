@@ -1,10 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from datetime import datetime, timedelta, timezone
 from app.database import get_db
-from app.auth import get_current_user
-from app.models import User
+from app.auth import AccountScope, get_account_scope, get_account_ids
+from app.services.audit import record_event
 from app.services.cost_explorer import (
     get_cost_overview, get_cost_by_service, get_cost_by_region,
     get_cost_by_account, get_cost_by_usage_type, get_top_resources,
@@ -24,33 +24,14 @@ def _make_end_exclusive(end_date: str) -> str:
     return (ed + timedelta(days=1)).strftime("%Y-%m-%d")
 
 
-def _get_user_account_ids(user: User, requested: Optional[List[str]] = None) -> Optional[List[str]]:
-    """Get account IDs the user has access to."""
-    if user.is_admin:
-        return requested  # Admin can access all
-    allowed = [acc.account_id for acc in user.aws_accounts]
-    if not allowed:
-        raise HTTPException(status_code=403, detail="No AWS accounts assigned")
-    if requested:
-        filtered = [a for a in requested if a in allowed]
-        if not filtered:
-            raise HTTPException(status_code=403, detail="No access to requested accounts")
-        return filtered
-    return allowed
-
-
 @router.get("/overview")
 def cost_overview(
     start_date: str = Query(..., description="YYYY-MM-DD"),
     end_date: str = Query(..., description="YYYY-MM-DD"),
     granularity: str = Query("DAILY", description="DAILY or MONTHLY"),
-    account_ids: Optional[str] = Query(None, description="Comma-separated account IDs"),
-    user: User = Depends(get_current_user),
+    acct_list: Optional[List[str]] = Depends(get_account_ids),
     db: Session = Depends(get_db),
 ):
-    acct_list = account_ids.split(",") if account_ids else None
-    acct_list = _get_user_account_ids(user, acct_list)
-
     aws_end = _make_end_exclusive(end_date)
     current = get_cost_overview(db, start_date, aws_end, granularity, acct_list)
 
@@ -83,13 +64,9 @@ def cost_overview(
 def cost_by_service(
     start_date: str = Query(...),
     end_date: str = Query(...),
-    account_ids: Optional[str] = Query(None),
-    user: User = Depends(get_current_user),
+    acct_list: Optional[List[str]] = Depends(get_account_ids),
     db: Session = Depends(get_db),
 ):
-    acct_list = account_ids.split(",") if account_ids else None
-    acct_list = _get_user_account_ids(user, acct_list)
-
     aws_end = _make_end_exclusive(end_date)
     current = get_cost_by_service(db, start_date, aws_end, acct_list)
 
@@ -122,12 +99,9 @@ def cost_by_service(
 def cost_by_region(
     start_date: str = Query(...),
     end_date: str = Query(...),
-    account_ids: Optional[str] = Query(None),
-    user: User = Depends(get_current_user),
+    acct_list: Optional[List[str]] = Depends(get_account_ids),
     db: Session = Depends(get_db),
 ):
-    acct_list = account_ids.split(",") if account_ids else None
-    acct_list = _get_user_account_ids(user, acct_list)
     return get_cost_by_region(db, start_date, _make_end_exclusive(end_date), acct_list)
 
 
@@ -135,12 +109,9 @@ def cost_by_region(
 def cost_by_account(
     start_date: str = Query(...),
     end_date: str = Query(...),
-    account_ids: Optional[str] = Query(None),
-    user: User = Depends(get_current_user),
+    acct_list: Optional[List[str]] = Depends(get_account_ids),
     db: Session = Depends(get_db),
 ):
-    acct_list = account_ids.split(",") if account_ids else None
-    acct_list = _get_user_account_ids(user, acct_list)
     return get_cost_by_account(db, start_date, _make_end_exclusive(end_date), acct_list)
 
 
@@ -148,12 +119,9 @@ def cost_by_account(
 def cost_by_usage_type(
     start_date: str = Query(...),
     end_date: str = Query(...),
-    account_ids: Optional[str] = Query(None),
-    user: User = Depends(get_current_user),
+    acct_list: Optional[List[str]] = Depends(get_account_ids),
     db: Session = Depends(get_db),
 ):
-    acct_list = account_ids.split(",") if account_ids else None
-    acct_list = _get_user_account_ids(user, acct_list)
     return get_cost_by_usage_type(db, start_date, _make_end_exclusive(end_date), acct_list)
 
 
@@ -161,25 +129,19 @@ def cost_by_usage_type(
 def top_resources(
     start_date: str = Query(...),
     end_date: str = Query(...),
-    account_ids: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
-    user: User = Depends(get_current_user),
+    acct_list: Optional[List[str]] = Depends(get_account_ids),
     db: Session = Depends(get_db),
 ):
-    acct_list = account_ids.split(",") if account_ids else None
-    acct_list = _get_user_account_ids(user, acct_list)
     return get_top_resources(db, start_date, _make_end_exclusive(end_date), acct_list, page, page_size)
 
 
 @router.get("/six-month-comparison")
 def six_month_comparison(
-    account_ids: Optional[str] = Query(None),
-    user: User = Depends(get_current_user),
+    acct_list: Optional[List[str]] = Depends(get_account_ids),
     db: Session = Depends(get_db),
 ):
-    acct_list = account_ids.split(",") if account_ids else None
-    acct_list = _get_user_account_ids(user, acct_list)
     return get_six_month_comparison(db, acct_list)
 
 
@@ -187,9 +149,9 @@ def six_month_comparison(
 def export_costs(
     start_date: str = Query(...),
     end_date: str = Query(...),
-    account_ids: Optional[str] = Query(None),
     format: str = Query("csv", description="csv or xlsx"),
-    user: User = Depends(get_current_user),
+    acct_list: Optional[List[str]] = Depends(get_account_ids),
+    scope: AccountScope = Depends(get_account_scope),
     db: Session = Depends(get_db),
 ):
     """Export cost data as CSV/Excel."""
@@ -197,10 +159,9 @@ def export_costs(
     import csv
     import io
 
-    acct_list = account_ids.split(",") if account_ids else None
-    acct_list = _get_user_account_ids(user, acct_list)
 
     resources = get_top_resources(db, start_date, _make_end_exclusive(end_date), acct_list, 1, 1000)
+    filename = f"costs_{start_date}_{end_date}.{'csv' if format == 'csv' else 'xlsx'}"
 
     if format == "csv":
         output = io.StringIO()
@@ -209,10 +170,11 @@ def export_costs(
         for r in resources["resources"]:
             writer.writerow([r["service"], r["name"], r["cost"]])
         output.seek(0)
+        record_event(scope.user_id, "costs.export", filename, {"rows": len(resources["resources"]), "account_ids": acct_list})
         return StreamingResponse(
             iter([output.getvalue()]),
             media_type="text/csv",
-            headers={"Content-Disposition": f"attachment; filename=costs_{start_date}_{end_date}.csv"},
+            headers={"Content-Disposition": f"attachment; filename={filename}"},
         )
     else:
         from openpyxl import Workbook
@@ -225,8 +187,9 @@ def export_costs(
         output = io.BytesIO()
         wb.save(output)
         output.seek(0)
+        record_event(scope.user_id, "costs.export", filename, {"rows": len(resources["resources"]), "account_ids": acct_list})
         return StreamingResponse(
             output,
             media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename=costs_{start_date}_{end_date}.xlsx"},
+            headers={"Content-Disposition": f"attachment; filename={filename}"},
         )
@@ -0,0 +1,63 @@
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from app.database import async_session
+from app.auth import AccountScope, authenticate_token, check_session, resolve_account_scope
+from app.services.events import broker, format_sse
+
+router = APIRouter(prefix="/api/events", tags=["Events"])
+
+# Comment lines keep proxies (nginx, ALB) from closing idle streams
+_HEARTBEAT_SECONDS = 15
+# How often an open stream re-checks its session (revocation, timeout, ACL changes)
+_REVALIDATE_SECONDS = 60
+
+
+async def _revalidate(token: str) -> Optional[AccountScope]:
+    """Current account scope of the stream's session, or None once it is no longer valid."""
+    async with async_session() as db:
+        try:
+            return await resolve_account_scope(await check_session(token, db), db)
+        except HTTPException:
+            return None
+
+
+@router.get("/stream")
+async def stream(
+    request: Request,
+    token: str = Query(..., description="Access token; EventSource cannot send headers"),
+):
+    """Server-Sent Events: anomalies.detected, costs.refreshed."""
+    # Authenticate with a short-lived session; the stream itself holds no DB connection
+    async with async_session() as db:
+        scope = await resolve_account_scope(await authenticate_token(token, db), db)
+
+    sub = broker.subscribe(scope.user_id, scope.is_admin, scope.allowed)
+
+    async def events():
+        loop = asyncio.get_running_loop()
+        next_check = loop.time() + _REVALIDATE_SECONDS
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                if loop.time() >= next_check:
+                    current = await _revalidate(token)
+                    if current is None:
+                        return  # revoked or timed out; the reconnect will get a 401
+                    sub.is_admin, sub.allowed_accounts = current.is_admin, current.allowed
+                    next_check = loop.time() + _REVALIDATE_SECONDS
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), timeout=_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            broker.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -8,10 +8,12 @@ router = APIRouter(prefix="/api/news", tags=["AWS News"])
 @router.get("/")
 async def news(
     category: Optional[str] = Query(None),
+    q: Optional[str] = Query(None, description="Keyword search over title and summary"),
     limit: int = Query(50, ge=1, le=100),
+    offset: int = Query(0, ge=0),
 ):
-    items = await fetch_aws_news(category, limit)
-    return {"items": items, "total": len(items)}
+    items, total = await fetch_aws_news(category, q, limit, offset)
+    return {"items": items, "total": total}
 
 
 @router.get("/categories")
@@ -1,62 +1,92 @@
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Optional, List
 from app.database import get_db
-from app.auth import get_current_user
-from app.models import User
+from app.auth import get_account_ids
 from app.services.optimization_hub import (
     get_optimization_recommendations,
+    get_optimization_summary,
+    list_optimization_recommendations,
     get_savings_plans_recommendations,
     get_reservation_recommendations,
+    get_commitment_recommendation_matrix,
+    simulate_savings_plan_commitments,
 )
+from app.services.commitments import get_commitment_metrics
 
 router = APIRouter(prefix="/api/optimization-hub", tags=["Cost Optimization Hub"])
 
 
 @router.get("/recommendations")
 def recommendations(
-    account_ids: Optional[str] = Query(None),
-    user: User = Depends(get_current_user),
+    acct_list: Optional[List[str]] = Depends(get_account_ids),
     db: Session = Depends(get_db),
 ):
-    acct_list = account_ids.split(",") if account_ids else None
-    if not user.is_admin and acct_list:
-        allowed = [acc.account_id for acc in user.aws_accounts]
-        acct_list = [a for a in acct_list if a in allowed]
-    elif not user.is_admin:
-        acct_list = [acc.account_id for acc in user.aws_accounts] or None
-
     return get_optimization_recommendations(db, acct_list)
 
 
+@router.get("/summary")
+def summary(
+    acct_list: Optional[List[str]] = Depends(get_account_ids),
+    db: Session = Depends(get_db),
+):
+    return get_optimization_summary(db, acct_list)
+
+
+@router.get("/recommendations/items")
+def recommendation_items(
+    next_token: Optional[str] = Query(None),
+    page_size: int = Query(50, ge=1, le=100),
+    action_type: Optional[str] = Query(None),
+    resource_type: Optional[str] = Query(None),
+    acct_list: Optional[List[str]] = Depends(get_account_ids),
+    db: Session = Depends(get_db),
+):
+    return list_optimization_recommendations(
+        db, acct_list, next_token, page_size, action_type, resource_type,
+    )
+
+
 @router.get("/savings-plans")
 def savings_plans(
-    account_ids: Optional[str] = Query(None),
-    user: User = Depends(get_current_user),
+    acct_list: Optional[List[str]] = Depends(get_account_ids),
     db: Session = Depends(get_db),
 ):
-    acct_list = account_ids.split(",") if account_ids else None
-    if not user.is_admin and acct_list:
-        allowed = [acc.account_id for acc in user.aws_accounts]
-        acct_list = [a for a in acct_list if a in allowed]
-    elif not user.is_admin:
-        acct_list = [acc.account_id for acc in user.aws_accounts] or None
-
     return get_savings_plans_recommendations(db, acct_list)
 
 
+@router.get("/savings-plans/simulate")
+def savings_plans_simulate(
+    days: int = Query(14, ge=1, le=365, description="Over 14 days uses DAILY data; results are approximate"),
+    discount_rate: float = Query(0.25, gt=0, lt=1),
+    levels: int = Query(500, ge=10, le=2000),
+    acct_list: Optional[List[str]] = Depends(get_account_ids),
+    db: Session = Depends(get_db),
+):
+    return simulate_savings_plan_commitments(db, days, discount_rate, levels, acct_list)
+
+
 @router.get("/reservations")
 def reservations(
     service: str = Query("Amazon Elastic Compute Cloud - Compute"),
-    account_ids: Optional[str] = Query(None),
-    user: User = Depends(get_current_user),
+    acct_list: Optional[List[str]] = Depends(get_account_ids),
     db: Session = Depends(get_db),
 ):
-    acct_list = account_ids.split(",") if account_ids else None
-    if not user.is_admin and acct_list:
-        allowed = [acc.account_id for acc in user.aws_accounts]
-        acct_list = [a for a in acct_list if a in allowed]
-    elif not user.is_admin:
-        acct_list = [acc.account_id for acc in user.aws_accounts] or None
-
     return get_reservation_recommendations(db, service, acct_list)
+
+
+@router.get("/commitment-matrix")
+def commitment_matrix(
+    acct_list: Optional[List[str]] = Depends(get_account_ids),
+    db: Session = Depends(get_db),
+):
+    return get_commitment_recommendation_matrix(db, acct_list)
+
+
+@router.get("/commitments")
+def commitments(
+    days: int = Query(90, ge=1, le=365),
+    acct_list: Optional[List[str]] = Depends(get_account_ids),
+    db: Session = Depends(get_db),
+):
+    return get_commitment_metrics(db, days, acct_list)
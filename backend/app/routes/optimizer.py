@@ -1,9 +1,8 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Optional, List
 from app.database import get_db
-from app.auth import get_current_user
-from app.models import User
+from app.auth import get_account_ids
 from app.services.compute_optimizer import get_optimizer_summary
 
 router = APIRouter(prefix="/api/optimizer", tags=["Compute Optimizer"])
@@ -11,15 +10,7 @@ router = APIRouter(prefix="/api/optimizer", tags=["Compute Optimizer"])
 
 @router.get("/")
 def optimizer_summary(
-    account_ids: Optional[str] = Query(None),
-    user: User = Depends(get_current_user),
+    acct_list: Optional[List[str]] = Depends(get_account_ids),
     db: Session = Depends(get_db),
 ):
-    acct_list = account_ids.split(",") if account_ids else None
-    if not user.is_admin and acct_list:
-        allowed = [acc.account_id for acc in user.aws_accounts]
-        acct_list = [a for a in acct_list if a in allowed]
-    elif not user.is_admin:
-        acct_list = [acc.account_id for acc in user.aws_accounts] or None
-
     return get_optimizer_summary(db, acct_list)
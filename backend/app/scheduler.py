@@ -0,0 +1,211 @@
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Set
+from apscheduler.schedulers.background import BackgroundScheduler
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from app.config import settings
+from app.database import SessionLocal
+from app.models import SchedulerLease
+
+logger = logging.getLogger(__name__)
+
+scheduler = BackgroundScheduler(daemon=True)
+
+# Anomaly IDs already announced; None until the first run seeds it
+_seen_anomalies: Optional[Set[str]] = None
+
+# Every replica runs the scheduler, but jobs writing shared state (cost sync,
+# retention) only run in the replica holding this lease
+_LEASE_NAME = "background-jobs"
+_lease_holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _hold_lease(db) -> bool:
+    """Take or renew the leader lease; True while this process is the leader.
+
+    The conditional UPDATE only succeeds for the current holder or once the
+    lease has expired, and the primary key settles a race to create it.
+    """
+    now = datetime.now(timezone.utc)
+    expires_at = now + timedelta(seconds=settings.SCHEDULER_LEASE_SECONDS)
+    try:
+        renewed = db.query(SchedulerLease).filter(
+            SchedulerLease.name == _LEASE_NAME,
+            or_(SchedulerLease.holder == _lease_holder, SchedulerLease.expires_at < now),
+        ).update({"holder": _lease_holder, "expires_at": expires_at}, synchronize_session=False)
+        if not renewed:
+            db.add(SchedulerLease(name=_LEASE_NAME, holder=_lease_holder, expires_at=expires_at))
+        db.commit()
+        return True
+    except IntegrityError:
+        db.rollback()
+        return False
+
+
+def _release_lease():
+    db = SessionLocal()
+    try:
+        db.query(SchedulerLease).filter(
+            SchedulerLease.name == _LEASE_NAME,
+            SchedulerLease.holder == _lease_holder,
+        ).delete(synchronize_session=False)
+        db.commit()
+    except Exception:
+        logger.exception("Releasing the scheduler lease failed")
+    finally:
+        db.close()
+
+
+def renew_lease():
+    """Keep the lease between job runs so leadership does not flap."""
+    db = SessionLocal()
+    try:
+        _hold_lease(db)
+    except Exception:
+        db.rollback()
+        logger.exception("Scheduler lease renewal failed")
+    finally:
+        db.close()
+
+
+def _announce_new_anomalies(db):
+    from app.services.anomaly_detection import get_anomalies, _anomaly_cache
+    from app.services.events import broker
+
+    global _seen_anomalies
+    _anomaly_cache.clear()  # pick up what the sync just ingested
+    result = get_anomalies(db, None, 30)
+    current = {a["anomaly_id"]: a for a in result.get("anomalies", [])}
+
+    if _seen_anomalies is not None:
+        for anomaly_id, anomaly in current.items():
+            if anomaly_id in _seen_anomalies:
+                continue
+            accounts = [rc["linked_account"] for rc in anomaly["root_causes"] if rc.get("linked_account")]
+            broker.publish("anomalies.detected", anomaly, account_ids=accounts or None)
+    _seen_anomalies = (_seen_anomalies or set()) | set(current)
+
+
+def refresh_cost_data():
+    """Sync the local cost store and commitment metrics (leader only) and
+    announce refreshed costs and newly detected anomalies.
+
+    Every replica announces, since event streams are connected to each of them.
+    """
+    from app.services.commitments import sync_stored_scopes
+    from app.services.cost_history import announce_refresh, ensure_recent
+
+    db = SessionLocal()
+    try:
+        if _hold_lease(db):
+            ensure_recent(db, force=True)  # logs its own failures
+            sync_stored_scopes(db)
+        announce_refresh(db)
+        _announce_new_anomalies(db)
+    except Exception:
+        logger.exception("Background cost refresh failed")
+    finally:
+        db.close()
+
+
+def refresh_aws_credentials():
+    """Keep assumed-role credentials ahead of expiry so requests never wait on STS."""
+    from app.services.aws_client import refresh_role_credentials
+
+    db = SessionLocal()
+    try:
+        refresh_role_credentials(db)
+    except Exception:
+        logger.exception("Role credential refresh failed")
+    finally:
+        db.close()
+
+
+def _purge_in_batches(db, model, condition) -> int:
+    """Delete matching rows a batch at a time so no transaction holds the table for long."""
+    deleted = 0
+    while True:
+        ids = [row.id for row in db.query(model.id).filter(condition).limit(settings.RETENTION_BATCH_SIZE)]
+        if not ids:
+            return deleted
+        db.query(model).filter(model.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        deleted += len(ids)
+
+
+def purge_expired_records():
+    """Apply retention to sessions and login history (leader only)."""
+    from app.models import UserSession, LoginHistory
+
+    now = datetime.now(timezone.utc)
+    db = SessionLocal()
+    try:
+        if not _hold_lease(db):
+            return
+        sessions = _purge_in_batches(
+            db, UserSession,
+            UserSession.last_activity < now - timedelta(days=settings.SESSION_RETENTION_DAYS),
+        )
+        history = _purge_in_batches(
+            db, LoginHistory,
+            LoginHistory.timestamp < now - timedelta(days=settings.LOGIN_HISTORY_RETENTION_DAYS),
+        )
+        if sessions or history:
+            logger.info("Retention purged %d sessions, %d login history rows", sessions, history)
+    except Exception:
+        db.rollback()
+        logger.exception("Retention purge failed")
+    finally:
+        db.close()
+
+
+def start_scheduler():
+    if not settings.BACKGROUND_JOBS_ENABLED or scheduler.running:
+        return
+    scheduler.add_job(
+        renew_lease,
+        "interval",
+        seconds=max(settings.SCHEDULER_LEASE_SECONDS // 3, 1),
+        id="renew_lease",
+        max_instances=1,
+        coalesce=True,
+    )
+    scheduler.add_job(
+        refresh_cost_data,
+        "interval",
+        seconds=settings.COST_HISTORY_SYNC_INTERVAL,
+        id="refresh_cost_data",
+        # Backfill at startup rather than on the first request that needs history
+        next_run_time=datetime.now(timezone.utc),
+        max_instances=1,
+        coalesce=True,
+    )
+    scheduler.add_job(
+        refresh_aws_credentials,
+        "interval",
+        seconds=settings.AWS_ROLE_REFRESH_INTERVAL_SECONDS,
+        id="refresh_aws_credentials",
+        next_run_time=datetime.now(timezone.utc),
+        max_instances=1,
+        coalesce=True,
+    )
+    scheduler.add_job(
+        purge_expired_records,
+        "interval",
+        seconds=settings.RETENTION_INTERVAL_SECONDS,
+        id="purge_expired_records",
+        max_instances=1,
+        coalesce=True,
+    )
+    scheduler.start()
+
+
+def stop_scheduler():
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
+        # Hand over at once instead of after the lease expires
+        _release_lease()
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional, List
 from datetime import datetime
 
@@ -51,18 +51,34 @@ class PasswordReset(BaseModel):
 
 # --- AWS Account ---
 class AWSAccountCreate(BaseModel):
+    """Either access keys, or (member accounts only) a role to assume from the root account."""
     account_id: str = Field(..., min_length=12, max_length=12)
     account_name: str
     is_root: bool = False
-    access_key: str
-    secret_key: str
+    access_key: Optional[str] = None
+    secret_key: Optional[str] = None
+    role_arn: Optional[str] = Field(None, pattern=r"^arn:aws[\w-]*:iam::\d{12}:role/.+")
+    external_id: Optional[str] = None
     region: str = "us-east-1"
 
+    @model_validator(mode="after")
+    def check_credentials(self):
+        if self.role_arn:
+            if self.is_root:
+                raise ValueError("The root account must use access keys")
+            if self.access_key or self.secret_key:
+                raise ValueError("Provide either access keys or a role ARN, not both")
+        elif not (self.access_key and self.secret_key):
+            raise ValueError("Access key and secret key are required unless a role ARN is given")
+        return self
+
 
 class AWSAccountUpdate(BaseModel):
     account_name: Optional[str] = None
     access_key: Optional[str] = None
     secret_key: Optional[str] = None
+    role_arn: Optional[str] = Field(None, pattern=r"^(arn:aws[\w-]*:iam::\d{12}:role/.+)?$")  # "" clears
+    external_id: Optional[str] = None
     region: Optional[str] = None
     is_active: Optional[bool] = None
 
@@ -72,6 +88,7 @@ class AWSAccountOut(BaseModel):
     account_id: str
     account_name: str
     is_root: bool
+    role_arn: Optional[str] = None
     region: str
     is_active: bool
     created_at: datetime
@@ -107,6 +124,19 @@ class LoginHistoryOut(BaseModel):
         from_attributes = True
 
 
+class AuditLogOut(BaseModel):
+    id: int
+    actor_id: Optional[int]
+    action: str
+    target: Optional[str]
+    details: Optional[dict]
+    ip_address: Optional[str]
+    timestamp: datetime
+
+    class Config:
+        from_attributes = True
+
+
 # --- Cost Dashboard ---
 class DateFilter(BaseModel):
     start_date: str  # YYYY-MM-DD
@@ -1,10 +1,10 @@
 from typing import Optional, List, Dict, Any
-from cachetools import TTLCache
 from sqlalchemy.orm import Session
 from app.services.aws_client import get_aws_client
 from app.services.compute_optimizer import get_optimizer_summary
+from app.metrics import MeteredTTLCache
 
-_ai_cache = TTLCache(maxsize=50, ttl=600)
+_ai_cache = MeteredTTLCache("ai_recommendations", maxsize=50, ttl=600)
 
 
 def get_ai_recommendations(
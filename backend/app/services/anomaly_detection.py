@@ -1,95 +1,224 @@
-from typing import Optional, List, Dict, Any
-from cachetools import TTLCache
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any, Iterator
 from sqlalchemy.orm import Session
-from app.services.aws_client import get_aws_client
+from app.services.aws_client import get_aws_client, throttle, run_concurrently
+from app.services.cost_history import ensure_recent
+from app.services.local_anomalies import detect_local_anomalies
+from app.services.anomaly_drilldown import schedule_drilldowns
+from app.metrics import MeteredTTLCache
+
+_anomaly_cache = MeteredTTLCache("anomalies", maxsize=50, ttl=300)
+# Monitors are created by hand and rarely change
+_monitor_cache = MeteredTTLCache("anomaly_monitors", maxsize=5, ttl=6 * 3600)
+# AWS anomalies per fixed date chunk. Closed chunks only change through
+# feedback, so they live much longer than the chunk that contains today.
+_closed_chunk_cache = MeteredTTLCache("anomaly_closed_chunks", maxsize=200, ttl=6 * 3600)
+_open_chunk_cache = MeteredTTLCache("anomaly_open_chunks", maxsize=50, ttl=300)
+
+# Chunks are aligned to the epoch so any days_back window reuses the same keys
+CHUNK_DAYS = 30
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _get_monitors(ce) -> List[Dict[str, Any]]:
+    if "monitors" in _monitor_cache:
+        return _monitor_cache["monitors"]
+    params = {}
+    monitors = []
+    while True:
+        throttle("ce")
+        result = ce.get_anomaly_monitors(**params)
+        monitors.extend(result.get("AnomalyMonitors", []))
+        token = result.get("NextPageToken")
+        if not token:
+            break
+        params["NextPageToken"] = token
+    _monitor_cache["monitors"] = monitors
+    return monitors
+
+
+def _iter_anomalies(
+    ce,
+    start_date: str,
+    end_date: str,
+    monitor_arn: Optional[str] = None,
+    min_impact: Optional[float] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Stream every page of GetAnomalies, with monitor and impact filters applied by AWS."""
+    params = {
+        "DateInterval": {"StartDate": start_date, "EndDate": end_date},
+        "MaxResults": 100,
+    }
+    if monitor_arn:
+        params["MonitorArn"] = monitor_arn
+    if min_impact is not None:
+        params["TotalImpact"] = {"NumericOperator": "GREATER_THAN_OR_EQUAL", "StartValue": min_impact}
+
+    while True:
+        throttle("ce")
+        result = ce.get_anomalies(**params)
+        yield from result.get("Anomalies", [])
+        token = result.get("NextPageToken")
+        if not token:
+            return
+        params["NextPageToken"] = token
+
+
+def _parse_anomaly(a: Dict[str, Any]) -> Dict[str, Any]:
+    impact = a.get("Impact", {})
+    actual = float(impact.get("TotalActualSpend", 0))
+    expected = float(impact.get("TotalExpectedSpend", 0))
+
+    root_causes = []
+    for rc in a.get("RootCauses", []):
+        root_causes.append({
+            "service": rc.get("Service", ""),
+            "region": rc.get("Region", ""),
+            "linked_account": rc.get("LinkedAccount", ""),
+            "usage_type": rc.get("UsageType", ""),
+        })
+
+    return {
+        "anomaly_id": a.get("AnomalyId", ""),
+        "start_date": a.get("AnomalyStartDate", ""),
+        "end_date": a.get("AnomalyEndDate", ""),
+        "expected_spend": round(expected, 2),
+        "actual_spend": round(actual, 2),
+        "impact": round(actual - expected, 2),
+        "root_causes": root_causes,
+        "feedback": a.get("Feedback", ""),
+        "severity": a.get("AnomalyScore", {}).get("MaxScore", 0),
+        "monitor_arn": a.get("MonitorArn", ""),
+        "source": "aws",
+    }
 
-_anomaly_cache = TTLCache(maxsize=50, ttl=300)
+
+def _chunks(start: datetime, end: datetime) -> List[Dict[str, Any]]:
+    """Epoch-aligned CHUNK_DAYS windows covering [start, end]."""
+    first = (start - _EPOCH).days // CHUNK_DAYS
+    last = (end - _EPOCH).days // CHUNK_DAYS
+    chunks = []
+    for n in range(first, last + 1):
+        chunk_start = _EPOCH + timedelta(days=n * CHUNK_DAYS)
+        chunk_end = chunk_start + timedelta(days=CHUNK_DAYS - 1)
+        chunks.append({
+            "n": n,
+            "start": chunk_start.strftime("%Y-%m-%d"),
+            "end": min(chunk_end, end).strftime("%Y-%m-%d"),
+            "closed": chunk_end < end,
+        })
+    return chunks
+
+
+def _get_aws_anomalies(
+    ce,
+    start: datetime,
+    end: datetime,
+    monitor_arn: Optional[str],
+    min_impact: Optional[float],
+) -> List[Dict[str, Any]]:
+    """AWS anomalies for [start, end], assembled from per-chunk cached results."""
+    results: Dict[int, List[Dict[str, Any]]] = {}
+    missing = []
+    for chunk in _chunks(start, end):
+        cache = _closed_chunk_cache if chunk["closed"] else _open_chunk_cache
+        key = f"chunk:{chunk['n']}:{chunk['end']}:{monitor_arn}:{min_impact}"
+        if key in cache:
+            results[chunk["n"]] = cache[key]
+        else:
+            missing.append((chunk, cache, key))
+
+    def fetch(job):
+        chunk, cache, key = job
+        anomalies = [
+            _parse_anomaly(a)
+            for a in _iter_anomalies(ce, chunk["start"], chunk["end"], monitor_arn, min_impact)
+        ]
+        cache[key] = anomalies
+        return chunk["n"], anomalies
+
+    for n, anomalies in run_concurrently(fetch, missing):
+        results[n] = anomalies
+
+    # An anomaly spanning a chunk boundary can be returned for both chunks
+    seen = {}
+    since = start.strftime("%Y-%m-%d")
+    for n in sorted(results):
+        for a in results[n]:
+            if (a["end_date"] or a["start_date"])[:10] >= since:
+                seen[a["anomaly_id"]] = a
+    return list(seen.values())
 
 
 def get_anomalies(
     db: Session,
     account_ids: Optional[List[str]] = None,
     days_back: int = 90,
+    monitor_arn: Optional[str] = None,
+    min_impact: Optional[float] = None,
 ) -> Dict[str, Any]:
-    """Get cost anomalies from AWS Cost Anomaly Detection."""
-    cache_key = f"anomalies:{account_ids}:{days_back}"
+    """Get cost anomalies from AWS Cost Anomaly Detection merged with local detection.
+
+    Monitor and minimum-impact filters are pushed to the GetAnomalies API;
+    AWS has no account filter, so accounts are matched while streaming.
+    """
+    cache_key = f"anomalies:{account_ids}:{days_back}:{monitor_arn}:{min_impact}"
     if cache_key in _anomaly_cache:
         return _anomaly_cache[cache_key]
 
-    ce = get_aws_client("ce", db)
-
-    from datetime import datetime, timedelta, timezone
-    end_date = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    start_date = (datetime.now(timezone.utc) - timedelta(days=days_back)).strftime("%Y-%m-%d")
+    end = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    start = end - timedelta(days=days_back)
+
+    # Built-in detection over the local daily cost store works even when no
+    # AWS Cost Anomaly Detection monitor is configured
+    sync_error = ensure_recent(db)
+    local_anomalies = []
+    if not monitor_arn:
+        try:
+            local_anomalies = detect_local_anomalies(db, account_ids, days_back)
+        except Exception as e:
+            sync_error = sync_error or str(e)
+        if min_impact is not None:
+            local_anomalies = [a for a in local_anomalies if a["impact"] >= min_impact]
 
     try:
-        # Get anomaly monitors
-        monitors_response = ce.get_anomaly_monitors()
-        monitors = monitors_response.get("AnomalyMonitors", [])
-
-        # Get anomalies
-        params = {
-            "DateInterval": {
-                "StartDate": start_date,
-                "EndDate": end_date,
-            },
-            "MaxResults": 100,
-        }
-
-        result = ce.get_anomalies(**params)
-        anomalies_raw = result.get("Anomalies", [])
+        ce = get_aws_client("ce", db)
+        monitors = _get_monitors(ce)
+        aws_anomalies = _get_aws_anomalies(ce, start, end, monitor_arn, min_impact)
 
     except Exception as e:
         return {
             "error": str(e),
-            "anomalies": [],
-            "total_impact": 0,
+            "anomalies": local_anomalies,
+            "total_impact": round(sum(a["impact"] for a in local_anomalies), 2),
+            "total_count": len(local_anomalies),
             "monitors": [],
         }
 
     anomalies = []
     total_impact = 0
-    for a in anomalies_raw:
-        impact = a.get("Impact", {})
-        actual = float(impact.get("TotalActualSpend", 0))
-        expected = float(impact.get("TotalExpectedSpend", 0))
-        anomaly_impact = actual - expected
-
-        root_causes = []
-        for rc in a.get("RootCauses", []):
-            root_causes.append({
-                "service": rc.get("Service", ""),
-                "region": rc.get("Region", ""),
-                "linked_account": rc.get("LinkedAccount", ""),
-                "usage_type": rc.get("UsageType", ""),
-            })
-
-        anomaly_data = {
-            "anomaly_id": a.get("AnomalyId", ""),
-            "start_date": a.get("AnomalyStartDate", ""),
-            "end_date": a.get("AnomalyEndDate", ""),
-            "expected_spend": round(expected, 2),
-            "actual_spend": round(actual, 2),
-            "impact": round(anomaly_impact, 2),
-            "root_causes": root_causes,
-            "feedback": a.get("Feedback", ""),
-            "severity": a.get("AnomalyScore", {}).get("MaxScore", 0),
-        }
-
+    for a in aws_anomalies:
         # Filter by account if needed
-        if account_ids:
-            account_match = any(
-                rc.get("linked_account") in account_ids for rc in root_causes
-            )
-            if not account_match and root_causes:
+        if account_ids and a["root_causes"]:
+            if not any(rc.get("linked_account") in account_ids for rc in a["root_causes"]):
                 continue
+        anomalies.append(dict(a))
+        total_impact += a["impact"]
+
+    for a in local_anomalies:
+        anomalies.append(a)
+        total_impact += a["impact"]
+    anomalies.sort(key=lambda a: a["start_date"], reverse=True)
 
-        anomalies.append(anomaly_data)
-        total_impact += anomaly_impact
+    # Precompute root-cause drilldowns in the background so the detail view is instant
+    ready = schedule_drilldowns(db, anomalies)
+    for a in anomalies:
+        a["drilldown_ready"] = a["anomaly_id"] in ready
 
     monitor_info = [
         {
             "monitor_id": m.get("MonitorArn", "").split("/")[-1],
+            "monitor_arn": m.get("MonitorArn", ""),
             "monitor_name": m.get("MonitorName", ""),
             "monitor_type": m.get("MonitorType", ""),
             "creation_date": m.get("CreationDate", ""),
@@ -101,8 +230,11 @@ def get_anomalies(
         "anomalies": anomalies,
         "total_impact": round(total_impact, 2),
         "total_count": len(anomalies),
+        "local_count": len(local_anomalies),
         "monitors": monitor_info,
     }
+    if sync_error:
+        response["local_detection_error"] = sync_error
 
     _anomaly_cache[cache_key] = response
     return response
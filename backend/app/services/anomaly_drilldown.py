@@ -0,0 +1,210 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any
+from app.database import SessionLocal
+from app.models import AnomalyDrilldown
+from app.services.aws_client import get_aws_client, throttle, run_concurrently
+from app.services.cost_explorer import _RECORD_TYPE_FILTER
+
+logger = logging.getLogger(__name__)
+
+# Background workers computing drilldowns; each fans out its own CE queries
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="drilldown")
+_pending = set()
+_pending_lock = threading.Lock()
+
+# New computations queued per schedule_drilldowns call, highest impact first
+_MAX_SCHEDULED = 10
+# Root causes broken down per anomaly (two CE queries each)
+_MAX_ROOT_CAUSES = 10
+# A failed drilldown is not retried before this
+_RETRY_DELAY = timedelta(minutes=30)
+
+_ROOT_CAUSE_DIMENSIONS = {
+    "service": "SERVICE",
+    "region": "REGION",
+    "linked_account": "LINKED_ACCOUNT",
+    "usage_type": "USAGE_TYPE",
+}
+
+
+def _window(anomaly: Dict[str, Any]) -> Dict[str, str]:
+    """Anomaly window [start, end] and an equally long baseline right before it."""
+    start = datetime.strptime(anomaly["start_date"][:10], "%Y-%m-%d")
+    end_raw = anomaly.get("end_date") or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    end = datetime.strptime(end_raw[:10], "%Y-%m-%d") + timedelta(days=1)  # CE End is exclusive
+    length = max((end - start).days, 1)
+    fmt = "%Y-%m-%d"
+    return {
+        "start": start.strftime(fmt),
+        "end": end.strftime(fmt),
+        "baseline_start": (start - timedelta(days=length)).strftime(fmt),
+        "baseline_end": start.strftime(fmt),
+    }
+
+
+def _usage_type_costs(ce, start: str, end: str, root_cause: Dict[str, str]) -> Dict[str, float]:
+    filters = [_RECORD_TYPE_FILTER]
+    for field, dimension in _ROOT_CAUSE_DIMENSIONS.items():
+        if root_cause.get(field):
+            filters.append({"Dimensions": {"Key": dimension, "Values": [root_cause[field]]}})
+
+    params = {
+        "TimePeriod": {"Start": start, "End": end},
+        "Granularity": "MONTHLY",
+        "Metrics": ["UnblendedCost"],
+        "Filter": {"And": filters} if len(filters) > 1 else filters[0],
+        "GroupBy": [{"Type": "DIMENSION", "Key": "USAGE_TYPE"}],
+    }
+    costs = {}
+    while True:
+        throttle("ce")
+        result = ce.get_cost_and_usage(**params)
+        for period in result.get("ResultsByTime", []):
+            for group in period.get("Groups", []):
+                key = group["Keys"][0]
+                costs[key] = costs.get(key, 0) + float(group["Metrics"]["UnblendedCost"]["Amount"])
+        token = result.get("NextPageToken")
+        if not token:
+            return costs
+        params["NextPageToken"] = token
+
+
+def _account_ids(root_causes: List[Dict[str, str]]) -> List[str]:
+    return sorted({rc.get("linked_account") for rc in root_causes if rc.get("linked_account")})
+
+
+def _record_failure(db, anomaly: Dict[str, Any], error: str):
+    """Keep any earlier payload, but remember the failure so it is not retried at once."""
+    anomaly_id = anomaly["anomaly_id"]
+    retry_after = datetime.now(timezone.utc) + _RETRY_DELAY
+    row = db.query(AnomalyDrilldown).filter(AnomalyDrilldown.anomaly_id == anomaly_id).first()
+    if row is None:
+        row = AnomalyDrilldown(
+            anomaly_id=anomaly_id,
+            account_ids=_account_ids(anomaly.get("root_causes") or []),
+            payload={},
+        )
+        db.add(row)
+    row.error = error
+    row.retry_after = retry_after
+    db.commit()
+
+
+def _compute(anomaly: Dict[str, Any]):
+    anomaly_id = anomaly["anomaly_id"]
+    db = SessionLocal()
+    try:
+        ce = get_aws_client("ce", db)
+        window = _window(anomaly)
+        root_causes = (anomaly.get("root_causes") or [{}])[:_MAX_ROOT_CAUSES]
+
+        # Anomaly window and baseline for every root cause, all in parallel
+        jobs = [
+            (i, period, rc)
+            for i, rc in enumerate(root_causes)
+            for period in ("anomaly", "baseline")
+        ]
+
+        def fetch(job):
+            i, period, rc = job
+            if period == "anomaly":
+                return i, period, _usage_type_costs(ce, window["start"], window["end"], rc)
+            return i, period, _usage_type_costs(ce, window["baseline_start"], window["baseline_end"], rc)
+
+        costs = {}
+        for i, period, result in run_concurrently(fetch, jobs):
+            costs[(i, period)] = result
+
+        breakdowns = []
+        for i, rc in enumerate(root_causes):
+            current, baseline = costs[(i, "anomaly")], costs[(i, "baseline")]
+            usage_types = [
+                {
+                    "usage_type": ut,
+                    "cost": round(current.get(ut, 0), 2),
+                    "baseline_cost": round(baseline.get(ut, 0), 2),
+                    "change": round(current.get(ut, 0) - baseline.get(ut, 0), 2),
+                }
+                for ut in set(current) | set(baseline)
+            ]
+            usage_types.sort(key=lambda u: u["change"], reverse=True)
+            breakdowns.append({
+                "root_cause": rc,
+                "cost": round(sum(current.values()), 2),
+                "baseline_cost": round(sum(baseline.values()), 2),
+                "usage_types": usage_types[:25],
+            })
+
+        db.query(AnomalyDrilldown).filter(AnomalyDrilldown.anomaly_id == anomaly_id).delete()
+        db.add(AnomalyDrilldown(
+            anomaly_id=anomaly_id,
+            account_ids=_account_ids(root_causes),
+            payload={"window": window, "root_causes": breakdowns},
+            end_date=window["end"],
+        ))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.exception("Drilldown for anomaly %s failed", anomaly_id)
+        try:
+            _record_failure(db, anomaly, str(e))
+        except Exception:
+            db.rollback()
+            logger.exception("Recording the drilldown failure of %s failed", anomaly_id)
+    finally:
+        db.close()
+        with _pending_lock:
+            _pending.discard(anomaly_id)
+
+
+def schedule_drilldowns(db, anomalies: List[Dict[str, Any]]) -> set:
+    """Queue background drilldowns for anomalies that have none, or an outdated one.
+
+    A drilldown is outdated once the anomaly's window end moves (ongoing
+    anomalies grow every day). Failed ones wait for their retry_after, and
+    at most _MAX_SCHEDULED are queued per call, largest impact first.
+    Returns the IDs with a stored drilldown, even if it is being refreshed.
+    """
+    ids = [a["anomaly_id"] for a in anomalies if a.get("anomaly_id")]
+    if not ids:
+        return set()
+    stored = {
+        anomaly_id: (end_date, retry_after)
+        for anomaly_id, end_date, retry_after in db.query(
+            AnomalyDrilldown.anomaly_id,
+            AnomalyDrilldown.end_date,
+            AnomalyDrilldown.retry_after,
+        ).filter(AnomalyDrilldown.anomaly_id.in_(ids))
+    }
+    ready = {anomaly_id for anomaly_id, (end_date, _) in stored.items() if end_date is not None}
+
+    now = datetime.now(timezone.utc)
+    scheduled = 0
+    for a in sorted(anomalies, key=lambda a: a.get("impact") or 0, reverse=True):
+        anomaly_id = a.get("anomaly_id")
+        if not anomaly_id:
+            continue
+        if anomaly_id in stored:
+            end_date, retry_after = stored[anomaly_id]
+            if retry_after is not None:
+                retry_after = retry_after.replace(tzinfo=timezone.utc) if retry_after.tzinfo is None else retry_after
+                if retry_after > now:
+                    continue
+            elif end_date == _window(a)["end"]:
+                continue
+        if scheduled >= _MAX_SCHEDULED:
+            break
+        with _pending_lock:
+            if anomaly_id in _pending:
+                continue
+            _pending.add(anomaly_id)
+        _executor.submit(_compute, a)
+        scheduled += 1
+    return ready
+
+
+def get_drilldown(db, anomaly_id: str) -> Optional[AnomalyDrilldown]:
+    return db.query(AnomalyDrilldown).filter(AnomalyDrilldown.anomaly_id == anomaly_id).first()
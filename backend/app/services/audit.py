@@ -0,0 +1,187 @@
+"""Asynchronous, batched writer for audit rows (login history, admin actions, exports).
+
+Requests enqueue rows and return immediately; a background thread bulk-inserts
+them in batches. When the queue is full or the database is unavailable, rows
+are appended to a local JSONL file and replayed on the next startup, so audit
+records survive both load spikes and DB outages.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import LoginHistory, AuditLog
+
+logger = logging.getLogger(__name__)
+
+_MODELS = {"login_history": LoginHistory, "audit_log": AuditLog}
+_DATETIME_FIELDS = {"timestamp"}
+
+
+class AuditWriter:
+    def __init__(self):
+        self._queue: "queue.Queue[Tuple[str, Dict[str, Any]]]" = queue.Queue(maxsize=settings.AUDIT_QUEUE_SIZE)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def submit(self, table: str, row: Dict[str, Any]):
+        row.setdefault("timestamp", datetime.now(timezone.utc))
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((table, row))
+        except queue.Full:
+            self._spill([(table, row)])
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                    self._thread.start()
+
+    def _drain(self, first_timeout: float) -> List[Tuple[str, Dict[str, Any]]]:
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=first_timeout))
+        except queue.Empty:
+            return batch
+        deadline = time.monotonic() + settings.AUDIT_FLUSH_SECONDS
+        while len(batch) < settings.AUDIT_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._drain(first_timeout=1.0)
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: List[Tuple[str, Dict[str, Any]]]):
+        by_table: Dict[str, List[Dict[str, Any]]] = {}
+        for table, row in batch:
+            by_table.setdefault(table, []).append(row)
+
+        db = SessionLocal()
+        try:
+            for table, rows in by_table.items():
+                db.bulk_insert_mappings(_MODELS[table], rows)
+            db.commit()
+            return
+        except IntegrityError:
+            db.rollback()
+        except Exception:
+            db.rollback()
+            logger.warning("Audit DB write failed, spilling %d rows to %s", len(batch), settings.AUDIT_FALLBACK_PATH)
+            self._spill(batch)
+            return
+        finally:
+            db.close()
+
+        # A row references something deleted meanwhile: insert one by one, drop the bad ones
+        self._write_individually(batch)
+
+    def _write_individually(self, batch):
+        db = SessionLocal()
+        try:
+            for i, (table, row) in enumerate(batch):
+                try:
+                    db.bulk_insert_mappings(_MODELS[table], [row])
+                    db.commit()
+                except IntegrityError:
+                    db.rollback()
+                    logger.warning("Dropping audit row for %s: integrity error", table)
+                except Exception:
+                    db.rollback()
+                    self._spill(batch[i:])
+                    return
+        finally:
+            db.close()
+
+    def _spill(self, batch):
+        lines = []
+        for table, row in batch:
+            encoded = {k: v.isoformat() if isinstance(v, datetime) else v for k, v in row.items()}
+            lines.append(json.dumps({"table": table, "row": encoded}) + "\n")
+        with self._file_lock:
+            with open(settings.AUDIT_FALLBACK_PATH, "a", encoding="utf-8") as f:
+                f.writelines(lines)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def replay_fallback(self):
+        """Insert rows spilled to the fallback file by a previous run."""
+        path = settings.AUDIT_FALLBACK_PATH
+        replay_path = path + ".replay"
+        # Left behind when a previous replay was interrupted; it predates the spill file
+        if os.path.exists(replay_path):
+            self._replay(replay_path)
+        with self._file_lock:
+            if not os.path.exists(path):
+                return
+            os.replace(path, replay_path)
+        self._replay(replay_path)
+
+    def _replay(self, replay_path: str):
+        batch = []
+        with open(replay_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn final line from a crash
+                row = entry["row"]
+                for field in _DATETIME_FIELDS & row.keys():
+                    row[field] = datetime.fromisoformat(row[field])
+                batch.append((entry["table"], row))
+        if batch:
+            logger.info("Replaying %d spilled audit rows", len(batch))
+            for i in range(0, len(batch), settings.AUDIT_BATCH_SIZE):
+                self._write(batch[i:i + settings.AUDIT_BATCH_SIZE])
+        # Only now: rows that fail again were spilled to a new fallback file, and a
+        # replay killed midway is redone on the next start rather than lost
+        os.remove(replay_path)
+
+    def flush(self):
+        """Write everything queued so far (used on shutdown)."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        while True:
+            batch = self._drain(first_timeout=0)
+            if not batch:
+                break
+            self._write(batch)
+
+
+audit_writer = AuditWriter()
+
+
+def record_login(user_id: int, ip: str, user_agent: str, browser: str, success: bool):
+    audit_writer.submit("login_history", {
+        "user_id": user_id, "ip_address": ip, "user_agent": user_agent,
+        "browser": browser, "success": success,
+    })
+
+
+def record_event(actor_id: Optional[int], action: str, target: Optional[str] = None,
+                 details: Optional[Dict[str, Any]] = None, ip: Optional[str] = None):
+    audit_writer.submit("audit_log", {
+        "actor_id": actor_id, "action": action, "target": target,
+        "details": details, "ip_address": ip,
+    })
@@ -1,12 +1,274 @@
-import boto3
-from typing import Optional
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Callable, Iterable, List, Any, Dict
 from sqlalchemy.orm import Session
+from app.config import settings
 from app.models import AWSAccount
 from app.encryption import decrypt_value
-from cachetools import TTLCache
+from app.metrics import MeteredTTLCache, instrument_aws_client
 
-# Cache boto3 clients for 5 minutes
-_client_cache = TTLCache(maxsize=100, ttl=300)
+logger = logging.getLogger(__name__)
+
+# Account rows (with encrypted keys) cached in memory; admin changes call
+# invalidate_account(), the TTL only bounds staleness across replicas.
+_account_cache = MeteredTTLCache("aws_accounts", maxsize=1, ttl=settings.AWS_ACCOUNT_CACHE_TTL_SECONDS)
+# Account snapshots behind the cached sessions, compared on every reload
+_loaded_accounts: Dict[int, "AccountCredentials"] = {}
+# Sessions, clients and role credentials are keyed on the account snapshot
+# (including its encrypted keys and role), so a change made on another
+# replica never reuses state built from the old credentials.
+# One long-lived boto3 Session per account, so credentials are decrypted once
+_session_cache: Dict["AccountCredentials", Any] = {}  # boto3.session.Session
+_client_cache = MeteredTTLCache("aws_clients", maxsize=500, ttl=settings.AWS_CLIENT_TTL_SECONDS)
+# Guards the caches above; never held across a network call
+_broker_lock = threading.RLock()
+# One builder per account for sessions/clients (which may call STS)
+_build_locks: Dict[int, threading.Lock] = {}
+# Latest AssumeRole credentials per role account, kept fresh by refresh_role_credentials()
+_role_credentials: Dict["AccountCredentials", Dict[str, str]] = {}
+_role_lock = threading.Lock()
+# Role accounts being re-assumed off the request path
+_refreshing: set = set()
+_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="assume-role")
+# Cached role credentials are served until this close to expiry
+_MIN_CREDENTIAL_SECONDS = 60
+
+
+@lru_cache(maxsize=1)
+def _botocore_config():
+    # boto3/botocore are imported on first AWS use, not at app import
+    from botocore.config import Config
+
+    return Config(
+        max_pool_connections=settings.AWS_MAX_POOL_CONNECTIONS,
+        retries={"max_attempts": settings.AWS_MAX_ATTEMPTS, "mode": "adaptive"},
+        tcp_keepalive=True,
+        connect_timeout=5,
+        read_timeout=60,
+    )
+
+
+@lru_cache(maxsize=1)
+def shared_loader():
+    """One botocore data loader for every account session.
+
+    Loaders cache parsed service models per instance, so sharing one means
+    each model JSON is read and parsed once per process instead of once per
+    account session.
+    """
+    from botocore.loaders import Loader
+
+    class SearchPaths(list):
+        # Every boto3 Session appends its data directory to the loader it is
+        # given; keep one copy instead of one per session
+        def append(self, path):
+            if path not in self:
+                super().append(path)
+
+    return Loader(extra_search_paths=SearchPaths())
+
+
+@dataclass(frozen=True)
+class AccountCredentials:
+    id: int
+    account_id: str
+    region: str
+    is_root: bool
+    is_active: bool
+    access_key_encrypted: str
+    secret_key_encrypted: str
+    role_arn: Optional[str] = None
+    external_id_encrypted: Optional[str] = None
+
+
+def _accounts(db: Session) -> Dict[int, AccountCredentials]:
+    with _broker_lock:
+        accounts = _account_cache.get("all")
+        if accounts is None:
+            accounts = {
+                a.id: AccountCredentials(
+                    id=a.id, account_id=a.account_id, region=a.region, is_root=a.is_root,
+                    is_active=a.is_active, access_key_encrypted=a.access_key_encrypted,
+                    secret_key_encrypted=a.secret_key_encrypted,
+                    role_arn=a.role_arn, external_id_encrypted=a.external_id_encrypted,
+                )
+                for a in db.query(AWSAccount).all()
+            }
+            # Accounts changed or deleted elsewhere: drop what was built from the old snapshot
+            stale = {i for i, old in _loaded_accounts.items() if accounts.get(i) != old}
+            if stale:
+                _drop_account_state(stale)
+            _loaded_accounts.clear()
+            _loaded_accounts.update(accounts)
+            _account_cache["all"] = accounts
+        return accounts
+
+
+def _drop_account_state(account_ids):
+    """Forget sessions, clients and role credentials of the given account row IDs."""
+    with _broker_lock:
+        for account in [a for a in _session_cache if a.id in account_ids]:
+            _session_cache.pop(account, None)
+        for key in [k for k in _client_cache if k[1].id in account_ids]:
+            _client_cache.pop(key, None)
+        with _role_lock:
+            for account in [a for a in _role_credentials if a.id in account_ids]:
+                _role_credentials.pop(account, None)
+
+
+def invalidate_account(account_id: Optional[int] = None):
+    """Forget cached credentials and clients after an account is created, changed or deleted."""
+    with _broker_lock:
+        _account_cache.clear()
+        if account_id is None:
+            _loaded_accounts.clear()
+            _session_cache.clear()
+            _client_cache.clear()
+            with _role_lock:
+                _role_credentials.clear()
+            return
+        _loaded_accounts.pop(account_id, None)
+        _drop_account_state({account_id})
+
+
+def _assume_role(account: AccountCredentials, accounts: Dict[int, AccountCredentials]) -> Dict[str, str]:
+    root = next((a for a in accounts.values() if a.is_root and a.is_active and not a.role_arn), None)
+    if not root:
+        raise ValueError(f"Account {account.account_id} assumes a role but no root account is configured")
+    params = {
+        "RoleArn": account.role_arn,
+        "RoleSessionName": f"cost-dashboard-{account.account_id}",
+        "DurationSeconds": settings.AWS_ROLE_SESSION_SECONDS,
+    }
+    if account.external_id_encrypted:
+        params["ExternalId"] = decrypt_value(account.external_id_encrypted)
+    sts = _client(root, accounts, "sts", root.region)
+    creds = sts.assume_role(**params)["Credentials"]
+    metadata = {
+        "access_key": creds["AccessKeyId"],
+        "secret_key": creds["SecretAccessKey"],
+        "token": creds["SessionToken"],
+        "expiry_time": creds["Expiration"].isoformat(),
+    }
+    with _role_lock:
+        _role_credentials[account] = metadata
+    return metadata
+
+
+def _seconds_left(metadata: Dict[str, str]) -> float:
+    expiry = datetime.fromisoformat(metadata["expiry_time"])
+    return (expiry - datetime.now(timezone.utc)).total_seconds()
+
+
+def _refresh_in_background(account: AccountCredentials, accounts: Dict[int, AccountCredentials]):
+    with _role_lock:
+        if account in _refreshing:
+            return
+        _refreshing.add(account)
+
+    def refresh():
+        try:
+            _assume_role(account, accounts)
+        except Exception as e:
+            logger.warning("AssumeRole for %s failed: %s", account.account_id, e)
+        finally:
+            with _role_lock:
+                _refreshing.discard(account)
+
+    _refresh_executor.submit(refresh)
+
+
+def _role_metadata(account: AccountCredentials, accounts: Dict[int, AccountCredentials]) -> Dict[str, str]:
+    """Current temporary credentials of a role account.
+
+    If the scheduled refresh fell behind, the last good credentials are
+    served while a re-assume runs in the background; callers only wait on
+    STS when there are no usable credentials at all.
+    """
+    with _role_lock:
+        metadata = _role_credentials.get(account)
+    if metadata:
+        seconds_left = _seconds_left(metadata)
+        if seconds_left > settings.AWS_ROLE_REFRESH_MARGIN_SECONDS / 2:
+            return metadata
+        if seconds_left > _MIN_CREDENTIAL_SECONDS:
+            _refresh_in_background(account, accounts)
+            return metadata
+    return _assume_role(account, accounts)
+
+
+def _boto_session(account: AccountCredentials, accounts: Dict[int, AccountCredentials]):
+    """Cached boto3 Session of an account; the caller holds the account's build lock."""
+    import boto3
+    import botocore.session
+    from botocore.credentials import RefreshableCredentials
+
+    with _broker_lock:
+        session = _session_cache.get(account)
+    if session is None:
+        core = botocore.session.get_session()
+        core.register_component("data_loader", shared_loader())
+        if account.role_arn:
+            # botocore asks refresh_using for new credentials shortly before expiry;
+            # the background refresh has normally already put them in _role_credentials.
+            credentials = RefreshableCredentials.create_from_metadata(
+                metadata=_role_metadata(account, accounts),
+                refresh_using=lambda: _role_metadata(account, _accounts_snapshot()),
+                method="sts-assume-role",
+            )
+            core._credentials = credentials
+            session = boto3.session.Session(botocore_session=core, region_name=account.region)
+        else:
+            session = boto3.session.Session(
+                aws_access_key_id=decrypt_value(account.access_key_encrypted),
+                aws_secret_access_key=decrypt_value(account.secret_key_encrypted),
+                region_name=account.region,
+                botocore_session=core,
+            )
+        with _broker_lock:
+            _session_cache[account] = session
+    return session
+
+
+def _accounts_snapshot() -> Dict[int, AccountCredentials]:
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return _accounts(db)
+    finally:
+        db.close()
+
+
+def refresh_role_credentials(db: Session):
+    """Re-assume roles whose credentials expire within AWS_ROLE_REFRESH_MARGIN_SECONDS.
+
+    Run periodically by the scheduler, so requests only ever see warm
+    credentials. Accounts are refreshed in parallel.
+    """
+    accounts = _accounts(db)
+    due = []
+    for account in accounts.values():
+        if not (account.role_arn and account.is_active):
+            continue
+        with _role_lock:
+            metadata = _role_credentials.get(account)
+        if metadata is None or _seconds_left(metadata) < settings.AWS_ROLE_REFRESH_MARGIN_SECONDS:
+            due.append(account)
+
+    def refresh(account):
+        try:
+            _assume_role(account, accounts)
+        except Exception as e:
+            logger.warning("AssumeRole for %s failed: %s", account.account_id, e)
+
+    run_concurrently(refresh, due, max_workers=settings.AWS_ROLE_REFRESH_WORKERS)
+    return len(due)
 
 
 def get_aws_client(
@@ -16,31 +278,47 @@ def get_aws_client(
     region: Optional[str] = None,
 ):
     """Get a boto3 client for the specified AWS service and account."""
+    accounts = _accounts(db)
     if account_id:
-        account = db.query(AWSAccount).filter(AWSAccount.id == account_id).first()
+        account = accounts.get(account_id)
     else:
         # Default to root account, fall back to any active account
-        account = db.query(AWSAccount).filter(AWSAccount.is_root == True, AWSAccount.is_active == True).first()
-        if not account:
-            account = db.query(AWSAccount).filter(AWSAccount.is_active == True).first()
+        active = [a for a in sorted(accounts.values(), key=lambda a: a.id) if a.is_active]
+        account = next((a for a in active if a.is_root), None) or next(iter(active), None)
 
     if not account:
         raise ValueError("No AWS account configured")
 
-    cache_key = f"{service_name}:{account.id}:{region or account.region}"
-    if cache_key in _client_cache:
-        return _client_cache[cache_key]
+    return _client(account, accounts, service_name, region or account.region)
 
-    access_key = decrypt_value(account.access_key_encrypted)
-    secret_key = decrypt_value(account.secret_key_encrypted)
 
-    client = boto3.client(
-        service_name,
-        aws_access_key_id=access_key,
-        aws_secret_access_key=secret_key,
-        region_name=region or account.region,
-    )
-    _client_cache[cache_key] = client
+def _client(account: AccountCredentials, accounts: Dict[int, AccountCredentials], service_name: str, region: str):
+    """Cached client of an account.
+
+    Sessions and clients are built outside _broker_lock, since a role
+    account's first session may wait on STS; a per-account lock keeps
+    concurrent misses from building the same session twice.
+    """
+    cache_key = (service_name, account, region)
+    with _broker_lock:
+        client = _client_cache.get(cache_key)
+        if client is not None:
+            return client
+        build_lock = _build_locks.setdefault(account.id, threading.Lock())
+
+    with build_lock:
+        with _broker_lock:
+            client = _client_cache.get(cache_key)
+        if client is None:
+            client = _boto_session(account, accounts).client(
+                service_name,
+                region_name=region,
+                config=_botocore_config(),
+            )
+            if settings.METRICS_ENABLED:
+                instrument_aws_client(client, service_name, account.account_id)
+            with _broker_lock:
+                _client_cache[cache_key] = client
     return client
 
 
@@ -51,10 +329,10 @@ def get_aws_client_by_account_id(
     region: Optional[str] = None,
 ):
     """Get a boto3 client using the AWS account ID string."""
-    account = db.query(AWSAccount).filter(
-        AWSAccount.account_id == aws_account_id,
-        AWSAccount.is_active == True,
-    ).first()
+    account = next(
+        (a for a in _accounts(db).values() if a.account_id == aws_account_id and a.is_active),
+        None,
+    )
     if not account:
         raise ValueError(f"AWS account {aws_account_id} not found")
     return get_aws_client(service_name, db, account.id, region)
@@ -71,3 +349,54 @@ def get_root_account(db: Session):
         AWSAccount.is_root == True,
         AWSAccount.is_active == True,
     ).first()
+
+
+class RateLimiter:
+    """Token bucket shared by every thread calling the same AWS API."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# Conservative per-process request rates, kept below the documented API quotas
+_rate_limiters = {
+    "ce": RateLimiter(rate=5, burst=5),
+    "compute-optimizer": RateLimiter(rate=5, burst=5),
+    "cost-optimization-hub": RateLimiter(rate=5, burst=5),
+}
+
+
+def throttle(service_name: str):
+    """Block until a request against the given AWS service is allowed."""
+    limiter = _rate_limiters.get(service_name)
+    if limiter:
+        limiter.acquire()
+
+
+def run_concurrently(fn: Callable[[Any], Any], items: Iterable[Any], max_workers: int = 4) -> List[Any]:
+    """Apply fn to every item on a small thread pool, preserving input order.
+
+    boto3 clients are thread-safe, but SQLAlchemy sessions are not: resolve
+    clients with get_aws_client() before fanning out and pass them to fn.
+    """
+    items = list(items)
+    if len(items) <= 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        return list(pool.map(fn, items))
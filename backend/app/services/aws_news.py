@@ -1,10 +1,20 @@
-import feedparser
-import httpx
-from typing import List, Dict, Any
-from cachetools import TTLCache
-from datetime import datetime
+"""AWS news: feeds are ingested in the background into news_items, and
+/api/news reads from that table (full-text search via SQLite FTS5, LIKE
+elsewhere), so requests never wait on an outbound call."""
+import asyncio
+import logging
+import re
+from calendar import timegm
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Tuple
+from sqlalchemy import func, or_, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.models import NewsItem
 
-_news_cache = TTLCache(maxsize=10, ttl=900)  # 15 min cache
+logger = logging.getLogger(__name__)
 
 AWS_FEEDS = [
     {
@@ -25,49 +35,253 @@ AWS_FEEDS = [
     },
 ]
 
+# Shared pooled client (created on first use, closed on shutdown)
+_http_client = None
 
-async def fetch_aws_news(category: str = None, limit: int = 50) -> List[Dict[str, Any]]:
-    """Fetch latest AWS news from RSS feeds."""
-    cache_key = f"news:{category}:{limit}"
-    if cache_key in _news_cache:
-        return _news_cache[cache_key]
+# Per-feed ETag / Last-Modified, so unchanged feeds cost a 304 and no parsing
+_feed_state: Dict[str, Dict[str, Any]] = {}
 
-    all_items = []
-    feeds_to_fetch = AWS_FEEDS
-    if category:
-        feeds_to_fetch = [f for f in AWS_FEEDS if f["category"].lower() == category.lower()]
+_fts_enabled = False
+_ingest_lock = asyncio.Lock()
+_ingester: Optional[asyncio.Task] = None
+
+
+def _get_http_client():
+    global _http_client
+    if _http_client is None:
+        import httpx
+
+        _http_client = httpx.AsyncClient(
+            timeout=settings.AWS_NEWS_FEED_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=len(AWS_FEEDS)),
+            follow_redirects=True,
+        )
+    return _http_client
+
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def ensure_news_index():
+    """Create the FTS5 index and its sync triggers (SQLite only; other databases use LIKE)."""
+    global _fts_enabled
+    if engine.dialect.name != "sqlite":
+        return
+    statements = [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS news_items_fts USING fts5("
+        "title, summary, content='news_items', content_rowid='id')",
+        "CREATE TRIGGER IF NOT EXISTS news_items_ai AFTER INSERT ON news_items BEGIN "
+        "INSERT INTO news_items_fts(rowid, title, summary) VALUES (new.id, new.title, new.summary); END",
+        "CREATE TRIGGER IF NOT EXISTS news_items_ad AFTER DELETE ON news_items BEGIN "
+        "INSERT INTO news_items_fts(news_items_fts, rowid, title, summary) "
+        "VALUES ('delete', old.id, old.title, old.summary); END",
+        "CREATE TRIGGER IF NOT EXISTS news_items_au AFTER UPDATE ON news_items BEGIN "
+        "INSERT INTO news_items_fts(news_items_fts, rowid, title, summary) "
+        "VALUES ('delete', old.id, old.title, old.summary); "
+        "INSERT INTO news_items_fts(rowid, title, summary) VALUES (new.id, new.title, new.summary); END",
+    ]
+    try:
+        with engine.begin() as conn:
+            for statement in statements:
+                conn.exec_driver_sql(statement)
+        _fts_enabled = True
+    except Exception as e:
+        logger.warning("FTS5 unavailable, news search falls back to LIKE: %s", e)
+
+
+def _entry_time(entry) -> datetime:
+    parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+    if parsed:
+        return datetime.fromtimestamp(timegm(parsed), tz=timezone.utc)
+    return datetime.now(timezone.utc)
 
-    async with httpx.AsyncClient(timeout=15.0) as client:
-        for feed_info in feeds_to_fetch:
+
+def _parse_entries(text_: str, category: str) -> List[Dict[str, Any]]:
+    import feedparser
+
+    items = []
+    parsed = feedparser.parse(text_)
+    for entry in parsed.entries:
+        link = entry.get("link", "")
+        if not link:
+            continue
+        items.append({
+            "title": entry.get("title", ""),
+            "link": link,
+            "published": entry.get("published") or entry.get("updated") or "",
+            "published_at": _entry_time(entry),
+            "summary": entry.get("summary", "")[:300],
+            "category": category,
+        })
+    return items
+
+
+async def _fetch_feed(feed_info: Dict[str, str]) -> List[Dict[str, Any]]:
+    """New entries of one feed via conditional GET; empty when unchanged or unreachable."""
+    url = feed_info["url"]
+    state = _feed_state.get(url, {})
+    headers = {}
+    if state.get("etag"):
+        headers["If-None-Match"] = state["etag"]
+    if state.get("last_modified"):
+        headers["If-Modified-Since"] = state["last_modified"]
+
+    try:
+        resp = await asyncio.wait_for(
+            _get_http_client().get(url, headers=headers),
+            timeout=settings.AWS_NEWS_FEED_TIMEOUT_SECONDS,
+        )
+    except Exception as e:
+        logger.warning("News feed %s failed: %s", url, e)
+        return []
+    if resp.status_code != 200:
+        return []
+
+    # feedparser is CPU-bound; keep it off the event loop
+    items = await asyncio.to_thread(_parse_entries, resp.text, feed_info["category"])
+    _feed_state[url] = {
+        "etag": resp.headers.get("etag"),
+        "last_modified": resp.headers.get("last-modified"),
+    }
+    return items
+
+
+def _store_items(items: List[Dict[str, Any]]) -> int:
+    """Insert entries whose link is not stored yet; returns the number added."""
+    unique = {}
+    for item in items:
+        unique.setdefault(item["link"], item)
+    if not unique:
+        return 0
+    db = SessionLocal()
+    try:
+        existing = {
+            link for (link,) in db.query(NewsItem.link).filter(NewsItem.link.in_(list(unique)))
+        }
+        new = [item for link, item in unique.items() if link not in existing]
+        if new:
             try:
-                resp = await client.get(feed_info["url"])
-                if resp.status_code == 200:
-                    parsed = feedparser.parse(resp.text)
-                    for entry in parsed.entries[:25]:
-                        published = ""
-                        if hasattr(entry, "published"):
-                            published = entry.published
-                        elif hasattr(entry, "updated"):
-                            published = entry.updated
-
-                        summary = ""
-                        if hasattr(entry, "summary"):
-                            summary = entry.summary[:300]
-
-                        all_items.append({
-                            "title": entry.get("title", ""),
-                            "link": entry.get("link", ""),
-                            "published": published,
-                            "summary": summary,
-                            "category": feed_info["category"],
-                        })
-            except Exception:
-                continue
-
-    # Sort by published date (newest first)
-    all_items.sort(key=lambda x: x.get("published", ""), reverse=True)
-    result = all_items[:limit]
-    _news_cache[cache_key] = result
+                db.bulk_insert_mappings(NewsItem, new)
+                db.commit()
+            except IntegrityError:
+                # Another worker stored some of these meanwhile
+                db.rollback()
+                added = 0
+                for item in new:
+                    try:
+                        db.bulk_insert_mappings(NewsItem, [item])
+                        db.commit()
+                        added += 1
+                    except IntegrityError:
+                        db.rollback()
+                return added
+        return len(new)
+    finally:
+        db.close()
+
+
+async def ingest_news() -> int:
+    """Fetch every feed concurrently and store new entries."""
+    async with _ingest_lock:
+        results = await asyncio.gather(*(_fetch_feed(f) for f in AWS_FEEDS))
+        items = [item for feed_items in results for item in feed_items]
+        return await asyncio.to_thread(_store_items, items)
+
+
+async def _ingest_loop():
+    while True:
+        try:
+            added = await ingest_news()
+            if added:
+                logger.info("Ingested %d news items", added)
+        except Exception:
+            logger.exception("News ingestion failed")
+        await asyncio.sleep(settings.AWS_NEWS_REFRESH_INTERVAL)
+
+
+def start_news_ingester():
+    """Run ingestion on the server's event loop, where the shared HTTP client lives."""
+    global _ingester
+    if _ingester is None and settings.BACKGROUND_JOBS_ENABLED:
+        _ingester = asyncio.get_running_loop().create_task(_ingest_loop())
+
+
+async def stop_news_ingester():
+    global _ingester
+    if _ingester is not None:
+        _ingester.cancel()
+        _ingester = None
+    await close_http_client()
+
+
+def _fts_query(q: str) -> str:
+    # Each word as a quoted prefix term, all required
+    words = re.findall(r"\w+", q)
+    return " ".join(f'"{w}"*' for w in words)
+
+
+def search_news(
+    db: Session,
+    category: Optional[str] = None,
+    q: Optional[str] = None,
+    limit: int = 50,
+    offset: int = 0,
+) -> Tuple[List[Dict[str, Any]], int]:
+    query = db.query(NewsItem)
+    if category:
+        query = query.filter(func.lower(NewsItem.category) == category.lower())
+    if q and q.strip():
+        if _fts_enabled and _fts_query(q):
+            query = query.filter(NewsItem.id.in_(
+                text("SELECT rowid FROM news_items_fts WHERE news_items_fts MATCH :fts")
+                .bindparams(fts=_fts_query(q))
+            ))
+        else:
+            pattern = f"%{q.strip()}%"
+            query = query.filter(or_(NewsItem.title.ilike(pattern), NewsItem.summary.ilike(pattern)))
+
+    total = query.count()
+    rows = query.order_by(NewsItem.published_at.desc(), NewsItem.id.desc()).offset(offset).limit(limit).all()
+    items = [{
+        "title": r.title,
+        "link": r.link,
+        "published": r.published,
+        "published_at": r.published_at.replace(tzinfo=timezone.utc).isoformat() if r.published_at else None,
+        "summary": r.summary,
+        "category": r.category,
+    } for r in rows]
+    return items, total
+
+
+def _query_store(category, q, limit, offset, bootstrap_check: bool):
+    db = SessionLocal()
+    try:
+        if bootstrap_check and db.query(NewsItem.id).first() is None:
+            return None
+        return search_news(db, category, q, limit, offset)
+    finally:
+        db.close()
+
+
+async def fetch_aws_news(
+    category: Optional[str] = None,
+    q: Optional[str] = None,
+    limit: int = 50,
+    offset: int = 0,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """News from the local store (queried off the event loop).
+
+    Only an empty store triggers a fetch, e.g. right after a fresh deploy
+    or when background jobs are disabled.
+    """
+    result = await asyncio.to_thread(_query_store, category, q, limit, offset, True)
+    if result is None:
+        await ingest_news()
+        result = await asyncio.to_thread(_query_store, category, q, limit, offset, False)
     return result
 
 
@@ -0,0 +1,342 @@
+import hashlib
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any, Callable
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models import CommitmentMetric
+from app.services.aws_client import get_aws_client, throttle, run_concurrently
+from app.metrics import MeteredTTLCache
+
+_commitment_cache = MeteredTTLCache("commitments", maxsize=50, ttl=300)
+# Metrics CE could not return (e.g. DataUnavailableException when nothing is
+# committed), kept so page loads do not repeat the paid call
+_metric_failures = MeteredTTLCache("commitment_metric_failures", maxsize=200, ttl=3600)
+
+logger = logging.getLogger(__name__)
+
+# CE keeps restating the most recent days; older days are treated as closed
+_SETTLEMENT_DAYS = 3
+# Days kept per scope: the longest window the route serves
+_SYNC_DAYS = 365
+
+METRICS = ["ri_coverage", "ri_utilization", "sp_coverage", "sp_utilization"]
+
+# Scopes being synced in this process, and when/how each last sync ended
+_sync_lock = threading.Lock()
+_syncing: set = set()
+_last_sync: Dict[str, float] = {}
+_last_errors: Dict[str, Dict[str, str]] = {}
+
+
+def _scope_accounts(account_ids: Optional[List[str]]) -> Optional[str]:
+    return ",".join(sorted(set(account_ids))) if account_ids else None
+
+
+def _scope_key(account_ids: Optional[List[str]]) -> str:
+    """Fixed-width scope key; the raw account list can be arbitrarily long."""
+    accounts = _scope_accounts(account_ids)
+    return hashlib.sha256(accounts.encode()).hexdigest() if accounts else "all"
+
+
+def _account_filter(account_ids: Optional[List[str]]) -> Optional[Dict[str, Any]]:
+    if not account_ids:
+        return None
+    return {"Dimensions": {"Key": "LINKED_ACCOUNT", "Values": account_ids}}
+
+
+def _paginate(call: Callable, params: Dict[str, Any], items_key: str, token_key: str) -> List[Dict[str, Any]]:
+    """Collect every page of a CE commitment API, throttled like other CE calls."""
+    items = []
+    while True:
+        throttle("ce")
+        result = call(**params)
+        items.extend(result.get(items_key, []))
+        token = result.get(token_key)
+        if not token:
+            return items
+        params[token_key] = token
+
+
+def _fetch_ri_coverage(ce, params: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    days = {}
+    for period in _paginate(ce.get_reservation_coverage, params, "CoveragesByTime", "NextPageToken"):
+        hours = period.get("Total", {}).get("CoverageHours", {})
+        cost = period.get("Total", {}).get("CoverageCost", {})
+        days[period["TimePeriod"]["Start"]] = {
+            "coverage_percentage": float(hours.get("CoverageHoursPercentage", 0)),
+            "on_demand_hours": float(hours.get("OnDemandHours", 0)),
+            "reserved_hours": float(hours.get("ReservedHours", 0)),
+            "total_running_hours": float(hours.get("TotalRunningHours", 0)),
+            "on_demand_cost": float(cost.get("OnDemandCost", 0)),
+        }
+    return days
+
+
+def _fetch_ri_utilization(ce, params: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    days = {}
+    for period in _paginate(ce.get_reservation_utilization, params, "UtilizationsByTime", "NextPageToken"):
+        total = period.get("Total", {})
+        days[period["TimePeriod"]["Start"]] = {
+            "utilization_percentage": float(total.get("UtilizationPercentage", 0)),
+            "purchased_hours": float(total.get("PurchasedHours", 0)),
+            "total_actual_hours": float(total.get("TotalActualHours", 0)),
+            "unused_hours": float(total.get("UnusedHours", 0)),
+            "net_savings": float(total.get("NetRISavings", 0)),
+            "total_amortized_fee": float(total.get("TotalAmortizedFee", 0)),
+        }
+    return days
+
+
+def _fetch_sp_coverage(ce, params: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    days = {}
+    for item in _paginate(ce.get_savings_plans_coverage, params, "SavingsPlansCoverages", "NextToken"):
+        coverage = item.get("Coverage", {})
+        days[item["TimePeriod"]["Start"]] = {
+            "coverage_percentage": float(coverage.get("CoveragePercentage", 0)),
+            "spend_covered": float(coverage.get("SpendCoveredBySavingsPlans", 0)),
+            "on_demand_cost": float(coverage.get("OnDemandCost", 0)),
+            "total_cost": float(coverage.get("TotalCost", 0)),
+        }
+    return days
+
+
+def _fetch_sp_utilization(ce, params: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    days = {}
+    # GetSavingsPlansUtilization returns the whole window in a single response
+    throttle("ce")
+    result = ce.get_savings_plans_utilization(**params)
+    for period in result.get("SavingsPlansUtilizationsByTime", []):
+        util = period.get("Utilization", {})
+        savings = period.get("Savings", {})
+        days[period["TimePeriod"]["Start"]] = {
+            "utilization_percentage": float(util.get("UtilizationPercentage", 0)),
+            "total_commitment": float(util.get("TotalCommitment", 0)),
+            "used_commitment": float(util.get("UsedCommitment", 0)),
+            "unused_commitment": float(util.get("UnusedCommitment", 0)),
+            "net_savings": float(savings.get("NetSavings", 0)),
+        }
+    return days
+
+
+_FETCHERS = {
+    "ri_coverage": _fetch_ri_coverage,
+    "ri_utilization": _fetch_ri_utilization,
+    "sp_coverage": _fetch_sp_coverage,
+    "sp_utilization": _fetch_sp_utilization,
+}
+
+
+def _date_range(start: datetime, end: datetime) -> List[str]:
+    return [(start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range((end - start).days)]
+
+
+def sync_commitment_metrics(
+    db: Session,
+    days: int = 90,
+    account_ids: Optional[List[str]] = None,
+) -> Dict[str, str]:
+    """Fetch missing or still-open days of every commitment metric and persist them.
+
+    Closed days (older than the CE settlement window) are stored once and
+    never refetched, so after the first backfill each sync only asks CE
+    for the last few days. The four APIs are called concurrently.
+    Returns a {metric: error} map for metrics that failed to refresh; a
+    failed metric is not retried for an hour.
+    """
+    scope = _scope_key(account_ids)
+    accounts = _scope_accounts(account_ids)
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    window_start = today - timedelta(days=days)
+    closed_before = (today - timedelta(days=_SETTLEMENT_DAYS)).strftime("%Y-%m-%d")
+    wanted = _date_range(window_start, today)
+
+    final_rows = db.query(CommitmentMetric.metric, CommitmentMetric.date).filter(
+        CommitmentMetric.scope == scope,
+        CommitmentMetric.is_final == True,
+        CommitmentMetric.date >= wanted[0],
+    ).all()
+    final = {}
+    for metric, date in final_rows:
+        final.setdefault(metric, set()).add(date)
+
+    errors = {}
+    jobs = []
+    for metric in METRICS:
+        missing = [d for d in wanted if d not in final.get(metric, set())]
+        if not missing:
+            continue
+        failure_key = f"{metric}:{scope}"
+        if failure_key in _metric_failures:
+            errors[metric] = _metric_failures[failure_key]
+            continue
+        jobs.append((metric, missing[0]))
+    if not jobs:
+        return errors
+
+    ce = get_aws_client("ce", db)
+    account_filter = _account_filter(account_ids)
+    end = today.strftime("%Y-%m-%d")
+
+    def fetch(job):
+        metric, start = job
+        params = {"TimePeriod": {"Start": start, "End": end}, "Granularity": "DAILY"}
+        if account_filter:
+            params["Filter"] = account_filter
+        try:
+            return metric, start, _FETCHERS[metric](ce, params)
+        except Exception as e:
+            return metric, start, e
+
+    for metric, start, result in run_concurrently(fetch, jobs, max_workers=len(jobs)):
+        if isinstance(result, Exception):
+            errors[metric] = str(result)
+            _metric_failures[f"{metric}:{scope}"] = str(result)
+            continue
+
+        fetched_dates = [d for d in wanted if d >= start]
+        db.query(CommitmentMetric).filter(
+            CommitmentMetric.metric == metric,
+            CommitmentMetric.scope == scope,
+            CommitmentMetric.date.in_(fetched_dates),
+        ).delete(synchronize_session=False)
+        for date in fetched_dates:
+            db.add(CommitmentMetric(
+                metric=metric,
+                scope=scope,
+                accounts=accounts,
+                date=date,
+                values=result.get(date, {}),
+                is_final=date < closed_before,
+            ))
+    db.commit()
+    return errors
+
+
+def _run_sync(db: Session, account_ids: Optional[List[str]]):
+    """Sync one scope and record the outcome; the caller has claimed the scope."""
+    scope = _scope_key(account_ids)
+    try:
+        errors = sync_commitment_metrics(db, _SYNC_DAYS, account_ids)
+    except Exception as e:
+        db.rollback()
+        errors = {"sync": str(e)}
+        logger.warning("Commitment metrics sync failed: %s", e)
+    _last_errors[scope] = errors
+    _last_sync[scope] = time.monotonic()
+
+
+def _claim(scope: str) -> bool:
+    with _sync_lock:
+        if scope in _syncing:
+            return False
+        _syncing.add(scope)
+        return True
+
+
+def _release(scope: str):
+    with _sync_lock:
+        _syncing.discard(scope)
+
+
+def _sync_in_background(account_ids: Optional[List[str]]):
+    db = SessionLocal()
+    try:
+        _run_sync(db, account_ids)
+    finally:
+        db.close()
+        _release(_scope_key(account_ids))
+
+
+def sync_stored_scopes(db: Session):
+    """Refresh every account scope with stored metrics, plus "all" (scheduler, leader only).
+
+    Scopes are added by the first request for them; from then on the
+    scheduler keeps them current so requests only read stored rows.
+    """
+    stored = db.query(CommitmentMetric.scope, CommitmentMetric.accounts).distinct().all()
+    scopes = [None] + sorted({accounts for scope, accounts in stored if scope != "all" and accounts})
+    for accounts in scopes:
+        account_ids = accounts.split(",") if accounts else None
+        if not _claim(_scope_key(account_ids)):
+            continue
+        try:
+            _run_sync(db, account_ids)
+        finally:
+            _release(_scope_key(account_ids))
+
+
+def _ensure_synced(db: Session, account_ids: Optional[List[str]]) -> bool:
+    """Start a background sync when a scope needs one; True while it has no data yet.
+
+    A scope nobody asked for before has no rows, so its first sync starts
+    here; after that the scheduler refreshes it. Without the scheduler, a
+    stale scope is re-synced in the background every
+    COST_HISTORY_SYNC_INTERVAL.
+    """
+    scope = _scope_key(account_ids)
+    stored = db.query(CommitmentMetric.id).filter(CommitmentMetric.scope == scope).first() is not None
+    if stored:
+        last = _last_sync.get(scope)
+        if settings.BACKGROUND_JOBS_ENABLED or (last and time.monotonic() - last < settings.COST_HISTORY_SYNC_INTERVAL):
+            return False
+    if _claim(scope):
+        threading.Thread(
+            target=_sync_in_background, args=(account_ids,), name="commitment-metrics-sync", daemon=True,
+        ).start()
+    return not stored
+
+
+def get_commitment_metrics(
+    db: Session,
+    days: int = 90,
+    account_ids: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Daily RI/Savings Plans coverage and utilization served from the local store.
+
+    Requests never call CE: stored rows are read as they are, and a scope
+    seen for the first time is synced in the background while the response
+    reports it as pending.
+    """
+    scope = _scope_key(account_ids)
+    cache_key = f"commitments:{days}:{scope}"
+    if cache_key in _commitment_cache:
+        return _commitment_cache[cache_key]
+
+    pending = _ensure_synced(db, account_ids)
+    errors = _last_errors.get(scope)
+
+    start = (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%d")
+    rows = db.query(CommitmentMetric).filter(
+        CommitmentMetric.scope == scope,
+        CommitmentMetric.date >= start,
+    ).order_by(CommitmentMetric.date.asc()).all()
+
+    series = {metric: [] for metric in METRICS}
+    for row in rows:
+        series[row.metric].append({"date": row.date, **(row.values or {})})
+
+    def average(metric: str, field: str) -> Optional[float]:
+        points = [p[field] for p in series[metric] if field in p]
+        return round(sum(points) / len(points), 2) if points else None
+
+    response = {
+        "series": series,
+        "summary": {
+            "ri_average_coverage": average("ri_coverage", "coverage_percentage"),
+            "ri_average_utilization": average("ri_utilization", "utilization_percentage"),
+            "sp_average_coverage": average("sp_coverage", "coverage_percentage"),
+            "sp_average_utilization": average("sp_utilization", "utilization_percentage"),
+            "ri_net_savings": round(sum(p.get("net_savings", 0) for p in series["ri_utilization"]), 2),
+            "sp_net_savings": round(sum(p.get("net_savings", 0) for p in series["sp_utilization"]), 2),
+        },
+        "pending": pending,
+    }
+    if errors:
+        response["errors"] = errors
+    elif not pending:
+        _commitment_cache[cache_key] = response
+    return response
@@ -1,9 +1,9 @@
 from typing import Optional, List, Dict, Any
-from cachetools import TTLCache
 from sqlalchemy.orm import Session
 from app.services.aws_client import get_aws_client, get_all_active_accounts
+from app.metrics import MeteredTTLCache
 
-_optimizer_cache = TTLCache(maxsize=50, ttl=600)
+_optimizer_cache = MeteredTTLCache("compute_optimizer", maxsize=50, ttl=600)
 
 
 def get_ec2_recommendations(
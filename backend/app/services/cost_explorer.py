@@ -1,10 +1,10 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional, List, Dict, Any
-from cachetools import TTLCache
 from sqlalchemy.orm import Session
 from app.services.aws_client import get_aws_client, get_root_account
+from app.metrics import MeteredTTLCache
 
-_cost_cache = TTLCache(maxsize=200, ttl=300)
+_cost_cache = MeteredTTLCache("costs", maxsize=200, ttl=300)
 
 
 def _cache_key(prefix: str, **kwargs) -> str:
@@ -67,7 +67,7 @@ def get_cost_and_usage(
         params["Filter"] = {"And": filters}
 
     if group_by:
-        params["GroupDefinitions"] = group_by
+        params["GroupBy"] = group_by
 
     result = ce.get_cost_and_usage(**params)
     _cost_cache[ck] = result
@@ -218,7 +218,7 @@ def get_top_resources(
         "TimePeriod": {"Start": start_date, "End": end_date},
         "Granularity": "MONTHLY",
         "Metrics": ["UnblendedCost"],
-        "GroupDefinitions": [
+        "GroupBy": [
             {"Type": "DIMENSION", "Key": "SERVICE"},
             {"Type": "TAG", "Key": "Name"},
         ],
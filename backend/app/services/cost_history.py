@@ -0,0 +1,256 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any, Tuple
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models import DailyCost, CostHistoryDay
+from app.services.aws_client import get_aws_client, throttle, run_concurrently
+from app.services.cost_explorer import _RECORD_TYPE_FILTER
+from app.services.events import broker
+
+logger = logging.getLogger(__name__)
+
+# CE keeps restating the most recent days; older days are treated as closed
+_SETTLEMENT_DAYS = 3
+
+_sync_lock = threading.Lock()
+_last_sync = 0.0
+_last_error: Optional[str] = None
+
+# Newest CostHistoryDay.synced_at already announced by this process; None until seeded
+_announced_sync: Optional[datetime] = None
+_announce_lock = threading.Lock()
+
+
+def _date_range(start: datetime, end: datetime) -> List[str]:
+    return [(start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range((end - start).days)]
+
+
+def _linked_accounts(ce, start: str, end: str) -> List[str]:
+    params = {"TimePeriod": {"Start": start, "End": end}, "Dimension": "LINKED_ACCOUNT"}
+    accounts = []
+    while True:
+        throttle("ce")
+        result = ce.get_dimension_values(**params)
+        accounts.extend(v["Value"] for v in result.get("DimensionValues", []))
+        token = result.get("NextPageToken")
+        if not token:
+            return accounts
+        params["NextPageToken"] = token
+
+
+def _fetch_account_days(ce, account_id: str, start: str, end: str) -> List[Tuple[str, str, str, float]]:
+    """Daily cost of one linked account grouped by service and region.
+
+    CE allows only two GroupBy keys, so the account dimension comes from
+    the filter and each account is a separate (concurrent) query.
+    """
+    params = {
+        "TimePeriod": {"Start": start, "End": end},
+        "Granularity": "DAILY",
+        "Metrics": ["UnblendedCost"],
+        "Filter": {"And": [
+            _RECORD_TYPE_FILTER,
+            {"Dimensions": {"Key": "LINKED_ACCOUNT", "Values": [account_id]}},
+        ]},
+        "GroupBy": [
+            {"Type": "DIMENSION", "Key": "SERVICE"},
+            {"Type": "DIMENSION", "Key": "REGION"},
+        ],
+    }
+    rows = []
+    while True:
+        throttle("ce")
+        result = ce.get_cost_and_usage(**params)
+        for period in result.get("ResultsByTime", []):
+            date = period["TimePeriod"]["Start"]
+            for group in period.get("Groups", []):
+                service, region = (group["Keys"] + ["NoRegion"])[:2]
+                amount = float(group["Metrics"]["UnblendedCost"]["Amount"])
+                if amount:
+                    rows.append((date, service, region or "NoRegion", amount))
+        token = result.get("NextPageToken")
+        if not token:
+            return rows
+        params["NextPageToken"] = token
+
+
+def sync_daily_costs(db: Session, days: Optional[int] = None) -> Dict[str, Any]:
+    """Ingest missing or still-open days into daily_costs.
+
+    Closed days are written once and never refetched, so after the initial
+    backfill a sync only covers the last few days. Returns the date range
+    fetched (empty when everything was already final).
+    """
+    days = days or settings.COST_HISTORY_DAYS
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    wanted = _date_range(today - timedelta(days=days), today)
+    closed_before = (today - timedelta(days=_SETTLEMENT_DAYS)).strftime("%Y-%m-%d")
+
+    final = {
+        d for (d,) in db.query(CostHistoryDay.date).filter(
+            CostHistoryDay.is_final == True,
+            CostHistoryDay.date >= wanted[0],
+        )
+    }
+    missing = [d for d in wanted if d not in final]
+    if not missing:
+        return {"fetched_days": 0}
+
+    start, end = missing[0], today.strftime("%Y-%m-%d")
+    fetched_dates = [d for d in wanted if d >= start]
+
+    ce = get_aws_client("ce", db)
+    accounts = _linked_accounts(ce, start, end)
+    per_account = run_concurrently(
+        lambda acct: (acct, _fetch_account_days(ce, acct, start, end)),
+        accounts,
+    )
+
+    db.query(DailyCost).filter(DailyCost.date >= start).delete(synchronize_session=False)
+    db.query(CostHistoryDay).filter(CostHistoryDay.date >= start).delete(synchronize_session=False)
+    db.bulk_insert_mappings(DailyCost, [
+        {"date": date, "account_id": acct, "service": service, "region": region, "amount": amount}
+        for acct, rows in per_account
+        for date, service, region, amount in rows
+    ])
+    db.bulk_insert_mappings(CostHistoryDay, [
+        {"date": d, "is_final": d < closed_before} for d in fetched_dates
+    ])
+    db.commit()
+
+    from app.services.local_anomalies import history_synced
+    history_synced(start)
+    return {"fetched_days": len(fetched_dates), "start": start, "end": end, "accounts": len(accounts)}
+
+
+def _run_sync(db: Session) -> Optional[str]:
+    """Sync and record the outcome; the caller holds _sync_lock."""
+    global _last_sync, _last_error
+    try:
+        sync_daily_costs(db)
+        _last_error = None
+    except Exception as e:
+        db.rollback()
+        _last_error = str(e)
+        logger.warning("Cost history sync failed: %s", e)
+    # A failed sync also waits for the next interval instead of hammering CE
+    _last_sync = time.monotonic()
+    return _last_error
+
+
+def _sync_in_background():
+    db = SessionLocal()
+    try:
+        announce_refresh(db)  # seeds the watermark, so this sync is announced
+        _run_sync(db)
+        announce_refresh(db)
+    finally:
+        db.close()
+        _sync_lock.release()
+
+
+def announce_refresh(db: Session):
+    """Publish costs.refreshed for days synced since the last call.
+
+    Only the scheduler leader syncs, but event streams are connected to every
+    replica, so each replica runs this after its refresh tick and announces
+    what the store gained, whoever wrote it. The first call only records
+    where the store stands.
+    """
+    global _announced_sync
+    with _announce_lock:
+        latest = db.query(func.max(CostHistoryDay.synced_at)).scalar()
+        if latest is None or (_announced_sync is not None and latest <= _announced_sync):
+            return
+        if _announced_sync is not None:
+            start, end, days = db.query(
+                func.min(CostHistoryDay.date), func.max(CostHistoryDay.date), func.count(CostHistoryDay.date),
+            ).filter(CostHistoryDay.synced_at > _announced_sync).one()
+            accounts = [a for (a,) in db.query(DailyCost.account_id).filter(DailyCost.date >= start).distinct()]
+            end = (datetime.strptime(end, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+            broker.publish(
+                "costs.refreshed",
+                {"start": start, "end": end, "days": days},
+                account_ids=accounts,
+            )
+        _announced_sync = latest
+
+
+def sync_in_progress() -> bool:
+    """Whether this process is currently writing to the local cost store."""
+    return _sync_lock.locked()
+
+
+def ensure_recent(db: Session, force: bool = False) -> Optional[str]:
+    """Keep daily_costs fresh, syncing at most once per COST_HISTORY_SYNC_INTERVAL.
+
+    With force (the scheduler) the sync runs inline. Requests never wait on
+    it: the scheduler owns syncing (including the initial backfill at
+    startup) and, when background jobs are disabled, a stale store is synced
+    in a background thread. Returns the last sync error, if any; callers keep
+    serving whatever history is already stored.
+    """
+    if force:
+        with _sync_lock:
+            return _run_sync(db)
+
+    if settings.BACKGROUND_JOBS_ENABLED:
+        return _last_error
+    if _last_sync and time.monotonic() - _last_sync < settings.COST_HISTORY_SYNC_INTERVAL:
+        return _last_error
+    if not _sync_lock.acquire(blocking=False):
+        return _last_error  # already syncing
+    threading.Thread(target=_sync_in_background, name="cost-history-sync", daemon=True).start()
+    return _last_error
+
+
+def history_days(db: Session) -> int:
+    """Number of days currently ingested into the local store."""
+    return db.query(func.count(CostHistoryDay.date)).scalar() or 0
+
+
+def load_daily_matrix(
+    db: Session,
+    start: str,
+    end: str,
+    keys: Tuple[str, ...] = ("account_id", "service"),
+    account_ids: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Load [start, end) from daily_costs as a (series x days) NumPy matrix.
+
+    Rows are the distinct combinations of `keys` (any of account_id,
+    service, region); days without a row are zero.
+    """
+    columns = [getattr(DailyCost, k) for k in keys]
+    q = db.query(DailyCost.date, *columns, func.sum(DailyCost.amount)).filter(
+        DailyCost.date >= start,
+        DailyCost.date < end,
+    )
+    if account_ids:
+        q = q.filter(DailyCost.account_id.in_(account_ids))
+    rows = q.group_by(DailyCost.date, *columns).all()
+
+    dates = _date_range(
+        datetime.strptime(start, "%Y-%m-%d"),
+        datetime.strptime(end, "%Y-%m-%d"),
+    )
+    date_index = {d: i for i, d in enumerate(dates)}
+    series_index: Dict[Tuple[str, ...], int] = {}
+    row_idx = np.empty(len(rows), dtype=np.int64)
+    col_idx = np.empty(len(rows), dtype=np.int64)
+    amounts = np.empty(len(rows), dtype=np.float64)
+    for i, row in enumerate(rows):
+        key = tuple(row[1:-1])
+        row_idx[i] = series_index.setdefault(key, len(series_index))
+        col_idx[i] = date_index[row[0]]
+        amounts[i] = row[-1]
+
+    matrix = np.zeros((len(series_index), len(dates)), dtype=np.float64)
+    np.add.at(matrix, (row_idx, col_idx), amounts)
+    return {"keys": list(series_index), "dates": dates, "values": matrix}
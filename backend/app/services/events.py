@@ -0,0 +1,98 @@
+import asyncio
+import itertools
+import json
+import threading
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Any, FrozenSet
+
+# Events buffered per subscriber before it is considered too slow
+_QUEUE_SIZE = 100
+
+_event_ids = itertools.count(1)
+
+
+class Subscription:
+    """One connected client, filtered by the accounts its user may see."""
+
+    def __init__(self, user_id: int, is_admin: bool, allowed_accounts: FrozenSet[str]):
+        self.user_id = user_id
+        self.is_admin = is_admin
+        self.allowed_accounts = allowed_accounts
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=_QUEUE_SIZE)
+
+    def wants(self, account_ids: Optional[List[str]], user_id: Optional[int]) -> bool:
+        if user_id is not None:
+            return user_id == self.user_id
+        if self.is_admin or account_ids is None:
+            return True
+        return bool(self.allowed_accounts.intersection(account_ids))
+
+    def _offer(self, event: Dict[str, Any]):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Drop the backlog and tell the client to refetch everything
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"id": event["id"], "type": "resync", "data": {}})
+
+
+class EventBroker:
+    """In-process fan-out of change notifications to streaming clients.
+
+    publish() is safe to call from worker threads (background jobs, sync
+    routes); delivery happens on each subscriber's event loop.
+    """
+
+    def __init__(self):
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id: int, is_admin: bool, allowed_accounts: FrozenSet[str]) -> Subscription:
+        sub = Subscription(user_id, is_admin, allowed_accounts)
+        with self._lock:
+            self._subscribers.append(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.remove(sub)
+
+    def publish(
+        self,
+        event_type: str,
+        data: Dict[str, Any],
+        account_ids: Optional[List[str]] = None,
+        user_id: Optional[int] = None,
+    ):
+        """Send an event to every subscriber allowed to see it.
+
+        account_ids limits delivery to users assigned one of those accounts
+        (None means the event is not account-specific); user_id targets a
+        single user.
+        """
+        event = {
+            "id": next(_event_ids),
+            "type": event_type,
+            "data": {**data, "timestamp": datetime.now(timezone.utc).isoformat()},
+        }
+        with self._lock:
+            targets = [s for s in self._subscribers if s.wants(account_ids, user_id)]
+        for sub in targets:
+            try:
+                sub.loop.call_soon_threadsafe(sub._offer, event)
+            except RuntimeError:
+                self.unsubscribe(sub)  # loop already closed
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+
+broker = EventBroker()
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
@@ -1,23 +1,26 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional, List, Dict, Any
-from cachetools import TTLCache
+import numpy as np
 from sqlalchemy.orm import Session
+from app.config import settings
 from app.services.aws_client import get_aws_client
+from app.services.cost_history import ensure_recent, history_days, load_daily_matrix, sync_in_progress
+from app.services.local_forecast import holt_winters_forecast
+from app.metrics import MeteredTTLCache
 
-_forecast_cache = TTLCache(maxsize=50, ttl=600)
+_forecast_cache = MeteredTTLCache("forecast", maxsize=50, ttl=600)
 
+# History window fed to the local model
+_LOCAL_HISTORY_DAYS = 365
 
-def get_cost_forecast(
+
+def _get_ce_forecast(
     db: Session,
-    months_ahead: int = 3,
-    granularity: str = "MONTHLY",
-    account_ids: Optional[List[str]] = None,
+    months_ahead: int,
+    granularity: str,
+    account_ids: Optional[List[str]],
 ) -> Dict[str, Any]:
-    """Get cost forecast from AWS Cost Explorer."""
-    cache_key = f"forecast:{months_ahead}:{granularity}:{account_ids}"
-    if cache_key in _forecast_cache:
-        return _forecast_cache[cache_key]
-
+    """Total-only forecast from Cost Explorer's GetCostForecast."""
     ce = get_aws_client("ce", db)
 
     now = datetime.now(timezone.utc)
@@ -60,12 +63,128 @@ def get_cost_forecast(
 
     total = round(float(result.get("Total", {}).get("Amount", 0)), 2)
 
-    response = {
+    return {
         "total_forecast": total,
         "currency": "USD",
         "months_ahead": months_ahead,
         "forecast_periods": forecast_periods,
+        "source": "aws",
     }
 
-    _forecast_cache[cache_key] = response
+
+def _get_local_forecast(
+    db: Session,
+    months_ahead: int,
+    granularity: str,
+    account_ids: Optional[List[str]],
+) -> Optional[Dict[str, Any]]:
+    """Holt-Winters forecast over the local daily cost store.
+
+    Every account x service series plus the overall total is fitted in one
+    batch. The total row drives forecast_periods (intervals of a sum are not
+    the sum of intervals); the per-series means give the breakdowns.
+    Returns None when the store doesn't hold enough history.
+    """
+    if history_days(db) < settings.FORECAST_MIN_HISTORY_DAYS:
+        return None
+
+    now = datetime.now(timezone.utc)
+    today = now.strftime("%Y-%m-%d")
+    history = load_daily_matrix(
+        db,
+        (now - timedelta(days=_LOCAL_HISTORY_DAYS)).strftime("%Y-%m-%d"),
+        today,
+        keys=("account_id", "service"),
+        account_ids=account_ids,
+    )
+    values = history["values"]
+    if not values.size:
+        return None
+
+    # Drop leading days before any spend was recorded
+    active = np.nonzero(values.sum(axis=0))[0]
+    if not active.size or values.shape[1] - active[0] < settings.FORECAST_MIN_HISTORY_DAYS:
+        return None
+    values = values[:, active[0]:]
+
+    # Same window as the CE call: tomorrow through 30 * months_ahead days out
+    horizon_dates = [
+        (now + timedelta(days=i)).strftime("%Y-%m-%d")
+        for i in range(1, 30 * months_ahead)
+    ]
+    # The partial current day is not in history, so forecast it and drop it
+    batch = np.vstack([values, values.sum(axis=0, keepdims=True)])
+    fc = holt_winters_forecast(batch, len(horizon_dates) + 1)
+    mean, lower, upper = (fc[k][:, 1:] for k in ("mean", "lower", "upper"))
+
+    if granularity == "DAILY":
+        period_keys = horizon_dates
+    else:
+        period_keys = [d[:7] for d in horizon_dates]
+    periods: Dict[str, List[int]] = {}
+    for i, key in enumerate(period_keys):
+        periods.setdefault(key, []).append(i)
+
+    # Daily bounds are summed as if errors were fully correlated: conservative
+    forecast_periods = []
+    for idx in periods.values():
+        forecast_periods.append({
+            "date": horizon_dates[idx[0]],
+            "mean_value": round(float(mean[-1, idx].sum()), 2),
+            "prediction_interval_lower": round(float(lower[-1, idx].sum()), 2),
+            "prediction_interval_upper": round(float(upper[-1, idx].sum()), 2),
+        })
+
+    series_totals = mean[:-1].sum(axis=1)
+    by_service: Dict[str, float] = {}
+    by_account: Dict[str, float] = {}
+    for (account_id, service), amount in zip(history["keys"], series_totals):
+        by_service[service] = by_service.get(service, 0) + float(amount)
+        by_account[account_id] = by_account.get(account_id, 0) + float(amount)
+
+    return {
+        "total_forecast": round(float(mean[-1].sum()), 2),
+        "currency": "USD",
+        "months_ahead": months_ahead,
+        "forecast_periods": forecast_periods,
+        "by_service": [
+            {"service": k, "forecast": round(v, 2)}
+            for k, v in sorted(by_service.items(), key=lambda x: x[1], reverse=True)
+        ],
+        "by_account": [
+            {"account_id": k, "forecast": round(v, 2)}
+            for k, v in sorted(by_account.items(), key=lambda x: x[1], reverse=True)
+        ],
+        "source": "local",
+    }
+
+
+def get_cost_forecast(
+    db: Session,
+    months_ahead: int = 3,
+    granularity: str = "MONTHLY",
+    account_ids: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Get a cost forecast, computed locally when enough daily history is stored.
+
+    Falls back to AWS Cost Explorer's GetCostForecast when the local store
+    is too short (e.g. while the initial backfill runs) or is being synced.
+    """
+    cache_key = f"forecast:{months_ahead}:{granularity}:{account_ids}"
+    if cache_key in _forecast_cache:
+        return _forecast_cache[cache_key]
+
+    sync_error = ensure_recent(db)
+    syncing = sync_in_progress()
+    response = None if syncing else _get_local_forecast(db, months_ahead, granularity, account_ids)
+    if response is None:
+        response = _get_ce_forecast(db, months_ahead, granularity, account_ids)
+        if "error" in response:
+            return response
+    elif sync_error:
+        response["sync_error"] = sync_error
+
+    # A fallback served during a sync must not hide the local forecast once it lands
+    if not syncing:
+        _forecast_cache[cache_key] = response
     return response
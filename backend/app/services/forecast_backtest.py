@@ -0,0 +1,244 @@
+"""Rolling-origin backtests for the cost forecasting models.
+
+Replays daily cost series, scores every model's forecasts at each origin
+(MAPE, 80% interval coverage) and records fit/predict time and peak memory
+per series. Series are evaluated in parallel on a process pool.
+
+    python -m app.services.forecast_backtest --synthetic 200 --output backtest.json
+    python -m app.services.forecast_backtest --history --output backtest.json
+    python -m app.services.forecast_backtest --synthetic 200 --compare baseline.json
+
+CE's GetCostForecast only forecasts from today, so it cannot be replayed
+from past origins; only the local models are backtested.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Any, Optional
+import numpy as np
+from app.services.local_forecast import holt_winters_forecast, SEASON_LENGTH, Z_80
+
+
+def seasonal_naive_forecast(values: np.ndarray, horizon: int) -> Dict[str, np.ndarray]:
+    """Repeat the last week; intervals from the spread of week-over-week changes."""
+    y = np.asarray(values, dtype=np.float64)
+    m = SEASON_LENGTH
+    last_week = y[:, -m:]
+    mean = np.tile(last_week, (1, -(-horizon // m)))[:, :horizon]
+    sigma = (y[:, m:] - y[:, :-m]).std(axis=1, keepdims=True)
+    weeks_out = (np.arange(horizon) // m + 1)[None, :]
+    width = Z_80 * sigma * np.sqrt(weeks_out)
+    return {
+        "mean": mean,
+        "lower": np.clip(mean - width, 0, None),
+        "upper": mean + width,
+    }
+
+
+MODELS: Dict[str, Callable[[np.ndarray, int], Dict[str, np.ndarray]]] = {
+    "holt_winters": holt_winters_forecast,
+    "seasonal_naive": seasonal_naive_forecast,
+}
+
+
+def synthetic_series(count: int, days: int, seed: int = 7) -> List[np.ndarray]:
+    """Daily cost-like series: level, trend, weekly cycle, noise, shifts and spikes."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(days)
+    series = []
+    for _ in range(count):
+        level = rng.lognormal(mean=4, sigma=1.5)
+        trend = level * rng.normal(0, 0.002)
+        weekly = level * rng.uniform(0, 0.3) * np.where(t % 7 < 5, 1.0, -1.0)
+        noise = rng.normal(0, level * rng.uniform(0.01, 0.15), days)
+        y = level + trend * t + weekly + noise
+        if rng.random() < 0.3:  # step change, e.g. a new workload
+            y[rng.integers(days // 2, days):] += level * rng.uniform(-0.4, 0.6)
+        if rng.random() < 0.3:  # one-off spike
+            y[rng.integers(0, days)] *= rng.uniform(2, 5)
+        series.append(np.clip(y, 0, None))
+    return series
+
+
+def _score(actual: np.ndarray, fc: Dict[str, np.ndarray]) -> Dict[str, float]:
+    mean, lower, upper = fc["mean"][0], fc["lower"][0], fc["upper"][0]
+    nonzero = actual > 0
+    mape = float(np.mean(np.abs(actual[nonzero] - mean[nonzero]) / actual[nonzero]) * 100) if nonzero.any() else None
+    coverage = float(np.mean((actual >= lower) & (actual <= upper)) * 100)
+    return {"mape": mape, "coverage": coverage}
+
+
+def _present(rows: List[Dict[str, Any]], key: str) -> List[float]:
+    """Values of one stat across series, skipping those where it is undefined."""
+    return [row[key] for row in rows if row[key] is not None]
+
+
+def _evaluate_series(job) -> Dict[str, Any]:
+    """Backtest every model on one series (runs in a worker process)."""
+    series_id, values, horizon, min_train, step = job
+    results = {}
+    for name, model in MODELS.items():
+        mapes, coverages, times = [], [], []
+        origins = list(range(min_train, len(values) - horizon + 1, step))
+        for origin in origins:
+            train = values[None, :origin]
+            started = time.perf_counter()
+            try:
+                fc = model(train, horizon)
+            except ValueError:
+                continue
+            times.append(time.perf_counter() - started)
+            score = _score(values[origin:origin + horizon], fc)
+            if score["mape"] is not None:
+                mapes.append(score["mape"])
+            coverages.append(score["coverage"])
+
+        # Memory is traced on a separate run so tracemalloc doesn't skew timings
+        peak = 0
+        if times:
+            tracemalloc.start()
+            try:
+                model(values[None, :origins[-1]], horizon)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+        results[name] = {
+            "origins": len(times),
+            "mape": float(np.mean(mapes)) if mapes else None,
+            "coverage": float(np.mean(coverages)) if coverages else None,
+            "fit_predict_ms": float(np.mean(times) * 1000) if times else None,
+            "peak_memory_kb": peak / 1024,
+        }
+    return {"series_id": series_id, "days": len(values), "models": results}
+
+
+def run_backtest(
+    series: Dict[str, np.ndarray],
+    horizon: int = 30,
+    min_train: int = 56,
+    step: int = 7,
+    workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Backtest every model on every series and aggregate into a report."""
+    jobs = [(sid, np.asarray(v, dtype=np.float64), horizon, min_train, step) for sid, v in series.items()]
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        per_series = list(pool.map(_evaluate_series, jobs, chunksize=max(1, len(jobs) // 64)))
+    elapsed = time.perf_counter() - started
+
+    def r(x):
+        return round(x, 3) if x is not None else None
+
+    models = {}
+    for name in MODELS:
+        rows = [s["models"][name] for s in per_series if s["models"][name]["origins"]]
+        mapes = _present(rows, "mape")
+        models[name] = {
+            "series": len(rows),
+            "mape_mean": r(float(np.mean(mapes))) if mapes else None,
+            "mape_median": r(float(np.median(mapes))) if mapes else None,
+            "interval_coverage": r(float(np.mean(_present(rows, "coverage")))) if rows else None,
+            "fit_predict_ms_mean": r(float(np.mean(_present(rows, "fit_predict_ms")))) if rows else None,
+            "fit_predict_ms_p95": r(float(np.percentile(_present(rows, "fit_predict_ms"), 95))) if rows else None,
+            "peak_memory_kb_max": r(max(_present(rows, "peak_memory_kb"))) if rows else None,
+        }
+
+    for s in per_series:
+        for stats in s["models"].values():
+            for key, value in stats.items():
+                if isinstance(value, float):
+                    stats[key] = r(value)
+
+    return {
+        "config": {"horizon": horizon, "min_train": min_train, "step": step, "series": len(jobs)},
+        "environment": {"python": platform.python_version(), "numpy": np.__version__},
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "wall_time_s": r(elapsed),
+        "models": models,
+        "series": sorted(per_series, key=lambda s: s["series_id"]),
+    }
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float = 0.1) -> List[str]:
+    """List model metrics that regressed by more than `tolerance` (relative)."""
+    regressions = []
+    for name, stats in current["models"].items():
+        base = baseline.get("models", {}).get(name)
+        if not base:
+            continue
+        for key in ("mape_mean", "fit_predict_ms_mean", "peak_memory_kb_max"):
+            old, new = base.get(key), stats.get(key)
+            if old and new and new > old * (1 + tolerance):
+                regressions.append(f"{name}.{key}: {old} -> {new}")
+        old, new = base.get("interval_coverage"), stats.get("interval_coverage")
+        if old and new and new < old * (1 - tolerance):
+            regressions.append(f"{name}.interval_coverage: {old} -> {new}")
+    return regressions
+
+
+def load_history_series(days: int = 365) -> Dict[str, np.ndarray]:
+    """Account x service series from the local daily cost store."""
+    from app.database import SessionLocal
+    from app.services.cost_history import load_daily_matrix
+
+    now = datetime.now(timezone.utc)
+    db = SessionLocal()
+    try:
+        history = load_daily_matrix(
+            db,
+            (now - timedelta(days=days)).strftime("%Y-%m-%d"),
+            now.strftime("%Y-%m-%d"),
+        )
+    finally:
+        db.close()
+    return {"/".join(key): row for key, row in zip(history["keys"], history["values"])}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Backtest cost forecasting models")
+    parser.add_argument("--synthetic", type=int, default=0, help="number of synthetic series")
+    parser.add_argument("--days", type=int, default=365, help="length of each series")
+    parser.add_argument("--history", action="store_true", help="include series from the local cost store")
+    parser.add_argument("--horizon", type=int, default=30)
+    parser.add_argument("--step", type=int, default=7, help="days between rolling origins")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="-", help="report path, or - for stdout")
+    parser.add_argument("--compare", help="baseline report; exit non-zero on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="relative regression tolerance")
+    args = parser.parse_args(argv)
+
+    series = {}
+    if args.synthetic:
+        for i, values in enumerate(synthetic_series(args.synthetic, args.days, args.seed)):
+            series[f"synthetic-{i:05d}"] = values
+    if args.history:
+        series.update(load_history_series(args.days))
+    if not series:
+        parser.error("nothing to backtest: pass --synthetic N and/or --history")
+
+    report = run_backtest(series, args.horizon, step=args.step, workers=args.workers)
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare_reports(json.load(f), report, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
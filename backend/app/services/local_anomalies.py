@@ -0,0 +1,237 @@
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any, Tuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models import CostHistoryDay
+from app.services.cost_history import load_daily_matrix, _SETTLEMENT_DAYS
+
+WINDOW_DAYS = 28  # trailing baseline for the rolling median/MAD
+THRESHOLD = 3.5  # robust z-score above which a day is anomalous
+MIN_IMPACT = 10.0  # ignore deviations smaller than this many USD
+MAX_HISTORY_DAYS = 365
+
+_MAD_SCALE = 1.4826  # MAD -> standard deviation for normal data
+
+_lock = threading.Lock()
+# Detector state over closed days only: the trailing window per series and
+# the anomalies found so far. Open days are scored on each call without
+# being folded in, since CE may still restate them.
+_state: Dict[str, Any] = {
+    "keys": [],
+    "index": {},
+    "window": np.zeros((0, WINDOW_DAYS)),
+    # Days of each window since the series first had spend; the rest is padding
+    "history": np.zeros(0, dtype=np.int64),
+    "last_date": None,  # exclusive: days before it are folded in
+    "built_at": None,
+    "flags": [],  # (series_row, date, actual, expected, score)
+}
+
+
+def _score(values: np.ndarray, windows: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Robust z-scores of values against their trailing windows (vectorized over all axes)."""
+    median = np.median(windows, axis=-1)
+    mad = np.median(np.abs(windows - median[..., None]), axis=-1) * _MAD_SCALE
+    # Flat series have MAD 0; floor the scale so a tiny change isn't infinite
+    scale = np.maximum(mad, np.maximum(0.05 * median, 1.0))
+    score = (values - median) / scale
+    flagged = (score > THRESHOLD) & (values - median > MIN_IMPACT)
+    return median, score, flagged
+
+
+def _collect(flagged, values, median, score, dates, rows=None) -> List[Tuple[int, str, float, float, float]]:
+    out = []
+    for r, c in zip(*np.nonzero(flagged)):
+        row = int(rows[r]) if rows is not None else int(r)
+        out.append((row, dates[c], float(values[r, c]), float(median[r, c]), float(score[r, c])))
+    return out
+
+
+def _advance(db: Session, closed_end: str):
+    """Fold closed days after the last processed date into the detector state."""
+    state = _state
+    if state["last_date"] is not None and _history_rewritten(db, state):
+        _clear_state()
+
+    if state["last_date"] is None:
+        start = (datetime.strptime(closed_end, "%Y-%m-%d") - timedelta(days=MAX_HISTORY_DAYS)).strftime("%Y-%m-%d")
+        first, ingested = db.query(func.min(CostHistoryDay.date), func.count(CostHistoryDay.date)).filter(
+            CostHistoryDay.date >= start,
+            CostHistoryDay.date < closed_end,
+        ).one()
+        # With less than a full window the baselines would be padded with
+        # zeros and flag everything; wait until the backfill has landed
+        if ingested <= WINDOW_DAYS:
+            return
+        # Days before the first ingested one are unknown, not zero
+        built_at = datetime.now(timezone.utc)
+        data = load_daily_matrix(db, first, closed_end, keys=("account_id", "service", "region"))
+        values = data["values"]
+        state["keys"] = data["keys"]
+        state["index"] = {k: i for i, k in enumerate(data["keys"])}
+        state["flags"] = []
+        # A series that starts partway through has zeros before its first
+        # spend; it is only scored once its window holds nothing but real days
+        first_spend = np.argmax(values > 0, axis=1)
+        if values.shape[1] > WINDOW_DAYS:
+            # Initial build: every day scored at once over sliding windows
+            windows = sliding_window_view(values, WINDOW_DAYS, axis=1)[:, :-1]
+            current = values[:, WINDOW_DAYS:]
+            median, score, flagged = _score(current, windows)
+            flagged &= np.arange(WINDOW_DAYS, values.shape[1]) >= first_spend[:, None] + WINDOW_DAYS
+            state["flags"] = _collect(flagged, current, median, score, data["dates"][WINDOW_DAYS:])
+        tail = values[:, -WINDOW_DAYS:]
+        state["window"] = np.pad(tail, ((0, 0), (WINDOW_DAYS - tail.shape[1], 0)))
+        state["history"] = np.minimum(values.shape[1] - first_spend, WINDOW_DAYS)
+        state["last_date"] = closed_end
+        state["built_at"] = built_at
+        return
+
+    if closed_end <= state["last_date"]:
+        return
+
+    data = load_daily_matrix(db, state["last_date"], closed_end, keys=("account_id", "service", "region"))
+    new_keys = [k for k in data["keys"] if k not in state["index"]]
+    if new_keys:
+        for k in new_keys:
+            state["index"][k] = len(state["keys"])
+            state["keys"].append(k)
+        state["window"] = np.vstack([state["window"], np.zeros((len(new_keys), WINDOW_DAYS))])
+        state["history"] = np.concatenate([state["history"], np.zeros(len(new_keys), dtype=np.int64)])
+
+    # Align the new days to the state's row order, then score day by day
+    rows = np.array([state["index"][k] for k in data["keys"]], dtype=np.int64)
+    new_days = np.zeros((len(state["keys"]), len(data["dates"])))
+    if rows.size:
+        new_days[rows] = data["values"]
+    for c, date in enumerate(data["dates"]):
+        median, score, flagged = _score(new_days[:, c], state["window"])
+        flagged &= state["history"] >= WINDOW_DAYS
+        for r in np.nonzero(flagged)[0]:
+            state["flags"].append((int(r), date, float(new_days[r, c]), float(median[r]), float(score[r])))
+        state["window"] = np.roll(state["window"], -1, axis=1)
+        state["window"][:, -1] = new_days[:, c]
+        started = (state["history"] > 0) | (new_days[:, c] > 0)
+        state["history"] = np.where(started, np.minimum(state["history"] + 1, WINDOW_DAYS), 0)
+    state["last_date"] = closed_end
+
+    horizon = (datetime.strptime(closed_end, "%Y-%m-%d") - timedelta(days=MAX_HISTORY_DAYS)).strftime("%Y-%m-%d")
+    state["flags"] = [f for f in state["flags"] if f[1] >= horizon]
+
+
+def _history_rewritten(db: Session, state: Dict[str, Any]) -> bool:
+    """Whether a sync (in any replica) re-ingested days already folded into the state."""
+    return db.query(CostHistoryDay.date).filter(
+        CostHistoryDay.date < state["last_date"],
+        CostHistoryDay.synced_at > state["built_at"],
+    ).first() is not None
+
+
+def _score_open_days(db: Session, closed_end: str, today: str) -> List[Tuple[int, str, float, float, float]]:
+    data = load_daily_matrix(db, closed_end, today, keys=("account_id", "service", "region"))
+    # Same rule as closed days: only series with a full window of real history
+    known = [
+        (i, _state["index"][k]) for i, k in enumerate(data["keys"])
+        if k in _state["index"] and _state["history"][_state["index"][k]] >= WINDOW_DAYS
+    ]
+    if not known or not data["dates"]:
+        return []
+    src, rows = (np.array(x, dtype=np.int64) for x in zip(*known))
+    values = data["values"][src]
+    # Each open day is compared with the closed window, not with other open days
+    windows = np.broadcast_to(_state["window"][rows][:, None, :], values.shape + (WINDOW_DAYS,))
+    median, score, flagged = _score(values, windows)
+    return _collect(flagged, values, median, score, data["dates"], rows)
+
+
+def _merge_runs(flags, keys) -> List[Dict[str, Any]]:
+    """Collapse consecutive anomalous days of one series into a single anomaly."""
+    anomalies = []
+    for row, date, actual, expected, score in sorted(flags):
+        account_id, service, region = keys[row]
+        prev = anomalies[-1] if anomalies else None
+        if (
+            prev and prev["_row"] == row
+            and (datetime.strptime(date, "%Y-%m-%d") - datetime.strptime(prev["end_date"], "%Y-%m-%d")).days == 1
+        ):
+            prev["end_date"] = date
+            prev["expected_spend"] += expected
+            prev["actual_spend"] += actual
+            prev["severity"] = max(prev["severity"], score)
+            continue
+        anomalies.append({
+            "_row": row,
+            "anomaly_id": f"local:{account_id}:{service}:{region}:{date}",
+            "start_date": date,
+            "end_date": date,
+            "expected_spend": expected,
+            "actual_spend": actual,
+            "root_causes": [{
+                "service": service,
+                "region": region,
+                "linked_account": account_id,
+                "usage_type": "",
+            }],
+            "feedback": "",
+            "severity": score,
+            "source": "local",
+        })
+    for a in anomalies:
+        a.pop("_row")
+        a["expected_spend"] = round(a["expected_spend"], 2)
+        a["actual_spend"] = round(a["actual_spend"], 2)
+        a["impact"] = round(a["actual_spend"] - a["expected_spend"], 2)
+        a["severity"] = round(a["severity"], 2)
+    return anomalies
+
+
+def detect_local_anomalies(
+    db: Session,
+    account_ids: Optional[List[str]] = None,
+    days_back: int = 90,
+) -> List[Dict[str, Any]]:
+    """Anomalies in every account x service x region daily series of the local store.
+
+    Uses a rolling median/MAD over the trailing WINDOW_DAYS. Closed days are
+    folded into an incremental state once, so a call only scores days that
+    arrived since the previous one plus the still-open recent days.
+    """
+    now = datetime.now(timezone.utc)
+    today = now.strftime("%Y-%m-%d")
+    closed_end = (now - timedelta(days=_SETTLEMENT_DAYS)).strftime("%Y-%m-%d")
+    since = (now - timedelta(days=days_back)).strftime("%Y-%m-%d")
+
+    with _lock:
+        _advance(db, closed_end)
+        flags = [f for f in _state["flags"] if f[1] >= since]
+        flags += _score_open_days(db, closed_end, today)
+        keys = list(_state["keys"])
+
+    anomalies = _merge_runs(flags, keys)
+    if account_ids:
+        allowed = set(account_ids)
+        anomalies = [a for a in anomalies if a["root_causes"][0]["linked_account"] in allowed]
+    return anomalies
+
+
+def _clear_state():
+    _state.update(
+        keys=[], index={}, window=np.zeros((0, WINDOW_DAYS)), history=np.zeros(0, dtype=np.int64),
+        last_date=None, built_at=None, flags=[],
+    )
+
+
+def reset_local_detector():
+    """Drop the incremental state, e.g. after history was re-ingested."""
+    with _lock:
+        _clear_state()
+
+
+def history_synced(start: str):
+    """Reset the detector if a sync rewrote days from start on that it already folded in."""
+    with _lock:
+        if _state["last_date"] is not None and start < _state["last_date"]:
+            _clear_state()
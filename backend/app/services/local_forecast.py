@@ -0,0 +1,75 @@
+from itertools import product
+from typing import Dict
+import numpy as np
+
+SEASON_LENGTH = 7  # weekly seasonality of daily costs
+DAMPING = 0.98  # damped trend keeps long horizons from running away
+Z_80 = 1.2816  # two-sided 80% interval, matching CE's PredictionIntervalLevel=80
+
+# Smoothing parameter grid searched per series: (alpha, beta, gamma)
+_GRID = np.array(list(product(
+    [0.1, 0.3, 0.5, 0.8],
+    [0.01, 0.05, 0.2],
+    [0.05, 0.2, 0.4],
+)), dtype=np.float64)
+
+
+def holt_winters_forecast(values: np.ndarray, horizon: int) -> Dict[str, np.ndarray]:
+    """Fit additive damped Holt-Winters to every row of a (series x days) matrix.
+
+    All series and every grid combination are updated together: each time
+    step is one set of array operations over a (grid, series) state, so
+    fitting thousands of series costs one pass over the days. The grid
+    combination with the lowest in-sample squared error is chosen per series.
+    Returns mean/lower/upper arrays of shape (series, horizon), clipped at 0.
+    """
+    y = np.asarray(values, dtype=np.float64)
+    n_series, n_days = y.shape
+    m = SEASON_LENGTH
+    if n_days < 2 * m:
+        raise ValueError(f"Need at least {2 * m} days of history, got {n_days}")
+
+    alpha, beta, gamma = (_GRID[:, i][:, None] for i in range(3))
+    n_grid = len(_GRID)
+
+    first = y[:, :m].mean(axis=1)
+    second = y[:, m:2 * m].mean(axis=1)
+    level = np.broadcast_to(first, (n_grid, n_series)).copy()
+    trend = np.broadcast_to((second - first) / m, (n_grid, n_series)).copy()
+    season = np.broadcast_to((y[:, :m] - first[:, None]).T[:, None, :], (m, n_grid, n_series)).copy()
+    sse = np.zeros((n_grid, n_series))
+
+    for t in range(n_days):
+        s = season[t % m]
+        fitted = level + DAMPING * trend + s
+        err = y[:, t] - fitted
+        if t >= m:  # the first season only initialises the state
+            sse += err * err
+        new_level = level + DAMPING * trend + alpha * err
+        trend = DAMPING * trend + beta * (new_level - level - DAMPING * trend)
+        season[t % m] = s + gamma * err
+        level = new_level
+
+    best = np.argmin(sse, axis=0)
+    cols = np.arange(n_series)
+    level, trend = level[best, cols], trend[best, cols]
+    season = season[:, best, cols]  # (m, series)
+    a, b, g = alpha[best, 0], beta[best, 0], gamma[best, 0]
+    sigma = np.sqrt(sse[best, cols] / max(n_days - m, 1))
+
+    steps = np.arange(1, horizon + 1)
+    damp = np.cumsum(DAMPING ** steps)  # sum_{i=1..k} phi^i
+    season_idx = (n_days + steps - 1) % m
+    mean = level[:, None] + trend[:, None] * damp[None, :] + season[season_idx].T
+
+    # h-step variance of additive Holt-Winters: sigma^2 * (1 + sum_{j<h} c_j^2)
+    j = steps[:-1]
+    c = a[:, None] * (1 + j[None, :] * b[:, None]) + g[:, None] * (j[None, :] % m == 0)
+    var_factor = np.concatenate([np.ones((n_series, 1)), 1 + np.cumsum(c * c, axis=1)], axis=1)
+    width = Z_80 * sigma[:, None] * np.sqrt(var_factor)
+
+    return {
+        "mean": np.clip(mean, 0, None),
+        "lower": np.clip(mean - width, 0, None),
+        "upper": np.clip(mean + width, 0, None),
+    }
@@ -1,29 +1,154 @@
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from itertools import product
 from typing import Optional, List, Dict, Any
-from cachetools import TTLCache
+import numpy as np
 from sqlalchemy.orm import Session
-from app.services.aws_client import get_aws_client
+from app.services.aws_client import get_aws_client, throttle, run_concurrently
+from app.metrics import MeteredTTLCache
 
-_hub_cache = TTLCache(maxsize=50, ttl=600)
+logger = logging.getLogger(__name__)
 
+_hub_cache = MeteredTTLCache("optimization_hub", maxsize=200, ttl=600)
+_hub_summary_cache = MeteredTTLCache("optimization_hub_summary", maxsize=50, ttl=600)
+# Cost Explorer refreshes purchase recommendations once a day
+_purchase_rec_cache = MeteredTTLCache("purchase_recommendations", maxsize=500, ttl=86400)
 
-def get_optimization_recommendations(
+SAVINGS_PLANS_TYPES = ["COMPUTE_SP", "EC2_INSTANCE_SP", "SAGEMAKER_SP"]
+TERMS = ["ONE_YEAR", "THREE_YEARS"]
+PAYMENT_OPTIONS = ["NO_UPFRONT", "PARTIAL_UPFRONT", "ALL_UPFRONT"]
+LOOKBACK_PERIODS = ["SEVEN_DAYS", "THIRTY_DAYS", "SIXTY_DAYS"]
+RESERVATION_SERVICES = [
+    "Amazon Elastic Compute Cloud - Compute",
+    "Amazon Relational Database Service",
+    "Amazon ElastiCache",
+    "Amazon OpenSearch Service",
+    "Amazon Redshift",
+]
+
+# Hourly on-demand compute spend used by the commitment simulator
+_usage_cache = MeteredTTLCache("commitment_usage", maxsize=20, ttl=3600)
+
+# Services whose on-demand usage a Compute Savings Plan can cover
+_SP_ELIGIBLE_SERVICES = [
+    "Amazon Elastic Compute Cloud - Compute",
+    "AWS Lambda",
+    "Amazon Elastic Container Service",
+    "Amazon Elastic Kubernetes Service",
+]
+# Cost Explorer only keeps HOURLY granularity for the last 14 days
+_HOURLY_RETENTION_DAYS = 14
+_HOURS_PER_MONTH = 730
+
+# Parallel CE calls per matrix request; the shared rate limiter caps throughput
+_MATRIX_WORKERS = 4
+# Matrix options whose CE call failed, kept so polling clients do not re-issue them
+_matrix_failures = MeteredTTLCache("commitment_matrix_failures", maxsize=500, ttl=900)
+# One background matrix fill per account scope
+_matrix_fills: Dict[bool, threading.Thread] = {}
+_matrix_lock = threading.Lock()
+
+
+def _summarize_recommendations(co, group_by: str, account_ids: Optional[List[str]]) -> Dict[str, Any]:
+    """Server-side aggregation of Cost Optimization Hub recommendations for one dimension."""
+    params = {"groupBy": group_by}
+    if account_ids:
+        params["filter"] = {"accountIds": account_ids}
+
+    groups = {}
+    total_savings = None
+    while True:
+        throttle("cost-optimization-hub")
+        result = co.list_recommendation_summaries(**params)
+        if total_savings is None and result.get("estimatedTotalDedupedSavings") is not None:
+            total_savings = float(result["estimatedTotalDedupedSavings"])
+        for item in result.get("items", []):
+            groups[item.get("group", "Unknown")] = {
+                "savings": float(item.get("estimatedMonthlySavings", 0)),
+                "count": int(item.get("recommendationCount", 0)),
+            }
+        token = result.get("nextToken")
+        if not token:
+            break
+        params["nextToken"] = token
+
+    return {"groups": groups, "deduped_savings": total_savings}
+
+
+def get_optimization_summary(
     db: Session,
     account_ids: Optional[List[str]] = None,
 ) -> Dict[str, Any]:
-    """Get recommendations from AWS Cost Optimization Hub."""
-    cache_key = f"opt_hub:{account_ids}"
+    """Summary cards for Cost Optimization Hub, built from ListRecommendationSummaries.
+
+    The three groupings are fetched in parallel and cached separately from
+    the recommendation pages, so the landing view never scans items.
+    """
+    cache_key = f"opt_hub_summary:{account_ids}"
+    if cache_key in _hub_summary_cache:
+        return _hub_summary_cache[cache_key]
+
+    try:
+        co = get_aws_client("cost-optimization-hub", db, region="us-east-1")
+        by_action, by_resource, by_account = run_concurrently(
+            lambda group_by: _summarize_recommendations(co, group_by, account_ids),
+            ["ActionType", "ResourceType", "AccountId"],
+        )
+    except Exception as e:
+        return {"error": str(e), "summary": {}}
+
+    groups = by_action["groups"]
+    total_savings = by_action["deduped_savings"]
+    if total_savings is None:
+        total_savings = sum(g["savings"] for g in groups.values())
+
+    response = {
+        "summary": {
+            "total_recommendations": sum(g["count"] for g in groups.values()),
+            "total_estimated_monthly_savings": round(total_savings, 2),
+            "by_action_type": {k: round(v["savings"], 2) for k, v in groups.items()},
+            "by_resource_type": {k: round(v["savings"], 2) for k, v in by_resource["groups"].items()},
+            "by_account": {k: round(v["savings"], 2) for k, v in by_account["groups"].items()},
+            "count_by_action_type": {k: v["count"] for k, v in groups.items()},
+            "count_by_resource_type": {k: v["count"] for k, v in by_resource["groups"].items()},
+        },
+    }
+
+    _hub_summary_cache[cache_key] = response
+    return response
+
+
+def list_optimization_recommendations(
+    db: Session,
+    account_ids: Optional[List[str]] = None,
+    next_token: Optional[str] = None,
+    page_size: int = 50,
+    action_type: Optional[str] = None,
+    resource_type: Optional[str] = None,
+) -> Dict[str, Any]:
+    """One page of Cost Optimization Hub recommendations, fetched on drill-in."""
+    cache_key = f"opt_hub:{account_ids}:{next_token}:{page_size}:{action_type}:{resource_type}"
     if cache_key in _hub_cache:
         return _hub_cache[cache_key]
 
     try:
         co = get_aws_client("cost-optimization-hub", db, region="us-east-1")
 
-        params = {"maxResults": 100}
+        params = {"maxResults": page_size}
+        rec_filter = {}
         if account_ids:
-            params["filter"] = {
-                "accountIds": account_ids,
-            }
+            rec_filter["accountIds"] = account_ids
+        if action_type:
+            rec_filter["actionTypes"] = [action_type]
+        if resource_type:
+            rec_filter["resourceTypes"] = [resource_type]
+        if rec_filter:
+            params["filter"] = rec_filter
+        if next_token:
+            params["nextToken"] = next_token
 
+        throttle("cost-optimization-hub")
         result = co.list_recommendations(**params)
         items = result.get("items", [])
 
@@ -31,85 +156,166 @@ def get_optimization_recommendations(
         return {
             "error": str(e),
             "recommendations": [],
-            "summary": {},
+            "next_token": None,
         }
 
     recommendations = []
-    total_savings = 0
-    by_action = {}
-    by_resource_type = {}
-
     for item in items:
-        savings = float(item.get("estimatedMonthlySavings", 0))
-        savings_pct = float(item.get("estimatedSavingsPercentage", 0))
-        action = item.get("actionType", "Unknown")
-        resource_type = item.get("currentResourceType", "Unknown")
-
         recommendations.append({
             "recommendation_id": item.get("recommendationId", ""),
             "resource_id": item.get("resourceId", ""),
-            "resource_type": resource_type,
+            "resource_type": item.get("currentResourceType", "Unknown"),
             "account_id": item.get("accountId", ""),
-            "action_type": action,
-            "estimated_monthly_savings": round(savings, 2),
-            "estimated_savings_percentage": round(savings_pct, 2),
+            "action_type": item.get("actionType", "Unknown"),
+            "estimated_monthly_savings": round(float(item.get("estimatedMonthlySavings", 0)), 2),
+            "estimated_savings_percentage": round(float(item.get("estimatedSavingsPercentage", 0)), 2),
             "description": item.get("recommendationLookbackPeriodInDays", ""),
             "implementation_effort": item.get("implementationEffort", ""),
             "restart_needed": item.get("restartNeeded", False),
             "rollback_possible": item.get("rollbackPossible", False),
         })
 
-        total_savings += savings
-        by_action[action] = by_action.get(action, 0) + savings
-        by_resource_type[resource_type] = by_resource_type.get(resource_type, 0) + savings
-
     response = {
         "recommendations": recommendations,
-        "summary": {
-            "total_recommendations": len(recommendations),
-            "total_estimated_monthly_savings": round(total_savings, 2),
-            "by_action_type": {k: round(v, 2) for k, v in by_action.items()},
-            "by_resource_type": {k: round(v, 2) for k, v in by_resource_type.items()},
-        },
+        "next_token": result.get("nextToken"),
     }
 
     _hub_cache[cache_key] = response
     return response
 
 
-def get_savings_plans_recommendations(
+def get_optimization_recommendations(
     db: Session,
     account_ids: Optional[List[str]] = None,
 ) -> Dict[str, Any]:
-    """Get Savings Plans recommendations."""
-    try:
-        ce = get_aws_client("ce", db)
+    """Get recommendations from AWS Cost Optimization Hub.
 
-        params = {
-            "SavingsPlansType": "COMPUTE_SP",
-            "TermInYears": "ONE_YEAR",
-            "PaymentOption": "NO_UPFRONT",
-            "LookbackPeriodInDays": "SIXTY_DAYS",
-        }
+    Summary figures come from server-side aggregation and cover every
+    recommendation; the first 100 items are included, with ``next_token``
+    for the rest (the dashboard pages through /recommendations/items).
+    """
+    summary = get_optimization_summary(db, account_ids)
+    page = list_optimization_recommendations(db, account_ids, page_size=100)
 
-        if account_ids:
-            params["AccountScope"] = "LINKED"
+    response = {
+        "recommendations": page["recommendations"],
+        "next_token": page.get("next_token"),
+        "summary": summary.get("summary", {}),
+    }
+    error = summary.get("error") or page.get("error")
+    if error:
+        response["error"] = error
+    return response
+
+
+def _option_cache_key(kind: str, combo, linked_scope: bool) -> str:
+    return f"{kind}_rec:{':'.join(combo)}:{linked_scope}"
 
+
+def _fetch_savings_plans_recommendation(
+    ce,
+    plan_type: str,
+    term: str,
+    payment_option: str,
+    lookback: str,
+    linked_scope: bool,
+) -> Dict[str, Any]:
+    """Fetch (all pages of) one Savings Plans purchase recommendation, cached for a day."""
+    cache_key = _option_cache_key("sp", (plan_type, term, payment_option, lookback), linked_scope)
+    if cache_key in _purchase_rec_cache:
+        return _purchase_rec_cache[cache_key]
+
+    params = {
+        "SavingsPlansType": plan_type,
+        "TermInYears": term,
+        "PaymentOption": payment_option,
+        "LookbackPeriodInDays": lookback,
+    }
+    if linked_scope:
+        params["AccountScope"] = "LINKED"
+
+    meta = {}
+    details = []
+    while True:
+        throttle("ce")
         result = ce.get_savings_plans_purchase_recommendation(**params)
-        meta = result.get("SavingsPlansPurchaseRecommendation", {})
-        details = meta.get("SavingsPlansPurchaseRecommendationDetails", [])
+        page = result.get("SavingsPlansPurchaseRecommendation", {})
+        meta = meta or page
+        details.extend(page.get("SavingsPlansPurchaseRecommendationDetails", []))
+        token = result.get("NextPageToken")
+        if not token:
+            break
+        params["NextPageToken"] = token
+
+    response = {
+        "savings_plan_type": meta.get("SavingsPlansType", plan_type),
+        "term": meta.get("TermInYears", term),
+        "payment_option": meta.get("PaymentOption", payment_option),
+        "lookback": meta.get("LookbackPeriodInDays", lookback),
+        "summary": meta.get("SavingsPlansPurchaseRecommendationSummary", {}),
+        "details": details,
+    }
+    _purchase_rec_cache[cache_key] = response
+    return response
+
+
+def _fetch_reservation_recommendation(
+    ce,
+    service: str,
+    term: str,
+    payment_option: str,
+    lookback: str,
+    linked_scope: bool,
+) -> Dict[str, Any]:
+    """Fetch (all pages of) one Reserved Instance purchase recommendation, cached for a day."""
+    cache_key = _option_cache_key("ri", (service, term, payment_option, lookback), linked_scope)
+    if cache_key in _purchase_rec_cache:
+        return _purchase_rec_cache[cache_key]
 
+    params = {
+        "Service": service,
+        "TermInYears": term,
+        "PaymentOption": payment_option,
+        "LookbackPeriodInDays": lookback,
+    }
+    if linked_scope:
+        params["AccountScope"] = "LINKED"
+
+    recs = []
+    while True:
+        throttle("ce")
+        result = ce.get_reservation_purchase_recommendation(**params)
+        recs.extend(result.get("Recommendations", []))
+        token = result.get("NextPageToken")
+        if not token:
+            break
+        params["NextPageToken"] = token
+
+    _purchase_rec_cache[cache_key] = recs
+    return recs
+
+
+def get_savings_plans_recommendations(
+    db: Session,
+    account_ids: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Get Savings Plans recommendations."""
+    try:
+        ce = get_aws_client("ce", db)
+        rec = _fetch_savings_plans_recommendation(
+            ce, "COMPUTE_SP", "ONE_YEAR", "NO_UPFRONT", "SIXTY_DAYS", bool(account_ids),
+        )
     except Exception as e:
         return {"error": str(e), "plans": [], "summary": {}}
 
     plans = []
     total_savings = 0
-    for d in details:
+    for d in rec["details"]:
         est_savings = float(d.get("EstimatedMonthlySavingsAmount", 0))
         plans.append({
-            "savings_plan_type": meta.get("SavingsPlansType", ""),
-            "term": meta.get("TermInYears", ""),
-            "payment_option": meta.get("PaymentOption", ""),
+            "savings_plan_type": rec["savings_plan_type"],
+            "term": rec["term"],
+            "payment_option": rec["payment_option"],
             "account_id": d.get("AccountId", ""),
             "hourly_commitment": float(d.get("HourlyCommitmentToPurchase", 0)),
             "estimated_monthly_savings": round(est_savings, 2),
@@ -136,20 +342,9 @@ def get_reservation_recommendations(
     """Get Reserved Instance recommendations."""
     try:
         ce = get_aws_client("ce", db)
-
-        params = {
-            "Service": service,
-            "TermInYears": "ONE_YEAR",
-            "PaymentOption": "NO_UPFRONT",
-            "LookbackPeriodInDays": "SIXTY_DAYS",
-        }
-
-        if account_ids:
-            params["AccountScope"] = "LINKED"
-
-        result = ce.get_reservation_purchase_recommendation(**params)
-        recs = result.get("Recommendations", [])
-
+        recs = _fetch_reservation_recommendation(
+            ce, service, "ONE_YEAR", "NO_UPFRONT", "SIXTY_DAYS", bool(account_ids),
+        )
     except Exception as e:
         return {"error": str(e), "reservations": [], "summary": {}}
 
@@ -176,3 +371,344 @@ def get_reservation_recommendations(
             "total_estimated_monthly_savings": round(total_savings, 2),
         },
     }
+
+
+def _get_hourly_on_demand_compute_spend(
+    db: Session,
+    days: int,
+    account_ids: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Load hourly on-demand spend of Savings Plan eligible services into an array.
+
+    Windows within CE's 14-day hourly retention are fetched at HOURLY
+    granularity. Longer windows fall back to DAILY data spread evenly
+    across each day's 24 hours, which hides the hour-to-hour variance and
+    overstates utilization; results from them are marked approximate.
+    """
+    cache_key = f"od_hourly:{days}:{account_ids}"
+    if cache_key in _usage_cache:
+        return _usage_cache[cache_key]
+
+    ce = get_aws_client("ce", db)
+
+    now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    hourly = days <= _HOURLY_RETENTION_DAYS
+    if hourly:
+        start = now - timedelta(days=days)
+        time_period = {
+            "Start": start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "End": now.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }
+    else:
+        today = now.replace(hour=0)
+        time_period = {
+            "Start": (today - timedelta(days=days)).strftime("%Y-%m-%d"),
+            "End": today.strftime("%Y-%m-%d"),
+        }
+
+    filters = [
+        {"Dimensions": {"Key": "RECORD_TYPE", "Values": ["Usage"]}},
+        {"Dimensions": {"Key": "PURCHASE_TYPE", "Values": ["On Demand Instances"]}},
+        {"Dimensions": {"Key": "SERVICE", "Values": _SP_ELIGIBLE_SERVICES}},
+    ]
+    if account_ids:
+        filters.append({"Dimensions": {"Key": "LINKED_ACCOUNT", "Values": account_ids}})
+
+    params = {
+        "TimePeriod": time_period,
+        "Granularity": "HOURLY" if hourly else "DAILY",
+        "Metrics": ["UnblendedCost"],
+        "Filter": {"And": filters},
+    }
+
+    amounts = []
+    while True:
+        throttle("ce")
+        result = ce.get_cost_and_usage(**params)
+        for period in result.get("ResultsByTime", []):
+            amounts.append(float(period["Total"]["UnblendedCost"]["Amount"]))
+        token = result.get("NextPageToken")
+        if not token:
+            break
+        params["NextPageToken"] = token
+
+    usage = np.asarray(amounts, dtype=np.float64)
+    if not hourly:
+        usage = np.repeat(usage / 24.0, 24)
+
+    response = {"usage": usage, "granularity": params["Granularity"], "period": time_period}
+    _usage_cache[cache_key] = response
+    return response
+
+
+def simulate_commitment_curve(
+    hourly_on_demand: np.ndarray,
+    discount_rate: float,
+    levels: int = 500,
+) -> Dict[str, np.ndarray]:
+    """Evaluate a sweep of hourly Savings Plan commitments in one vectorized pass.
+
+    A commitment of c $/hour at discount d covers up to c / (1 - d) of
+    on-demand spend in each hour; anything above that stays on-demand and
+    unused commitment is still paid. Sorting the usage once and using its
+    prefix sums gives sum(min(usage, cap)) for every level via searchsorted,
+    so a sweep costs O(H log H + K log H) instead of a K x H matrix.
+    """
+    usage = np.asarray(hourly_on_demand, dtype=np.float64)
+    hours = usage.size
+    rate = 1.0 - discount_rate
+
+    commitments = np.linspace(0.0, usage.max() * rate if hours else 0.0, levels)
+    caps = commitments / rate
+
+    sorted_usage = np.sort(usage)
+    prefix = np.concatenate(([0.0], np.cumsum(sorted_usage)))
+    below = np.searchsorted(sorted_usage, caps, side="right")
+    covered_on_demand = prefix[below] + caps * (hours - below)
+
+    on_demand_total = prefix[-1]
+    commitment_total = commitments * hours
+    net_cost = commitment_total + (on_demand_total - covered_on_demand)
+    savings = on_demand_total - net_cost
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        utilization = np.where(commitment_total > 0, covered_on_demand * rate / commitment_total, 1.0)
+        coverage = covered_on_demand / on_demand_total if on_demand_total > 0 else np.zeros_like(caps)
+
+    return {
+        "commitments": commitments,
+        "coverage": coverage,
+        "utilization": utilization,
+        "savings": savings,
+        "net_cost": net_cost,
+        "on_demand_total": on_demand_total,
+        "hours": hours,
+    }
+
+
+def simulate_savings_plan_commitments(
+    db: Session,
+    days: int = _HOURLY_RETENTION_DAYS,
+    discount_rate: float = 0.25,
+    levels: int = 500,
+    account_ids: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """What-if curve of coverage, utilization and savings across commitment levels.
+
+    discount_rate is the Savings Plan rate discount versus on-demand for the
+    plan being modelled; use the rate from your pricing or from a CE
+    recommendation for the plan type and term of interest. The default
+    window is the 14 days CE keeps at hourly granularity; longer windows
+    are approximate (see _get_hourly_on_demand_compute_spend).
+    """
+    try:
+        usage_data = _get_hourly_on_demand_compute_spend(db, days, account_ids)
+    except Exception as e:
+        return {"error": str(e), "curve": [], "summary": {}}
+
+    usage = usage_data["usage"]
+    approximate = usage_data["granularity"] != "HOURLY"
+    if usage.size == 0 or usage.max() <= 0:
+        return {"curve": [], "summary": {
+            "granularity": usage_data["granularity"], "approximate": approximate,
+            "hours": int(usage.size), "on_demand_total": 0.0,
+        }}
+
+    sim = simulate_commitment_curve(usage, discount_rate, levels)
+    commitments = sim["commitments"]
+    savings = sim["savings"]
+    scale = _HOURS_PER_MONTH / sim["hours"]
+
+    best = int(np.argmax(savings))
+    # Highest commitment that still does not lose money over the window
+    profitable = np.nonzero(savings >= 0)[0]
+    break_even = float(commitments[profitable[-1]]) if profitable.size else 0.0
+
+    curve = [
+        {
+            "hourly_commitment": round(float(c), 4),
+            "coverage_percentage": round(float(cov) * 100, 2),
+            "utilization_percentage": round(float(util) * 100, 2),
+            "estimated_monthly_savings": round(float(s) * scale, 2),
+        }
+        for c, cov, util, s in zip(commitments, sim["coverage"], sim["utilization"], savings)
+    ]
+
+    return {
+        "curve": curve,
+        "summary": {
+            "granularity": usage_data["granularity"],
+            # DAILY spend spread over the hours: utilization is overstated
+            "approximate": approximate,
+            "period": usage_data["period"],
+            "hours": int(sim["hours"]),
+            "discount_rate": discount_rate,
+            "average_hourly_on_demand": round(float(usage.mean()), 4),
+            "on_demand_total": round(float(sim["on_demand_total"]), 2),
+            "optimal_hourly_commitment": round(float(commitments[best]), 4),
+            "optimal_estimated_monthly_savings": round(float(savings[best]) * scale, 2),
+            "optimal_utilization_percentage": round(float(sim["utilization"][best]) * 100, 2),
+            "optimal_coverage_percentage": round(float(sim["coverage"][best]) * 100, 2),
+            "break_even_hourly_commitment": round(break_even, 4),
+            # Below this utilization a commitment costs more than on-demand
+            "break_even_utilization_percentage": round((1 - discount_rate) * 100, 2),
+        },
+    }
+
+
+def _matrix_jobs():
+    sp_combos = product(SAVINGS_PLANS_TYPES, TERMS, PAYMENT_OPTIONS, LOOKBACK_PERIODS)
+    ri_combos = product(RESERVATION_SERVICES, TERMS, PAYMENT_OPTIONS, LOOKBACK_PERIODS)
+    return [("sp", c) for c in sp_combos] + [("ri", c) for c in ri_combos]
+
+
+def fill_commitment_matrix(ce, linked_scope: bool) -> int:
+    """Fetch every matrix option that is neither cached nor recently failed.
+
+    Runs the CE calls concurrently under the CE rate limiter and returns how
+    many were made. Failures are remembered for a while so the next fill
+    (or a polling client) does not retry them straight away.
+    """
+    missing = [
+        job for job in _matrix_jobs()
+        if _option_cache_key(*job, linked_scope) not in _purchase_rec_cache
+        and _option_cache_key(*job, linked_scope) not in _matrix_failures
+    ]
+
+    def fetch(job):
+        kind, combo = job
+        try:
+            if kind == "sp":
+                _fetch_savings_plans_recommendation(ce, *combo, linked_scope)
+            else:
+                _fetch_reservation_recommendation(ce, *combo, linked_scope)
+        except Exception as e:
+            _matrix_failures[_option_cache_key(kind, combo, linked_scope)] = str(e)
+
+    run_concurrently(fetch, missing, max_workers=_MATRIX_WORKERS)
+    return len(missing)
+
+
+def _start_matrix_fill(ce, linked_scope: bool):
+    """Start a background fill for this scope unless one is already running."""
+    with _matrix_lock:
+        running = _matrix_fills.get(linked_scope)
+        if running is not None and running.is_alive():
+            return
+
+        def fill():
+            try:
+                fill_commitment_matrix(ce, linked_scope)
+            except Exception:
+                logger.exception("Commitment matrix fill failed")
+
+        thread = threading.Thread(target=fill, name="commitment-matrix", daemon=True)
+        _matrix_fills[linked_scope] = thread
+        thread.start()
+
+
+def get_commitment_recommendation_matrix(
+    db: Session,
+    account_ids: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Compare every Savings Plans and Reserved Instance purchase option side by side.
+
+    Each (plan type | service, term, payment option, lookback) combination is
+    one Cost Explorer call, cached for a day. The request never makes those
+    calls itself: options not cached yet are fetched by a background fill and
+    the response holds what is ready so far, with "pending" set until the
+    matrix is complete.
+    """
+    linked_scope = bool(account_ids)
+    cache_key = f"commitment_matrix:{linked_scope}"
+    if cache_key in _purchase_rec_cache:
+        return _purchase_rec_cache[cache_key]
+
+    try:
+        ce = get_aws_client("ce", db)
+    except Exception as e:
+        return {"error": str(e), "savings_plans": [], "reservations": [], "summary": {}}
+
+    jobs = _matrix_jobs()
+    errors = []
+    missing = 0
+    savings_plans = []
+    reservations = []
+    for kind, combo in jobs:
+        option_key = _option_cache_key(kind, combo, linked_scope)
+        if option_key in _matrix_failures:
+            errors.append({"option": "/".join(combo), "error": _matrix_failures[option_key]})
+            continue
+        if option_key not in _purchase_rec_cache:
+            missing += 1
+            continue
+        result = _purchase_rec_cache[option_key]
+
+        if kind == "sp":
+            plan_type, term, payment_option, lookback = combo
+            summary = result["summary"]
+            if not summary:
+                continue
+            savings_plans.append({
+                "savings_plan_type": plan_type,
+                "term": term,
+                "payment_option": payment_option,
+                "lookback": lookback,
+                "hourly_commitment": float(summary.get("HourlyCommitmentToPurchase", 0)),
+                "estimated_monthly_savings": round(float(summary.get("EstimatedMonthlySavingsAmount", 0)), 2),
+                "estimated_savings_percentage": float(summary.get("EstimatedSavingsPercentage", 0)),
+                "estimated_roi": float(summary.get("EstimatedROI", 0)),
+                "estimated_total_cost": round(float(summary.get("EstimatedTotalCost", 0)), 2),
+                "current_on_demand_spend": round(float(summary.get("CurrentOnDemandSpend", 0)), 2),
+                "upfront_cost": round(sum(float(d.get("UpfrontCost", 0)) for d in result["details"]), 2),
+                "recommendation_count": int(summary.get("TotalRecommendationCount", 0)),
+            })
+        else:
+            service, term, payment_option, lookback = combo
+            monthly_savings = 0.0
+            upfront = 0.0
+            recurring = 0.0
+            count = 0
+            for rec in result:
+                monthly_savings += float(
+                    rec.get("RecommendationSummary", {}).get("TotalEstimatedMonthlySavingsAmount", 0)
+                )
+                for d in rec.get("RecommendationDetails", []):
+                    upfront += float(d.get("UpfrontCost", 0))
+                    recurring += float(d.get("RecurringStandardMonthlyCost", 0))
+                    count += 1
+            if not count:
+                continue
+            reservations.append({
+                "service": service,
+                "term": term,
+                "payment_option": payment_option,
+                "lookback": lookback,
+                "estimated_monthly_savings": round(monthly_savings, 2),
+                "upfront_cost": round(upfront, 2),
+                "recurring_monthly_cost": round(recurring, 2),
+                "recommendation_count": count,
+            })
+
+    savings_plans.sort(key=lambda r: r["estimated_monthly_savings"], reverse=True)
+    reservations.sort(key=lambda r: r["estimated_monthly_savings"], reverse=True)
+
+    response = {
+        "savings_plans": savings_plans,
+        "reservations": reservations,
+        "summary": {
+            "options_evaluated": len(jobs) - missing,
+            "options_total": len(jobs),
+            "best_savings_plan": savings_plans[0] if savings_plans else None,
+            "best_reservation": reservations[0] if reservations else None,
+        },
+        "errors": errors,
+        "pending": missing > 0,
+    }
+
+    if missing:
+        _start_matrix_fill(ce, linked_scope)
+    # Don't pin a partial or partially failed matrix for a whole day
+    elif not errors:
+        _purchase_rec_cache[cache_key] = response
+    return response
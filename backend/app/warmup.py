@@ -0,0 +1,102 @@
+"""Startup warmup: pre-load botocore service models and build AWS clients.
+
+The first Cost Explorer / Compute Optimizer / Optimization Hub call in a
+fresh process otherwise pays for parsing the service model JSON and building
+the client. Warmup runs on a background thread after startup; /api/ready
+reports 503 until it has finished so Kubernetes only routes traffic to warm
+pods, while /api/health (liveness) answers immediately.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+from app.config import settings
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# (service, region override) pairs as used by app.services
+WARM_SERVICES = [
+    ("ce", None),
+    ("compute-optimizer", None),
+    ("cost-optimization-hub", "us-east-1"),
+]
+
+_state: Dict[str, Any] = {
+    "ready": False,
+    "started_at": None,
+    "completed_at": None,
+    "duration_ms": None,
+    "models_loaded": [],
+    "clients_created": 0,
+    "errors": [],
+}
+_lock = threading.Lock()
+
+
+def _load_models():
+    from app.services.aws_client import shared_loader
+
+    loader = shared_loader()
+    loader.load_data("endpoints")
+    for service, _ in WARM_SERVICES + [("sts", None)]:
+        loader.load_service_model(service, "service-2")
+        try:
+            loader.load_service_model(service, "paginators-1")
+        except Exception:
+            pass  # not every service ships paginators
+        _state["models_loaded"].append(service)
+
+
+def _create_clients() -> int:
+    from app.services.aws_client import get_aws_client, _accounts
+
+    created = 0
+    db = SessionLocal()
+    try:
+        # Includes the default (root) account most services call without an account_id;
+        # its clients share the same cache key.
+        accounts = [a for a in _accounts(db).values() if a.is_active]
+        for account in accounts:
+            for service, region in WARM_SERVICES:
+                try:
+                    get_aws_client(service, db, account.id, region)
+                    created += 1
+                except Exception as e:
+                    _state["errors"].append(f"{service}/{account.account_id}: {e}")
+    finally:
+        db.close()
+    return created
+
+
+def warm_up():
+    started = time.perf_counter()
+    with _lock:
+        _state["started_at"] = datetime.now(timezone.utc).isoformat()
+    try:
+        _load_models()
+        _state["clients_created"] = _create_clients()
+    except Exception as e:
+        # A warmup failure should not keep the pod out of rotation forever;
+        # requests will simply build what they need on demand.
+        logger.exception("Warmup failed")
+        _state["errors"].append(str(e))
+    finally:
+        with _lock:
+            _state["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            _state["completed_at"] = datetime.now(timezone.utc).isoformat()
+            _state["ready"] = True
+
+
+def start_warmup():
+    if not settings.WARMUP_ENABLED:
+        _state["ready"] = True
+        return
+    threading.Thread(target=warm_up, name="warmup", daemon=True).start()
+
+
+def warmup_status() -> Dict[str, Any]:
+    with _lock:
+        return dict(_state)
@@ -0,0 +1 @@
+"""Service-layer benchmarks with synthetic AWS payloads; see run.py."""
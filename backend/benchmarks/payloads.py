@@ -0,0 +1,437 @@
+"""Synthetic AWS API responses shaped like the real ones (they pass botocore's
+Stubber validation), generated deterministically from a seed.
+
+Sizes follow a Scale: number of linked accounts, days of history, distinct
+group keys (usage types, tagged resources) and recommendations per account.
+"""
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+START_DATE = date(2024, 1, 1)
+
+
+@dataclass(frozen=True)
+class Scale:
+    name: str
+    accounts: int
+    days: int
+    groups: int
+    recs_per_account: int
+
+
+SCALES = {
+    "small": Scale("small", accounts=10, days=30, groups=200, recs_per_account=5),
+    "medium": Scale("medium", accounts=100, days=180, groups=2000, recs_per_account=5),
+    "large": Scale("large", accounts=1000, days=400, groups=5000, recs_per_account=5),
+}
+
+SERVICES = [
+    "Amazon Elastic Compute Cloud - Compute", "Amazon Simple Storage Service",
+    "Amazon Relational Database Service", "AWS Lambda", "Amazon CloudWatch",
+    "Amazon Elastic Container Service", "Amazon Elastic Kubernetes Service",
+    "Amazon DynamoDB", "Amazon ElastiCache", "Amazon OpenSearch Service",
+    "Amazon Redshift", "Amazon Virtual Private Cloud", "Amazon CloudFront",
+    "AWS Key Management Service", "Amazon Simple Queue Service", "Amazon Route 53",
+    "EC2 - Other", "Amazon Elastic File System", "AWS Glue", "Amazon Athena",
+]
+REGIONS = [
+    "us-east-1", "us-east-2", "us-west-1", "us-west-2", "ca-central-1", "sa-east-1",
+    "eu-west-1", "eu-west-2", "eu-west-3", "eu-central-1", "eu-north-1", "eu-south-1",
+    "ap-south-1", "ap-southeast-1", "ap-southeast-2", "ap-northeast-1", "ap-northeast-2",
+    "ap-northeast-3", "me-south-1", "af-south-1", "global",
+]
+INSTANCE_TYPES = [
+    f"{family}.{size}"
+    for family in ("m5", "m6i", "m7g", "c5", "c6i", "c7g", "r5", "r6i", "t3", "t4g")
+    for size in ("large", "xlarge", "2xlarge", "4xlarge", "8xlarge")
+]
+FINDINGS_EC2 = ["Overprovisioned", "Underprovisioned", "Optimized"]
+FINDINGS_UPPER = ["OVER_PROVISIONED", "UNDER_PROVISIONED", "OPTIMIZED"]
+
+
+def account_ids(n: int) -> List[str]:
+    return [f"{100000000000 + i * 7919:012d}" for i in range(n)]
+
+
+def _money(rng: random.Random, scale: float) -> str:
+    return f"{rng.lognormvariate(0, 1) * scale:.10f}"
+
+
+def _period(start: date, days: int) -> Dict[str, str]:
+    return {"Start": start.isoformat(), "End": (start + timedelta(days=days)).isoformat()}
+
+
+def _months(days: int) -> List[Dict[str, str]]:
+    periods = []
+    current = START_DATE
+    end = START_DATE + timedelta(days=days)
+    while current < end:
+        following = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+        periods.append({"Start": current.isoformat(), "End": min(following, end).isoformat()})
+        current = following
+    return periods
+
+
+# Cost Explorer
+
+def daily_costs(rng: random.Random, days: int) -> Dict[str, Any]:
+    """GetCostAndUsage, DAILY, ungrouped."""
+    return {
+        "ResultsByTime": [
+            {
+                "TimePeriod": _period(START_DATE + timedelta(days=i), 1),
+                "Total": {"UnblendedCost": {"Amount": _money(rng, 1500), "Unit": "USD"}},
+                "Groups": [],
+                "Estimated": False,
+            }
+            for i in range(days)
+        ],
+        "DimensionValueAttributes": [],
+    }
+
+
+def monthly_totals(rng: random.Random, months: int = 1) -> Dict[str, Any]:
+    """GetCostAndUsage, MONTHLY, ungrouped."""
+    return {
+        "ResultsByTime": [
+            {
+                "TimePeriod": period,
+                "Total": {"UnblendedCost": {"Amount": _money(rng, 40000), "Unit": "USD"}},
+                "Groups": [],
+                "Estimated": False,
+            }
+            for period in _months(months * 30)
+        ],
+        "DimensionValueAttributes": [],
+    }
+
+
+def grouped_costs(rng: random.Random, days: int, keys: List[List[str]]) -> Dict[str, Any]:
+    """GetCostAndUsage, MONTHLY, one group per entry of keys in every month."""
+    return {
+        "ResultsByTime": [
+            {
+                "TimePeriod": period,
+                "Total": {},
+                "Groups": [
+                    {"Keys": k, "Metrics": {"UnblendedCost": {"Amount": _money(rng, 50), "Unit": "USD"}}}
+                    for k in keys
+                ],
+                "Estimated": False,
+            }
+            for period in _months(days)
+        ],
+        "DimensionValueAttributes": [],
+    }
+
+
+def service_keys(scale: Scale) -> List[List[str]]:
+    return [[s] for s in SERVICES]
+
+
+def region_keys(scale: Scale) -> List[List[str]]:
+    return [[r] for r in REGIONS]
+
+
+def account_keys(scale: Scale) -> List[List[str]]:
+    return [[a] for a in account_ids(scale.accounts)]
+
+
+def usage_type_keys(scale: Scale) -> List[List[str]]:
+    return [[f"{REGIONS[i % len(REGIONS)].upper()[:4]}-BoxUsage:{INSTANCE_TYPES[i % len(INSTANCE_TYPES)]}-{i}"]
+            for i in range(scale.groups)]
+
+
+def resource_keys(scale: Scale) -> List[List[str]]:
+    # SERVICE x TAG:Name; a share of spend is untagged ("Name$")
+    return [[SERVICES[i % len(SERVICES)], f"Name$app-{i}" if i % 10 else "Name$"] for i in range(scale.groups)]
+
+
+def hourly_on_demand(rng: random.Random, days: int, page_size: int = 100) -> List[Dict[str, Any]]:
+    """Paged GetCostAndUsage (DAILY) for the commitment simulator."""
+    response = daily_costs(rng, days)
+    periods = response["ResultsByTime"]
+    pages = []
+    for i in range(0, len(periods), page_size):
+        page = {"ResultsByTime": periods[i:i + page_size], "DimensionValueAttributes": []}
+        if i + page_size < len(periods):
+            page["NextPageToken"] = f"page-{i + page_size}"
+        pages.append(page)
+    return pages
+
+
+# Compute Optimizer
+
+def _savings(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "savingsOpportunityPercentage": rng.uniform(5, 60),
+        "estimatedMonthlySavings": {"currency": "USD", "value": rng.uniform(1, 400)},
+    }
+
+
+def ec2_recommendations(rng: random.Random, scale: Scale) -> Dict[str, Any]:
+    recs = []
+    for account in account_ids(scale.accounts):
+        for i in range(scale.recs_per_account):
+            options = [
+                {
+                    "instanceType": rng.choice(INSTANCE_TYPES),
+                    "projectedUtilizationMetrics": [{"name": "CPU", "statistic": "MAXIMUM", "value": rng.uniform(5, 95)}],
+                    "performanceRisk": float(rng.randint(0, 3)),
+                    "rank": rank,
+                    "savingsOpportunity": _savings(rng),
+                    "migrationEffort": rng.choice(["VeryLow", "Low", "Medium"]),
+                }
+                for rank in (1, 2, 3)
+            ]
+            recs.append({
+                "instanceArn": f"arn:aws:ec2:us-east-1:{account}:instance/i-{rng.getrandbits(64):016x}",
+                "accountId": account,
+                "instanceName": f"web-{i}",
+                "currentInstanceType": rng.choice(INSTANCE_TYPES),
+                "finding": rng.choice(FINDINGS_EC2),
+                "utilizationMetrics": [{"name": "CPU", "statistic": "MAXIMUM", "value": rng.uniform(1, 100)}],
+                "lookBackPeriodInDays": 14.0,
+                "recommendationOptions": options,
+            })
+    return {"instanceRecommendations": recs, "errors": []}
+
+
+def ebs_recommendations(rng: random.Random, scale: Scale) -> Dict[str, Any]:
+    recs = []
+    for account in account_ids(scale.accounts):
+        for _ in range(scale.recs_per_account):
+            recs.append({
+                "volumeArn": f"arn:aws:ec2:us-east-1:{account}:volume/vol-{rng.getrandbits(64):016x}",
+                "accountId": account,
+                "currentConfiguration": {"volumeType": "gp2", "volumeSize": rng.choice([50, 100, 500]), "volumeBaselineIOPS": 300},
+                "finding": rng.choice(["NotOptimized", "Optimized"]),
+                "volumeRecommendationOptions": [{
+                    "configuration": {"volumeType": "gp3", "volumeSize": 100, "volumeBaselineIOPS": 3000},
+                    "performanceRisk": 0.0,
+                    "rank": 1,
+                    "savingsOpportunity": _savings(rng),
+                }],
+            })
+    return {"volumeRecommendations": recs, "errors": []}
+
+
+def lambda_recommendations(rng: random.Random, scale: Scale) -> Dict[str, Any]:
+    recs = []
+    for account in account_ids(scale.accounts):
+        for i in range(scale.recs_per_account):
+            recs.append({
+                "functionArn": f"arn:aws:lambda:us-east-1:{account}:function:handler-{i}",
+                "functionVersion": "$LATEST",
+                "accountId": account,
+                "currentMemorySize": rng.choice([512, 1024, 2048]),
+                "finding": rng.choice(FINDINGS_EC2),
+                "memorySizeRecommendationOptions": [{
+                    "rank": 1, "memorySize": rng.choice([256, 768, 3008]), "savingsOpportunity": _savings(rng),
+                }],
+            })
+    return {"lambdaFunctionRecommendations": recs}
+
+
+def asg_recommendations(rng: random.Random, scale: Scale) -> Dict[str, Any]:
+    recs = []
+    for account in account_ids(scale.accounts):
+        recs.append({
+            "accountId": account,
+            "autoScalingGroupArn": f"arn:aws:autoscaling:us-east-1:{account}:autoScalingGroup:x:autoScalingGroupName/asg-1",
+            "autoScalingGroupName": "asg-1",
+            "finding": rng.choice(FINDINGS_EC2),
+            "currentConfiguration": {"desiredCapacity": 4, "minSize": 2, "maxSize": 8, "instanceType": rng.choice(INSTANCE_TYPES)},
+            "recommendationOptions": [{
+                "configuration": {"desiredCapacity": 3, "minSize": 2, "maxSize": 6, "instanceType": rng.choice(INSTANCE_TYPES)},
+                "performanceRisk": 1.0, "rank": 1, "savingsOpportunity": _savings(rng), "migrationEffort": "Low",
+            }],
+        })
+    return {"autoScalingGroupRecommendations": recs, "errors": []}
+
+
+def ecs_recommendations(rng: random.Random, scale: Scale) -> Dict[str, Any]:
+    recs = []
+    for account in account_ids(scale.accounts):
+        for i in range(scale.recs_per_account):
+            recs.append({
+                "serviceArn": f"arn:aws:ecs:us-east-1:{account}:service/cluster/svc-{i}",
+                "accountId": account,
+                "currentServiceConfiguration": {"memory": 2048, "cpu": 1024},
+                "launchType": "Fargate",
+                "finding": rng.choice(["Overprovisioned", "Underprovisioned", "Optimized"]),
+                "serviceRecommendationOptions": [{"memory": 1024, "cpu": 512, "savingsOpportunity": _savings(rng)}],
+            })
+    return {"ecsServiceRecommendations": recs, "errors": []}
+
+
+# Cost Optimization Hub
+
+ACTION_TYPES = ["Rightsize", "Stop", "Upgrade", "PurchaseSavingsPlans", "PurchaseReservedInstances", "MigrateToGraviton", "Delete"]
+RESOURCE_TYPES = ["Ec2Instance", "LambdaFunction", "EbsVolume", "EcsService", "Ec2AutoScalingGroup", "RdsDbInstance", "ComputeSavingsPlans"]
+
+
+def recommendation_summaries(rng: random.Random, groups: List[str], page_size: int = 100) -> List[Dict[str, Any]]:
+    """Paged ListRecommendationSummaries for one grouping."""
+    pages = []
+    for i in range(0, len(groups), page_size):
+        page = {
+            "items": [
+                {"group": g, "estimatedMonthlySavings": rng.uniform(10, 5000), "recommendationCount": rng.randint(1, 200)}
+                for g in groups[i:i + page_size]
+            ],
+            "currencyCode": "USD",
+        }
+        if i == 0:
+            page["estimatedTotalDedupedSavings"] = rng.uniform(1000, 100000)
+        if i + page_size < len(groups):
+            page["nextToken"] = f"page-{i + page_size}"
+        pages.append(page)
+    return pages
+
+
+def hub_recommendations(rng: random.Random, scale: Scale, page_size: int) -> Dict[str, Any]:
+    accounts = account_ids(scale.accounts)
+    return {
+        "items": [
+            {
+                "recommendationId": f"rec-{rng.getrandbits(64):016x}",
+                "accountId": rng.choice(accounts),
+                "region": rng.choice(REGIONS[:-1]),
+                "resourceId": f"i-{rng.getrandbits(64):016x}",
+                "currentResourceType": rng.choice(RESOURCE_TYPES),
+                "recommendedResourceType": rng.choice(RESOURCE_TYPES),
+                "estimatedMonthlySavings": rng.uniform(1, 900),
+                "estimatedSavingsPercentage": rng.uniform(5, 80),
+                "estimatedMonthlyCost": rng.uniform(10, 3000),
+                "currencyCode": "USD",
+                "implementationEffort": rng.choice(["VeryLow", "Low", "Medium", "High"]),
+                "restartNeeded": rng.random() < 0.5,
+                "actionType": rng.choice(ACTION_TYPES),
+                "rollbackPossible": rng.random() < 0.8,
+                "recommendationLookbackPeriodInDays": 14,
+                "source": "ComputeOptimizer",
+            }
+            for _ in range(page_size)
+        ],
+        "nextToken": "next",
+    }
+
+
+def savings_plans_recommendation(
+    rng: random.Random, scale: Scale, plan_type: str = "COMPUTE_SP", page_size: int = 100,
+) -> List[Dict[str, Any]]:
+    """Paged GetSavingsPlansPurchaseRecommendation, one detail per linked account."""
+    details = [
+        {
+            "SavingsPlansDetails": {"Region": "us-east-1", "InstanceFamily": "m5", "OfferingId": "offering"},
+            "AccountId": account,
+            "UpfrontCost": _money(rng, 100),
+            "EstimatedROI": _money(rng, 30),
+            "CurrencyCode": "USD",
+            "EstimatedSPCost": _money(rng, 800),
+            "EstimatedOnDemandCost": _money(rng, 1100),
+            "EstimatedSavingsAmount": _money(rng, 300),
+            "EstimatedSavingsPercentage": _money(rng, 25),
+            "HourlyCommitmentToPurchase": _money(rng, 1.5),
+            "EstimatedAverageUtilization": _money(rng, 90),
+            "EstimatedMonthlySavingsAmount": _money(rng, 300),
+            "CurrentAverageHourlyOnDemandSpend": _money(rng, 2),
+        }
+        for account in account_ids(scale.accounts)
+    ]
+    summary = {
+        "EstimatedROI": _money(rng, 30), "CurrencyCode": "USD", "EstimatedTotalCost": _money(rng, 50000),
+        "CurrentOnDemandSpend": _money(rng, 60000), "EstimatedSavingsAmount": _money(rng, 10000),
+        "TotalRecommendationCount": str(len(details)), "HourlyCommitmentToPurchase": _money(rng, 40),
+        "EstimatedSavingsPercentage": _money(rng, 25), "EstimatedMonthlySavingsAmount": _money(rng, 10000),
+    }
+    pages = []
+    for i in range(0, max(len(details), 1), page_size):
+        page = {
+            "SavingsPlansPurchaseRecommendation": {
+                "SavingsPlansType": plan_type, "TermInYears": "ONE_YEAR", "PaymentOption": "NO_UPFRONT",
+                "LookbackPeriodInDays": "SIXTY_DAYS",
+                "SavingsPlansPurchaseRecommendationDetails": details[i:i + page_size],
+                "SavingsPlansPurchaseRecommendationSummary": summary,
+            },
+        }
+        if i + page_size < len(details):
+            page["NextPageToken"] = f"page-{i + page_size}"
+        pages.append(page)
+    return pages
+
+
+def reservation_recommendation(rng: random.Random, scale: Scale, page_size: int = 100) -> List[Dict[str, Any]]:
+    """Paged GetReservationPurchaseRecommendation, one detail per linked account."""
+    details = [
+        {
+            "AccountId": account,
+            "InstanceDetails": {"EC2InstanceDetails": {
+                "Family": "m5", "InstanceType": rng.choice(INSTANCE_TYPES), "Region": "us-east-1",
+                "Platform": "Linux/UNIX", "Tenancy": "shared", "CurrentGeneration": True, "SizeFlexEligible": True,
+            }},
+            "RecommendedNumberOfInstancesToPurchase": str(rng.randint(1, 20)),
+            "EstimatedMonthlySavingsAmount": _money(rng, 200),
+            "UpfrontCost": _money(rng, 500),
+            "RecurringStandardMonthlyCost": _money(rng, 300),
+            "CurrencyCode": "USD",
+        }
+        for account in account_ids(scale.accounts)
+    ]
+    pages = []
+    for i in range(0, max(len(details), 1), page_size):
+        page = {
+            "Recommendations": [{
+                "AccountScope": "PAYER", "LookbackPeriodInDays": "SIXTY_DAYS", "TermInYears": "ONE_YEAR",
+                "PaymentOption": "NO_UPFRONT",
+                "RecommendationDetails": details[i:i + page_size],
+                "RecommendationSummary": {"TotalEstimatedMonthlySavingsAmount": _money(rng, 5000), "CurrencyCode": "USD"},
+            }],
+        }
+        if i + page_size < len(details):
+            page["NextPageToken"] = f"page-{i + page_size}"
+        pages.append(page)
+    return pages
+
+
+# Cost Anomaly Detection
+
+def anomalies(rng: random.Random, scale: Scale, start: str, end: str, count: int, page_size: int = 100,
+              monitor_arn: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Paged GetAnomalies for one date window."""
+    first = date.fromisoformat(start)
+    span = max((date.fromisoformat(end) - first).days, 1)
+    accounts = account_ids(scale.accounts)
+    monitor_arn = monitor_arn or "arn:aws:ce::123456789012:anomalymonitor/benchmark"
+    items = []
+    for _ in range(count):
+        day = first + timedelta(days=rng.randrange(span))
+        expected = rng.uniform(10, 500)
+        items.append({
+            "AnomalyId": f"anomaly-{rng.getrandbits(64):016x}",
+            "AnomalyStartDate": day.isoformat(),
+            "AnomalyEndDate": (day + timedelta(days=rng.randint(0, 2))).isoformat(),
+            "DimensionValue": rng.choice(SERVICES),
+            "RootCauses": [
+                {"Service": rng.choice(SERVICES), "Region": rng.choice(REGIONS), "LinkedAccount": rng.choice(accounts),
+                 "UsageType": f"USE1-BoxUsage:{rng.choice(INSTANCE_TYPES)}"}
+                for _ in range(rng.randint(1, 3))
+            ],
+            "AnomalyScore": {"MaxScore": rng.uniform(0, 1), "CurrentScore": rng.uniform(0, 1)},
+            "Impact": {
+                "MaxImpact": rng.uniform(10, 500),
+                "TotalActualSpend": expected + rng.uniform(10, 500),
+                "TotalExpectedSpend": expected,
+            },
+            "MonitorArn": monitor_arn,
+        })
+    pages = []
+    for i in range(0, max(count, 1), page_size):
+        page = {"Anomalies": items[i:i + page_size]}
+        if i + page_size < count:
+            page["NextPageToken"] = f"page-{i + page_size}"
+        pages.append(page)
+    return pages
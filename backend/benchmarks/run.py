@@ -0,0 +1,354 @@
+"""Service-layer benchmarks against synthetic AWS payloads.
+
+Each case queues realistic responses (see payloads.py) on the brokered boto3
+clients with botocore's Stubber, then times the service function that parses
+and aggregates them: wall time over several repeats, plus peak Python
+allocations from one tracemalloc run. Caches are cleared before every run,
+the per-service rate limiters are disabled and fan-outs run sequentially, so
+the numbers reflect parsing/aggregation cost rather than throttling or
+thread scheduling.
+
+    cd backend
+    python -m benchmarks.run                                  # all cases, small + medium
+    python -m benchmarks.run --scales large --cases cost_ hub_
+    python -m benchmarks.run --output base.json
+    python -m benchmarks.run --compare base.json --threshold 1.25   # exit 1 on regressions
+
+The app runs against a throwaway SQLite database holding one fake account;
+nothing is sent to AWS.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+
+# (service, operation, response) queued in call order
+Calls = List[Tuple[str, str, Dict[str, Any]]]
+
+
+@dataclass
+class Case:
+    name: str
+    module: str
+    calls: Callable[[random.Random, Any], Calls]
+    run: Callable[[Any, Any], Any]  # (db, scale) -> result
+
+
+def _sequential(fn, items, max_workers=4):
+    return [fn(item) for item in items]
+
+
+def _cases(payloads) -> List[Case]:
+    from app.services import cost_explorer, compute_optimizer, optimization_hub, anomaly_detection, ai_recommendations
+    from app.services.aws_client import get_aws_client
+
+    start = payloads.START_DATE
+
+    def period(scale):
+        return start.isoformat(), (start + timedelta(days=scale.days)).isoformat()
+
+    def grouped(keys):
+        return lambda rng, scale: [("ce", "get_cost_and_usage", payloads.grouped_costs(rng, scale.days, keys(scale)))]
+
+    def optimizer_calls(rng, scale):
+        return [
+            ("compute-optimizer", "get_ec2_instance_recommendations", payloads.ec2_recommendations(rng, scale)),
+            ("compute-optimizer", "get_ebs_volume_recommendations", payloads.ebs_recommendations(rng, scale)),
+            ("compute-optimizer", "get_lambda_function_recommendations", payloads.lambda_recommendations(rng, scale)),
+            ("compute-optimizer", "get_auto_scaling_group_recommendations", payloads.asg_recommendations(rng, scale)),
+            ("compute-optimizer", "get_ecs_service_recommendations", payloads.ecs_recommendations(rng, scale)),
+        ]
+
+    def commitment_matrix(db, scale):
+        # The background fill, run inline, then the request that assembles it
+        optimization_hub.fill_commitment_matrix(get_aws_client("ce", db), False)
+        return optimization_hub.get_commitment_recommendation_matrix(db)
+
+    def hub_summary_calls(rng, scale):
+        calls = []
+        for groups in (payloads.ACTION_TYPES, payloads.RESOURCE_TYPES, payloads.account_ids(scale.accounts)):
+            for page in payloads.recommendation_summaries(rng, groups):
+                calls.append(("cost-optimization-hub", "list_recommendation_summaries", page))
+        return calls
+
+    def matrix_calls(rng, scale):
+        # One payload per kind, reused for every option; the matrix only aggregates summaries
+        matrix_scale = payloads.Scale("matrix", min(scale.accounts, 50), scale.days, scale.groups, 1)
+        sp = payloads.savings_plans_recommendation(rng, matrix_scale)
+        ri = payloads.reservation_recommendation(rng, matrix_scale)
+        options = len(optimization_hub.TERMS) * len(optimization_hub.PAYMENT_OPTIONS) * len(optimization_hub.LOOKBACK_PERIODS)
+        calls = []
+        for _ in range(len(optimization_hub.SAVINGS_PLANS_TYPES) * options):
+            calls += [("ce", "get_savings_plans_purchase_recommendation", p) for p in sp]
+        for _ in range(len(optimization_hub.RESERVATION_SERVICES) * options):
+            calls += [("ce", "get_reservation_purchase_recommendation", p) for p in ri]
+        return calls
+
+    def anomaly_window(scale):
+        first = datetime(start.year, start.month, start.day, tzinfo=timezone.utc)
+        return first, first + timedelta(days=scale.days)
+
+    def anomaly_calls(rng, scale):
+        window_start, window_end = anomaly_window(scale)
+        per_chunk = max(20, scale.accounts // 2)
+        calls = []
+        for chunk in anomaly_detection._chunks(window_start, window_end):
+            for page in payloads.anomalies(rng, scale, chunk["start"], chunk["end"], per_chunk):
+                calls.append(("ce", "get_anomalies", page))
+        return calls
+
+    return [
+        Case("cost_overview", "cost_explorer",
+             lambda rng, scale: [("ce", "get_cost_and_usage", payloads.daily_costs(rng, scale.days))],
+             lambda db, scale: cost_explorer.get_cost_overview(db, *period(scale), "DAILY")),
+        Case("cost_by_service", "cost_explorer", grouped(payloads.service_keys),
+             lambda db, scale: cost_explorer.get_cost_by_service(db, *period(scale))),
+        Case("cost_by_region", "cost_explorer", grouped(payloads.region_keys),
+             lambda db, scale: cost_explorer.get_cost_by_region(db, *period(scale))),
+        Case("cost_by_account", "cost_explorer", grouped(payloads.account_keys),
+             lambda db, scale: cost_explorer.get_cost_by_account(db, *period(scale))),
+        Case("cost_by_usage_type", "cost_explorer", grouped(payloads.usage_type_keys),
+             lambda db, scale: cost_explorer.get_cost_by_usage_type(db, *period(scale))),
+        Case("cost_top_resources", "cost_explorer", grouped(payloads.resource_keys),
+             lambda db, scale: cost_explorer.get_top_resources(db, *period(scale))),
+        Case("cost_six_month_comparison", "cost_explorer",
+             lambda rng, scale: [("ce", "get_cost_and_usage", payloads.monthly_totals(rng)) for _ in range(6)],
+             lambda db, scale: cost_explorer.get_six_month_comparison(db)),
+        Case("optimizer_summary", "compute_optimizer", optimizer_calls,
+             lambda db, scale: compute_optimizer.get_optimizer_summary(db)),
+        Case("ai_recommendations", "ai_recommendations", optimizer_calls,
+             lambda db, scale: ai_recommendations.get_ai_recommendations(db)),
+        Case("hub_summary", "optimization_hub", hub_summary_calls,
+             lambda db, scale: optimization_hub.get_optimization_summary(db)),
+        Case("hub_recommendations_page", "optimization_hub",
+             lambda rng, scale: [("cost-optimization-hub", "list_recommendations", payloads.hub_recommendations(rng, scale, 100))],
+             lambda db, scale: optimization_hub.list_optimization_recommendations(db, page_size=100)),
+        Case("hub_savings_plans", "optimization_hub",
+             lambda rng, scale: [("ce", "get_savings_plans_purchase_recommendation", p)
+                                 for p in payloads.savings_plans_recommendation(rng, scale)],
+             lambda db, scale: optimization_hub.get_savings_plans_recommendations(db)),
+        Case("hub_reservations", "optimization_hub",
+             lambda rng, scale: [("ce", "get_reservation_purchase_recommendation", p)
+                                 for p in payloads.reservation_recommendation(rng, scale)],
+             lambda db, scale: optimization_hub.get_reservation_recommendations(db)),
+        Case("hub_commitment_matrix", "optimization_hub", matrix_calls, commitment_matrix),
+        Case("hub_commitment_simulation", "optimization_hub",
+             lambda rng, scale: [("ce", "get_cost_and_usage", p) for p in payloads.hourly_on_demand(rng, scale.days)],
+             lambda db, scale: optimization_hub.simulate_savings_plan_commitments(db, days=scale.days)),
+        Case("anomalies_aws", "anomaly_detection", anomaly_calls,
+             lambda db, scale: anomaly_detection._get_aws_anomalies(
+                 get_aws_client("ce", db), *anomaly_window(scale), None, None)),
+    ]
+
+
+class Harness:
+    """Fake account, stubbed clients and cache resets shared by every case."""
+
+    def __init__(self):
+        from botocore.stub import Stubber
+        from app.database import Base, SessionLocal, engine
+        from app.encryption import encrypt_value
+        from app.metrics import MeteredTTLCache
+        from app.models import AWSAccount
+        from app.services import aws_client, cost_explorer, compute_optimizer, optimization_hub, anomaly_detection, ai_recommendations
+
+        Base.metadata.create_all(bind=engine)
+        self.db = SessionLocal()
+        self.db.add(AWSAccount(
+            account_id="123456789012", account_name="benchmark", region="us-east-1",
+            is_root=True, is_active=True,
+            access_key_encrypted=encrypt_value("AKIABENCHMARK"),
+            secret_key_encrypted=encrypt_value("benchmark"),
+        ))
+        self.db.commit()
+
+        aws_client._rate_limiters.clear()
+        for module in (optimization_hub, anomaly_detection):
+            module.run_concurrently = _sequential
+
+        self.caches = [
+            value
+            for module in (cost_explorer, compute_optimizer, optimization_hub, anomaly_detection, ai_recommendations)
+            for value in vars(module).values()
+            if isinstance(value, MeteredTTLCache)
+        ]
+        self.stubbers = {}
+        for service in ("ce", "compute-optimizer", "cost-optimization-hub"):
+            stubber = Stubber(aws_client.get_aws_client(service, self.db, region="us-east-1"))
+            stubber.activate()
+            self.stubbers[service] = stubber
+
+    def prepare(self, calls: Calls):
+        for cache in self.caches:
+            cache.clear()
+        for service, operation, response in calls:
+            self.stubbers[service].add_response(operation, response)
+
+    def verify(self, case: Case):
+        for service, stubber in self.stubbers.items():
+            try:
+                stubber.assert_no_pending_responses()
+            except AssertionError:
+                raise SystemExit(f"{case.name}: not every queued {service} response was consumed")
+
+
+def _measure(harness: Harness, case: Case, scale, calls: Calls, repeats: int) -> Dict[str, Any]:
+    harness.prepare(calls)  # warm-up
+    result = case.run(harness.db, scale)
+    harness.verify(case)
+    if isinstance(result, dict) and result.get("error"):
+        raise SystemExit(f"{case.name}: {result['error']}")
+
+    timings = []
+    for _ in range(repeats):
+        harness.prepare(calls)
+        started = time.perf_counter()
+        case.run(harness.db, scale)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    harness.prepare(calls)
+    tracemalloc.start()
+    case.run(harness.db, scale)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "case": case.name,
+        "module": case.module,
+        "scale": scale.name,
+        "api_calls": len(calls),
+        "min_ms": round(min(timings), 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "max_ms": round(max(timings), 3),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True,
+        ).stdout.strip()
+    except OSError:
+        return ""
+
+
+def run(scales: List[str], prefixes: List[str], repeats: int, seed: int) -> Dict[str, Any]:
+    from benchmarks import payloads
+
+    harness = Harness()
+    cases = [c for c in _cases(payloads) if not prefixes or c.name.startswith(tuple(prefixes))]
+    results = []
+    for scale_name in scales:
+        scale = payloads.SCALES[scale_name]
+        for case in cases:
+            calls = case.calls(random.Random(seed), scale)
+            result = _measure(harness, case, scale, calls, repeats)
+            results.append(result)
+            print(f"  {scale.name:<7} {case.name:<28} median {result['median_ms']:>10.2f} ms"
+                  f"   peak {result['peak_kb']:>10.1f} KiB   ({result['api_calls']} calls)")
+
+    import numpy
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "numpy": numpy.__version__,
+            "platform": platform.platform(),
+            "repeats": repeats,
+            "seed": seed,
+            "scales": {name: asdict(payloads.SCALES[name]) for name in scales},
+        },
+        "results": results,
+    }
+
+
+def compare(report: Dict[str, Any], baseline_path: str, threshold: float, min_delta_ms: float) -> int:
+    """Print time and peak memory ratios against a baseline; returns the regression count.
+
+    Times are compared best-of-N (min_ms), the least noisy statistic for short
+    runs, and a slowdown must also exceed min_delta_ms so sub-millisecond
+    cases do not flap.
+    """
+    with open(baseline_path) as f:
+        baseline = {(r["case"], r["scale"]): r for r in json.load(f)["results"]}
+
+    regressions = 0
+    print(f"\nAgainst {baseline_path} (threshold x{threshold:g})")
+    for r in report["results"]:
+        base = baseline.get((r["case"], r["scale"]))
+        if base is None:
+            print(f"  {r['scale']:<7} {r['case']:<28} (no baseline)")
+            continue
+        time_ratio = r["min_ms"] / base["min_ms"] if base["min_ms"] else 1.0
+        mem_ratio = r["peak_kb"] / base["peak_kb"] if base["peak_kb"] else 1.0
+        flags = []
+        if time_ratio > threshold and r["min_ms"] - base["min_ms"] > min_delta_ms:
+            flags.append("SLOWER")
+        if mem_ratio > threshold:
+            flags.append("MORE MEMORY")
+        regressions += bool(flags)
+        print(f"  {r['scale']:<7} {r['case']:<28} time x{time_ratio:>5.2f}   memory x{mem_ratio:>5.2f}   {' '.join(flags)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", nargs="+", default=["small", "medium"], help="small, medium and/or large")
+    parser.add_argument("--cases", nargs="*", default=[], help="only cases whose name starts with one of these")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="baseline results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="ratio above which a case counts as regressed")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    sys.path.insert(0, BACKEND_DIR)
+    from benchmarks.payloads import SCALES
+
+    unknown = set(args.scales) - set(SCALES)
+    if unknown:
+        parser.error(f"unknown scale(s): {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before the app is imported: settings and the engine are read at import
+        os.environ.update(
+            DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'benchmark.db')}",
+            BACKGROUND_JOBS_ENABLED="false",
+            WARMUP_ENABLED="false",
+            AUDIT_FALLBACK_PATH=os.path.join(tmp, "audit_fallback.jsonl"),
+        )
+        report = run(args.scales, args.cases, args.repeats, args.seed)
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ") + ".json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        regressions = compare(report, args.compare, args.threshold, args.min_delta_ms)
+        raise SystemExit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
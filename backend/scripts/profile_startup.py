@@ -0,0 +1,140 @@
+"""Cold-start profile of the API: module import cost and time to first /api/health.
+
+Runs the app in a fresh interpreter with ``-X importtime`` against a throwaway
+SQLite database, then reports the slowest imports and the startup phases,
+and compares the total against COLD_START_BUDGET_MS.
+
+    cd backend
+    python scripts/profile_startup.py                 # report, exit 1 if over budget
+    python scripts/profile_startup.py --top 40 --json startup.json
+    python scripts/profile_startup.py --budget-ms 1200
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def _child():
+    """Measure inside the fresh interpreter; prints phase timings as JSON."""
+    sys.path.insert(0, BACKEND_DIR)
+    t0 = time.perf_counter()
+    import app.main
+    t1 = time.perf_counter()
+    from fastapi.testclient import TestClient
+
+    with TestClient(app.main.app) as client:
+        t2 = time.perf_counter()
+        status = client.get("/api/health").status_code
+        t3 = time.perf_counter()
+    print(json.dumps({
+        "import_ms": round((t1 - t0) * 1000, 1),
+        "startup_ms": round((t2 - t1) * 1000, 1),
+        "first_request_ms": round((t3 - t2) * 1000, 1),
+        "health_status": status,
+    }))
+
+
+def _parse_importtime(stderr: str):
+    """Modules imported by `import app.main` (its subtree in the -X importtime output)."""
+    modules = []
+    for line in stderr.splitlines():
+        m = _IMPORTTIME_LINE.match(line)
+        if m:
+            self_us, cumulative_us, indent, name = m.groups()
+            modules.append({
+                "module": name,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "depth": len(indent) // 2,
+            })
+    # A parent's line is printed after all of its children
+    end = next(i for i, m in enumerate(modules) if m["module"] == "app.main" and m["depth"] == 0)
+    start = end
+    while start > 0 and modules[start - 1]["depth"] > 0:
+        start -= 1
+    return modules[start:end + 1]
+
+
+def profile(top: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'startup.db')}",
+            BACKGROUND_JOBS_ENABLED="false",
+            AUDIT_FALLBACK_PATH=os.path.join(tmp, "audit_fallback.jsonl"),
+        )
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", os.path.abspath(__file__), "--child"],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+        )
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr[-4000:])
+        raise SystemExit(f"startup failed with exit code {proc.returncode}")
+
+    phases = json.loads(proc.stdout.strip().splitlines()[-1])
+    modules = _parse_importtime(proc.stderr)
+    app_modules = [m for m in modules if m["module"].startswith("app.")]
+    third_party = {}
+    for m in modules:
+        root = m["module"].split(".")[0]
+        if m["module"] == root and root != "app":  # package entry already includes its submodules
+            third_party[root] = max(third_party.get(root, 0), m["cumulative_ms"])
+
+    phases["total_ms"] = round(phases["import_ms"] + phases["startup_ms"] + phases["first_request_ms"], 1)
+    return {
+        "phases": phases,
+        "slowest_imports": sorted(modules, key=lambda m: m["cumulative_ms"], reverse=True)[:top],
+        "app_modules": sorted(app_modules, key=lambda m: m["cumulative_ms"], reverse=True)[:top],
+        "packages": dict(sorted(third_party.items(), key=lambda kv: kv[1], reverse=True)[:top]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--top", type=int, default=20, help="rows per table")
+    parser.add_argument("--budget-ms", type=float, help="override COLD_START_BUDGET_MS")
+    parser.add_argument("--json", help="write the full report to this file")
+    args = parser.parse_args()
+
+    if args.child:
+        _child()
+        return
+
+    sys.path.insert(0, BACKEND_DIR)
+    from app.config import settings
+
+    budget = args.budget_ms or settings.COLD_START_BUDGET_MS
+    report = profile(args.top)
+    report["budget_ms"] = budget
+    phases = report["phases"]
+
+    print("Startup phases")
+    for key in ("import_ms", "startup_ms", "first_request_ms", "total_ms"):
+        print(f"  {key:<18} {phases[key]:>9.1f}")
+    print("\nPackages imported by app.main (ms)")
+    for name, ms in report["packages"].items():
+        print(f"  {name:<40} {ms:>9.1f}")
+    print("\nApp modules by cumulative import time (ms)")
+    for m in report["app_modules"]:
+        print(f"  {m['module']:<40} {m['cumulative_ms']:>9.1f}  (self {m['self_ms']:.1f})")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    over = phases["total_ms"] > budget
+    print(f"\nCold start {phases['total_ms']:.0f} ms against a budget of {budget:.0f} ms: {'OVER' if over else 'ok'}")
+    raise SystemExit(1 if over else 0)
+
+
+if __name__ == "__main__":
+    main()
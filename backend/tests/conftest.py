@@ -0,0 +1,28 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Configure the app before anything imports it: a throwaway SQLite database
+# and no scheduler, warm-up or news ingester threads
+_tmp = tempfile.mkdtemp(prefix="cost-platform-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ["AUDIT_FALLBACK_PATH"] = os.path.join(_tmp, "audit_fallback.jsonl")
+os.environ["BACKGROUND_JOBS_ENABLED"] = "false"
+os.environ["WARMUP_ENABLED"] = "false"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+import app.models  # noqa: E402,F401  registers every table
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models import CostHistoryDay, DailyCost
+from app.services import local_anomalies
+from app.services.cost_history import _SETTLEMENT_DAYS
+
+
+@pytest.fixture(autouse=True)
+def fresh_detector():
+    local_anomalies.reset_local_detector()
+    yield
+    local_anomalies.reset_local_detector()
+
+
+def _backfill(db, days, series=20, spike=None):
+    """Steady daily spend for `series` services over the last `days` days."""
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    closed_before = (today - timedelta(days=_SETTLEMENT_DAYS)).strftime("%Y-%m-%d")
+    rows = []
+    for i in range(days, 0, -1):
+        date = (today - timedelta(days=i)).strftime("%Y-%m-%d")
+        db.add(CostHistoryDay(date=date, is_final=date < closed_before))
+        for s in range(series):
+            amount = 100.0 + (i % 7)
+            if spike and spike == (s, i):
+                amount *= 10
+            rows.append({"date": date, "account_id": "111111111111", "service": f"svc-{s}",
+                         "region": "us-east-1", "amount": amount})
+    db.bulk_insert_mappings(DailyCost, rows)
+    db.commit()
+
+
+def test_empty_store_then_backfill_does_not_flag_everything(db):
+    assert local_anomalies.detect_local_anomalies(db) == []
+
+    _backfill(db, 120)
+    assert local_anomalies.detect_local_anomalies(db) == []
+
+
+def test_short_history_builds_no_state(db):
+    _backfill(db, local_anomalies.WINDOW_DAYS - 5)
+    assert local_anomalies.detect_local_anomalies(db) == []
+    assert local_anomalies._state["last_date"] is None
+
+
+def test_rewritten_history_rebuilds_state(db):
+    _backfill(db, 120)
+    assert local_anomalies.detect_local_anomalies(db) == []
+
+    # Another replica re-ingests the whole window with a spike in it
+    db.query(DailyCost).delete()
+    db.query(CostHistoryDay).delete()
+    db.commit()
+    _backfill(db, 120, spike=(3, 40))
+
+    anomalies = local_anomalies.detect_local_anomalies(db)
+    assert [a["root_causes"][0]["service"] for a in anomalies] == ["svc-3"]
+
+
+def test_sync_of_old_days_resets_state(db):
+    _backfill(db, 120)
+    local_anomalies.detect_local_anomalies(db)
+    last_date = local_anomalies._state["last_date"]
+
+    local_anomalies.history_synced(last_date)
+    assert local_anomalies._state["last_date"] == last_date
+
+    local_anomalies.history_synced("2000-01-01")
+    assert local_anomalies._state["last_date"] is None
+
+
+def _add_series(db, service, days_ago, amount=100.0):
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    db.bulk_insert_mappings(DailyCost, [
+        {"date": (today - timedelta(days=i)).strftime("%Y-%m-%d"), "account_id": "111111111111",
+         "service": service, "region": "us-east-1", "amount": amount}
+        for i in days_ago
+    ])
+    db.commit()
+
+
+def test_series_starting_partway_is_not_flagged(db):
+    _backfill(db, 120)
+    # A new service with steady spend from ten days ago, closed and open days alike
+    _add_series(db, "svc-new", range(10, 0, -1))
+
+    assert local_anomalies.detect_local_anomalies(db) == []
+
+
+def test_series_appearing_in_new_closed_days_is_not_flagged(db):
+    _backfill(db, 120)
+    assert local_anomalies.detect_local_anomalies(db) == []
+
+    # The service shows up in days folded in incrementally after the build
+    _add_series(db, "svc-new", range(_SETTLEMENT_DAYS, 0, -1))
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    local_anomalies._advance(db, today)
+
+    assert local_anomalies._state["flags"] == []
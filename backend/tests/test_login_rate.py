@@ -0,0 +1,48 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.auth import _login_attempts
+from app.config import settings
+from app.main import app
+
+NGINX = ("10.1.2.3", 41000)
+
+
+@pytest.fixture(autouse=True)
+def clear_attempts():
+    _login_attempts.clear()
+    yield
+    _login_attempts.clear()
+
+
+def _login(client, username, forwarded_for):
+    return client.post(
+        "/api/auth/login",
+        json={"username": username, "password": "wrong"},
+        headers={"X-Forwarded-For": forwarded_for, "X-Real-IP": forwarded_for},
+    )
+
+
+def test_forwarded_clients_get_separate_buckets(db):
+    client = TestClient(app, client=NGINX)
+    for i in range(settings.LOGIN_RATE_LIMIT_PER_IP):
+        assert _login(client, f"user{i}", "203.0.113.10").status_code == 401
+    assert _login(client, "another", "203.0.113.10").status_code == 429
+
+    # Same proxy, different client: its own budget
+    assert _login(client, "another", "203.0.113.20").status_code == 401
+
+
+def test_forwarded_header_ignored_from_untrusted_peer(db):
+    client = TestClient(app, client=("198.51.100.7", 41000))
+    for i in range(settings.LOGIN_RATE_LIMIT_PER_IP):
+        assert _login(client, f"user{i}", f"203.0.113.{i}").status_code == 401
+    # Spoofed X-Forwarded-For does not escape the peer's bucket
+    assert _login(client, "another", "203.0.113.250").status_code == 429
+
+
+def test_client_cannot_prepend_its_own_forwarded_for(db):
+    client = TestClient(app, client=NGINX)
+    for i in range(settings.LOGIN_RATE_LIMIT_PER_IP):
+        assert _login(client, f"user{i}", f"192.0.2.{i}, 203.0.113.10").status_code == 401
+    assert _login(client, "another", "192.0.2.250, 203.0.113.10").status_code == 429
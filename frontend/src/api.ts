@@ -29,3 +29,15 @@ api.interceptors.response.use(
 );
 
 export default api;
+
+// Follow X-Next-Cursor through every page of a paginated list endpoint
+export async function getAllPages<T>(url: string, params: Record<string, any> = {}): Promise<T[]> {
+  const items: T[] = [];
+  let cursor: string | undefined;
+  do {
+    const res = await api.get(url, { params: { ...params, cursor } });
+    items.push(...res.data);
+    cursor = res.headers['x-next-cursor'];
+  } while (cursor);
+  return items;
+}
@@ -1,5 +1,5 @@
 import { useState, useEffect, useCallback } from 'react';
-import api from '../api';
+import api, { getAllPages } from '../api';
 
 export function useApi<T>(url: string, params?: Record<string, any>, deps: any[] = []) {
   const [data, setData] = useState<T | null>(null);
@@ -36,9 +36,9 @@ export function useAccounts() {
   const [accounts, setAccounts] = useState<{ id: string; name: string }[]>([]);
 
   useEffect(() => {
-    api.get('/admin/accounts').then((res) => {
+    getAllPages<any>('/admin/accounts').then((data) => {
       setAccounts(
-        res.data.map((a: any) => ({
+        data.map((a) => ({
           id: a.account_id,
           name: a.account_name,
         }))
@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
 import { Newspaper, Search, ExternalLink, RefreshCw } from 'lucide-react';
 import { PageLoader, ErrorBanner, EmptyState } from '../components/Common';
 import { useApi } from '../hooks/useApi';
@@ -6,18 +6,22 @@ import { useApi } from '../hooks/useApi';
 export default function NewsDashboard() {
   const [category, setCategory] = useState('');
   const [search, setSearch] = useState('');
+  const [query, setQuery] = useState('');
+
+  // Search runs server-side against the news index; debounce keystrokes
+  useEffect(() => {
+    const t = setTimeout(() => setQuery(search.trim()), 300);
+    return () => clearTimeout(t);
+  }, [search]);
 
   const { data: catData } = useApi<{ categories: string[] }>('/news/categories');
   const { data, loading, error, refetch } = useApi<any>(
     '/news/',
-    { category: category || undefined, limit: 50 },
-    [category]
+    { category: category || undefined, q: query || undefined, limit: 50 },
+    [category, query]
   );
 
-  const items = (data?.items || []).filter((item: any) =>
-    !search || item.title?.toLowerCase().includes(search.toLowerCase()) ||
-    item.summary?.toLowerCase().includes(search.toLowerCase())
-  );
+  const items = data?.items || [];
 
   return (
     <div className="space-y-6">
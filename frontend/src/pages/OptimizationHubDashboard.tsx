@@ -1,11 +1,12 @@
-import React, { useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import {
-  BarChart, Bar, PieChart, Pie, Cell,
-  XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer,
+  BarChart, Bar, PieChart, Pie, Cell, LineChart, Line,
+  XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer, Legend,
 } from 'recharts';
 import { PiggyBank, DollarSign, ShieldCheck, Zap } from 'lucide-react';
 import { StatCard, PageLoader, ErrorBanner, AccountFilter, EmptyState } from '../components/Common';
 import { useApi, useAccounts, formatCurrency, getChartColor } from '../hooks/useApi';
+import api from '../api';
 import clsx from 'clsx';
 
 export default function OptimizationHubDashboard() {
@@ -14,11 +15,52 @@ export default function OptimizationHubDashboard() {
   const [tab, setTab] = useState<'recommendations' | 'savings' | 'reservations'>('recommendations');
 
   const { data: recsData, loading: loadingRecs, error: errorRecs, refetch: refetchRecs } = useApi<any>(
-    '/optimization-hub/recommendations',
+    '/optimization-hub/summary',
     { account_ids: accountFilter || undefined },
     [accountFilter]
   );
 
+  // Recommendation items are paged in only once the user opens the list
+  const [items, setItems] = useState<any[]>([]);
+  const [nextToken, setNextToken] = useState<string | null>(null);
+  const [itemsRequested, setItemsRequested] = useState(false);
+  const [loadingItems, setLoadingItems] = useState(false);
+  const [errorItems, setErrorItems] = useState<string | null>(null);
+  const filterRef = useRef(accountFilter);
+  filterRef.current = accountFilter;
+
+  useEffect(() => {
+    setItems([]);
+    setNextToken(null);
+    setItemsRequested(false);
+    setErrorItems(null);
+  }, [accountFilter]);
+
+  const loadItems = async (token: string | null) => {
+    const filter = accountFilter;
+    setItemsRequested(true);
+    setLoadingItems(true);
+    setErrorItems(null);
+    try {
+      const res = await api.get('/optimization-hub/recommendations/items', {
+        params: { account_ids: filter || undefined, next_token: token || undefined },
+      });
+      if (filterRef.current !== filter) return;
+      if (res.data.error) {
+        setErrorItems(res.data.error);
+        return;
+      }
+      setItems((prev) => (token ? [...prev, ...res.data.recommendations] : res.data.recommendations));
+      setNextToken(res.data.next_token || null);
+    } catch (err: any) {
+      if (filterRef.current === filter) {
+        setErrorItems(err.response?.data?.detail || err.message || 'Request failed');
+      }
+    } finally {
+      setLoadingItems(false);
+    }
+  };
+
   const { data: savingsData, loading: loadingSavings } = useApi<any>(
     '/optimization-hub/savings-plans',
     { account_ids: accountFilter || undefined },
@@ -155,39 +197,70 @@ export default function OptimizationHubDashboard() {
 
             {tab === 'recommendations' && (
               <div className="overflow-x-auto">
-                {(recsData?.recommendations || []).length === 0 ? (
-                  <EmptyState message="No recommendations available" />
+                {errorItems && (
+                  <div className="p-4">
+                    <ErrorBanner message={errorItems} onRetry={() => loadItems(items.length ? nextToken : null)} />
+                  </div>
+                )}
+                {!itemsRequested ? (
+                  <div className="p-8 flex flex-col items-center gap-3">
+                    <p className="text-sm text-dark-500">
+                      {recsData?.summary?.total_recommendations || 0} recommendations
+                    </p>
+                    <button onClick={() => loadItems(null)} className="btn-secondary text-sm">
+                      Show recommendations
+                    </button>
+                  </div>
+                ) : items.length === 0 ? (
+                  loadingItems ? <PageLoader /> : !errorItems && <EmptyState message="No recommendations available" />
                 ) : (
-                  <table className="w-full text-sm">
-                    <thead>
-                      <tr className="table-header">
-                        <th className="px-4 py-3">Resource Type</th>
-                        <th className="px-4 py-3">Action</th>
-                        <th className="px-4 py-3">Account</th>
-                        <th className="px-4 py-3">Effort</th>
-                        <th className="px-4 py-3 text-right">Monthly Savings</th>
-                        <th className="px-4 py-3 text-right">Savings %</th>
-                      </tr>
-                    </thead>
-                    <tbody>
-                      {(recsData?.recommendations || []).map((r: any, i: number) => (
-                        <tr key={i} className="border-t border-dark-100 dark:border-dark-800">
-                          <td className="px-4 py-3">{r.resource_type}</td>
-                          <td className="px-4 py-3"><span className="badge-blue">{r.action_type}</span></td>
-                          <td className="px-4 py-3 text-dark-500">{r.account_id}</td>
-                          <td className="px-4 py-3 text-dark-500">{r.implementation_effort || '-'}</td>
-                          <td className="px-4 py-3 text-right font-semibold text-green-500">{formatCurrency(r.estimated_monthly_savings)}</td>
-                          <td className="px-4 py-3 text-right">{r.estimated_savings_percentage?.toFixed(1)}%</td>
+                  <>
+                    <table className="w-full text-sm">
+                      <thead>
+                        <tr className="table-header">
+                          <th className="px-4 py-3">Resource Type</th>
+                          <th className="px-4 py-3">Action</th>
+                          <th className="px-4 py-3">Account</th>
+                          <th className="px-4 py-3">Effort</th>
+                          <th className="px-4 py-3 text-right">Monthly Savings</th>
+                          <th className="px-4 py-3 text-right">Savings %</th>
                         </tr>
-                      ))}
-                    </tbody>
-                  </table>
+                      </thead>
+                      <tbody>
+                        {items.map((r: any) => (
+                          <tr key={r.recommendation_id} className="border-t border-dark-100 dark:border-dark-800">
+                            <td className="px-4 py-3">{r.resource_type}</td>
+                            <td className="px-4 py-3"><span className="badge-blue">{r.action_type}</span></td>
+                            <td className="px-4 py-3 text-dark-500">{r.account_id}</td>
+                            <td className="px-4 py-3 text-dark-500">{r.implementation_effort || '-'}</td>
+                            <td className="px-4 py-3 text-right font-semibold text-green-500">{formatCurrency(r.estimated_monthly_savings)}</td>
+                            <td className="px-4 py-3 text-right">{r.estimated_savings_percentage?.toFixed(1)}%</td>
+                          </tr>
+                        ))}
+                      </tbody>
+                    </table>
+                    <div className="p-4 border-t border-dark-200 dark:border-dark-700 flex items-center justify-between">
+                      <span className="text-xs text-dark-500">
+                        Showing {items.length} of {recsData?.summary?.total_recommendations ?? items.length}
+                      </span>
+                      {nextToken && (
+                        <button
+                          onClick={() => loadItems(nextToken)}
+                          disabled={loadingItems}
+                          className="btn-secondary text-xs"
+                        >
+                          {loadingItems ? 'Loading...' : 'Load more'}
+                        </button>
+                      )}
+                    </div>
+                  </>
                 )}
               </div>
             )}
 
             {tab === 'savings' && (
               <div className="overflow-x-auto">
+                <CommitmentSimulator accountFilter={accountFilter} tooltipStyle={tooltipStyle} />
                 {(savingsData?.plans || []).length === 0 ? (
                   <EmptyState message="No Savings Plans recommendations" />
                 ) : (
@@ -255,3 +328,66 @@ export default function OptimizationHubDashboard() {
     </div>
   );
 }
+
+// Mounted only while the Savings Plans tab is open, so the landing view never runs the simulation
+function CommitmentSimulator({ accountFilter, tooltipStyle }: { accountFilter: string; tooltipStyle: React.CSSProperties }) {
+  const [days, setDays] = useState(14);
+  const { data, loading, error, refetch } = useApi<any>(
+    '/optimization-hub/savings-plans/simulate',
+    { account_ids: accountFilter || undefined, days },
+    [accountFilter, days]
+  );
+  const summary = data?.summary || {};
+  const curve = data?.curve || [];
+
+  return (
+    <div className="p-4 border-b border-dark-200 dark:border-dark-700 space-y-4">
+      <div className="flex items-center justify-between gap-4">
+        <h3 className="font-semibold">Commitment Simulator</h3>
+        <select value={days} onChange={(e) => setDays(Number(e.target.value))} className="select text-sm w-auto">
+          <option value={14}>Last 14 days (hourly)</option>
+          <option value={30}>Last 30 days (daily, approximate)</option>
+          <option value={60}>Last 60 days (daily, approximate)</option>
+        </select>
+      </div>
+
+      {(error || data?.error) && <ErrorBanner message={error || data.error} onRetry={refetch} />}
+      {summary.approximate && (
+        <div className="card p-3 border-yellow-300 dark:border-yellow-800 bg-yellow-50 dark:bg-yellow-900/10 text-sm text-yellow-700 dark:text-yellow-400">
+          Approximate: windows longer than 14 days use daily spend spread evenly across hours,
+          which hides hourly variance and overstates utilization.
+        </div>
+      )}
+
+      {loading ? (
+        <PageLoader />
+      ) : curve.length === 0 ? (
+        <EmptyState message="No on-demand compute spend to simulate" />
+      ) : (
+        <>
+          <p className="text-sm text-dark-500">
+            Optimal commitment ${summary.optimal_hourly_commitment?.toFixed(4)}/hour saves{' '}
+            {formatCurrency(summary.optimal_estimated_monthly_savings || 0)}/month at{' '}
+            {summary.optimal_utilization_percentage?.toFixed(1)}% utilization; break-even at $
+            {summary.break_even_hourly_commitment?.toFixed(4)}/hour.
+          </p>
+          <div className="h-64">
+            <ResponsiveContainer width="100%" height="100%">
+              <LineChart data={curve}>
+                <CartesianGrid strokeDasharray="3 3" stroke="#334155" opacity={0.3} />
+                <XAxis dataKey="hourly_commitment" tick={{ fontSize: 11 }} stroke="#64748b" tickFormatter={(v) => `$${v}`} />
+                <YAxis yAxisId="savings" tick={{ fontSize: 11 }} stroke="#64748b" tickFormatter={(v) => `$${v}`} />
+                <YAxis yAxisId="pct" orientation="right" domain={[0, 100]} tick={{ fontSize: 11 }} stroke="#64748b" tickFormatter={(v) => `${v}%`} />
+                <Tooltip contentStyle={tooltipStyle} />
+                <Legend />
+                <Line yAxisId="savings" type="monotone" dataKey="estimated_monthly_savings" name="Monthly Savings" stroke="#10b981" dot={false} strokeWidth={2} />
+                <Line yAxisId="pct" type="monotone" dataKey="utilization_percentage" name="Utilization %" stroke="#3b82f6" dot={false} />
+                <Line yAxisId="pct" type="monotone" dataKey="coverage_percentage" name="Coverage %" stroke="#f59e0b" dot={false} />
+              </LineChart>
+            </ResponsiveContainer>
+          </div>
+        </>
+      )}
+    </div>
+  );
+}
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Plus, Trash2, Edit2, Server, Check, X } from 'lucide-react';
 import { PageLoader, ErrorBanner, EmptyState } from '../../components/Common';
-import api from '../../api';
+import api, { getAllPages } from '../../api';
 import clsx from 'clsx';
 
 interface AWSAccount {
@@ -9,6 +9,7 @@ interface AWSAccount {
   account_id: string;
   account_name: string;
   is_root: boolean;
+  role_arn?: string | null;
   region: string;
   is_active: boolean;
   created_at: string;
@@ -21,15 +22,14 @@ export default function AdminAccountsPage() {
   const [showForm, setShowForm] = useState(false);
   const [form, setForm] = useState({
     account_id: '', account_name: '', is_root: false,
-    access_key: '', secret_key: '', region: 'us-east-1',
+    access_key: '', secret_key: '', role_arn: '', external_id: '', region: 'us-east-1',
   });
   const [saving, setSaving] = useState(false);
 
   const fetchAccounts = async () => {
     setLoading(true);
     try {
-      const res = await api.get('/admin/accounts');
-      setAccounts(res.data);
+      setAccounts(await getAllPages<AWSAccount>('/admin/accounts'));
     } catch (err: any) {
       setError(err.response?.data?.detail || 'Failed to load accounts');
     } finally {
@@ -43,9 +43,16 @@ export default function AdminAccountsPage() {
     e.preventDefault();
     setSaving(true);
     try {
-      await api.post('/admin/accounts', form);
+      const useRole = !!form.role_arn;
+      await api.post('/admin/accounts', {
+        ...form,
+        access_key: useRole ? null : form.access_key,
+        secret_key: useRole ? null : form.secret_key,
+        role_arn: useRole ? form.role_arn : null,
+        external_id: useRole && form.external_id ? form.external_id : null,
+      });
       setShowForm(false);
-      setForm({ account_id: '', account_name: '', is_root: false, access_key: '', secret_key: '', region: 'us-east-1' });
+      setForm({ account_id: '', account_name: '', is_root: false, access_key: '', secret_key: '', role_arn: '', external_id: '', region: 'us-east-1' });
       fetchAccounts();
     } catch (err: any) {
       setError(err.response?.data?.detail || 'Failed to create account');
@@ -103,13 +110,27 @@ export default function AdminAccountsPage() {
             <div>
               <label className="block text-sm font-medium mb-1">Access Key</label>
               <input value={form.access_key} onChange={(e) => setForm({ ...form, access_key: e.target.value })}
-                className="input" required placeholder="AKIA..." />
+                className="input" required={!form.role_arn} disabled={!!form.role_arn} placeholder="AKIA..." />
             </div>
             <div>
               <label className="block text-sm font-medium mb-1">Secret Key</label>
               <input value={form.secret_key} onChange={(e) => setForm({ ...form, secret_key: e.target.value })}
-                className="input" required type="password" />
+                className="input" required={!form.role_arn} disabled={!!form.role_arn} type="password" />
             </div>
+            {!form.is_root && (
+              <>
+                <div>
+                  <label className="block text-sm font-medium mb-1">Role ARN (instead of keys)</label>
+                  <input value={form.role_arn} onChange={(e) => setForm({ ...form, role_arn: e.target.value })}
+                    className="input" placeholder="arn:aws:iam::123456789012:role/CostReadOnly" />
+                </div>
+                <div>
+                  <label className="block text-sm font-medium mb-1">External ID</label>
+                  <input value={form.external_id} onChange={(e) => setForm({ ...form, external_id: e.target.value })}
+                    className="input" disabled={!form.role_arn} placeholder="Optional" />
+                </div>
+              </>
+            )}
             <div>
               <label className="block text-sm font-medium mb-1">Region</label>
               <select value={form.region} onChange={(e) => setForm({ ...form, region: e.target.value })} className="select">
@@ -119,7 +140,7 @@ export default function AdminAccountsPage() {
               </select>
             </div>
             <div className="flex items-center gap-2 mt-6">
-              <input type="checkbox" checked={form.is_root} onChange={(e) => setForm({ ...form, is_root: e.target.checked })}
+              <input type="checkbox" checked={form.is_root} onChange={(e) => setForm({ ...form, is_root: e.target.checked, role_arn: '', external_id: '' })}
                 className="rounded border-dark-300" id="is_root" />
               <label htmlFor="is_root" className="text-sm">Root / Management Account</label>
             </div>
@@ -158,6 +179,7 @@ export default function AdminAccountsPage() {
                     <span className={acc.is_root ? 'badge-yellow' : 'badge-blue'}>
                       {acc.is_root ? 'Root' : 'Member'}
                     </span>
+                    {acc.role_arn && <span className="badge-green ml-1" title={acc.role_arn}>Role</span>}
                   </td>
                   <td className="px-4 py-3 text-dark-500">{acc.region}</td>
                   <td className="px-4 py-3">
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Activity, XCircle, Shield } from 'lucide-react';
 import { PageLoader, ErrorBanner, EmptyState } from '../../components/Common';
-import api from '../../api';
+import api, { getAllPages } from '../../api';
 import clsx from 'clsx';
 
 interface Session {
@@ -36,15 +36,15 @@ export default function AdminActivityPage() {
     setLoading(true);
     try {
       const params = filterUser ? { user_id: filterUser } : {};
-      const [sessRes, histRes, usersRes] = await Promise.all([
+      const [sessRes, histRes, usersData] = await Promise.all([
         api.get('/admin/sessions', { params }),
         api.get('/admin/login-history', { params: { ...params, limit: 200 } }),
-        api.get('/admin/users'),
+        getAllPages<{ id: number; username: string }>('/admin/users'),
       ]);
       setSessions(sessRes.data);
       setHistory(histRes.data);
       const uMap: Record<number, string> = {};
-      usersRes.data.forEach((u: any) => { uMap[u.id] = u.username; });
+      usersData.forEach((u) => { uMap[u.id] = u.username; });
       setUsers(uMap);
     } catch (err: any) {
       setError(err.response?.data?.detail || 'Failed to load');
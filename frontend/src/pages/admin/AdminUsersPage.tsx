@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Plus, Trash2, UserX, UserCheck, KeyRound, Eye, EyeOff, Shield } from 'lucide-react';
 import { PageLoader, ErrorBanner, EmptyState } from '../../components/Common';
-import api from '../../api';
+import api, { getAllPages } from '../../api';
 import clsx from 'clsx';
 
 interface UserData {
@@ -12,7 +12,6 @@ interface UserData {
   login_attempts: number;
   created_at: string;
   account_ids: number[];
-  plain_password?: string;
 }
 
 interface AWSAccount {
@@ -28,6 +27,7 @@ export default function AdminUsersPage() {
   const [error, setError] = useState('');
   const [showForm, setShowForm] = useState(false);
   const [showPasswords, setShowPasswords] = useState<Record<number, boolean>>({});
+  const [passwords, setPasswords] = useState<Record<number, string | null>>({});
   const [resetModal, setResetModal] = useState<number | null>(null);
   const [newPassword, setNewPassword] = useState('');
   const [form, setForm] = useState({
@@ -38,12 +38,14 @@ export default function AdminUsersPage() {
   const fetchData = async () => {
     setLoading(true);
     try {
-      const [usersRes, acctsRes] = await Promise.all([
-        api.get('/admin/users'),
-        api.get('/admin/accounts'),
+      const [usersData, acctsData] = await Promise.all([
+        getAllPages<UserData>('/admin/users'),
+        getAllPages<AWSAccount>('/admin/accounts'),
       ]);
-      setUsers(usersRes.data);
-      setAccounts(acctsRes.data);
+      setUsers(usersData);
+      setAccounts(acctsData);
+      setPasswords({});
+      setShowPasswords({});
     } catch (err: any) {
       setError(err.response?.data?.detail || 'Failed to load');
     } finally {
@@ -88,6 +90,24 @@ export default function AdminUsersPage() {
     }
   };
 
+  // Passwords are decrypted one user at a time, only when revealed
+  const togglePassword = async (id: number) => {
+    if (showPasswords[id]) {
+      setShowPasswords(p => ({ ...p, [id]: false }));
+      return;
+    }
+    if (!(id in passwords)) {
+      try {
+        const res = await api.get(`/admin/users/${id}/password`);
+        setPasswords(p => ({ ...p, [id]: res.data.plain_password }));
+      } catch (err: any) {
+        setError(err.response?.data?.detail || 'Failed to load password');
+        return;
+      }
+    }
+    setShowPasswords(p => ({ ...p, [id]: true }));
+  };
+
   const handleResetPassword = async () => {
     if (!resetModal || !newPassword) return;
     try {
@@ -222,19 +242,17 @@ export default function AdminUsersPage() {
                   </td>
                   <td className="px-4 py-3 text-dark-500">{u.login_attempts}/5</td>
                   <td className="px-4 py-3">
-                    {u.plain_password ? (
-                      <div className="flex items-center gap-1">
-                        <span className="font-mono text-xs">
-                          {showPasswords[u.id] ? u.plain_password : '••••••••'}
-                        </span>
-                        <button
-                          onClick={() => setShowPasswords(p => ({ ...p, [u.id]: !p[u.id] }))}
-                          className="text-dark-400 hover:text-dark-600"
-                        >
-                          {showPasswords[u.id] ? <EyeOff size={12} /> : <Eye size={12} />}
-                        </button>
-                      </div>
-                    ) : '-'}
+                    <div className="flex items-center gap-1">
+                      <span className="font-mono text-xs">
+                        {showPasswords[u.id] ? (passwords[u.id] || '-') : '••••••••'}
+                      </span>
+                      <button
+                        onClick={() => togglePassword(u.id)}
+                        className="text-dark-400 hover:text-dark-600"
+                      >
+                        {showPasswords[u.id] ? <EyeOff size={12} /> : <Eye size={12} />}
+                      </button>
+                    </div>
                   </td>
                   <td className="px-4 py-3 text-xs text-dark-500">
                     {u.account_ids?.length || 0} assigned